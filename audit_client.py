@@ -0,0 +1,111 @@
+"""
+Client léger du démon d'audit (`serve`), sans dépendance aux modules d'analyse.
+"""
+import json
+import os
+import socket
+from typing import List, Dict, Any, Optional, Tuple
+from exceptions import DaemonError
+
+# Adresse par défaut du démon : socket Unix à côté du cache de résultats
+# (result_cache.DEFAULT_CACHE_DIR, non importé pour garder le client léger)
+DEFAULT_SOCKET = os.path.join('.cobol-audit-cache', 'daemon.sock')
+
+
+def parse_address(address: str) -> Tuple[Optional[str], Optional[str], Optional[int]]:
+    """Décompose une adresse de démon en (socket, hôte, port).
+
+    `http://127.0.0.1:8765` désigne un démon HTTP local ; toute autre
+    valeur est le chemin d'un socket Unix.
+    """
+    if address.startswith('http://'):
+        host, _, port = address[len('http://'):].rstrip('/').rpartition(':')
+        return None, host or '127.0.0.1', int(port)
+    return address, None, None
+
+
+class DaemonClient:
+    """Client léger du démon d'audit (bibliothèque standard seulement)."""
+
+    def __init__(self, address: str = DEFAULT_SOCKET, timeout: float = 300.0):
+        self.address = address
+        self.timeout = timeout
+        self.socket_path, self.host, self.port = parse_address(address)
+
+    def available(self) -> bool:
+        """Indique si un démon répond à cette adresse."""
+        if self.socket_path is not None and not os.path.exists(self.socket_path):
+            return False
+        try:
+            status, _ = self._request('GET', '/health', timeout=2.0)
+        except (OSError, DaemonError):
+            return False
+        return status == 200
+
+    def health(self) -> Dict[str, Any]:
+        return self._json('GET', '/health')
+
+    def audit(self, file_path: str, detailed: bool = False, copybook_paths: Optional[List[str]] = None,
+              streaming: bool = False, mapped: bool = False, rules: Optional[List[str]] = None,
+              skip_rules: Optional[List[str]] = None, cache_dir: Optional[str] = None) -> str:
+        """Fait auditer un fichier par le démon et retourne le rapport JSON.
+
+        Avec `cache_dir`, le démon utilise ce cache de résultats plutôt que
+        le sien.
+        """
+        status, body = self._request('POST', '/audit', {
+            'file_path': os.path.abspath(file_path),
+            'display_path': file_path,
+            'detailed': detailed,
+            'copybook_paths': [os.path.abspath(path) for path in copybook_paths or []],
+            'streaming': streaming,
+            'mapped': mapped,
+            'rules': rules,
+            'skip_rules': skip_rules,
+            'cache_dir': os.path.abspath(cache_dir) if cache_dir else None
+        })
+        if status != 200:
+            raise DaemonError(json.loads(body).get('error', f'statut HTTP {status}'))
+        return body
+
+    def shutdown(self) -> Dict[str, Any]:
+        return self._json('POST', '/shutdown')
+
+    def _json(self, method: str, path: str) -> Dict[str, Any]:
+        status, body = self._request(method, path)
+        if status != 200:
+            raise DaemonError(f"Réponse inattendue du démon ({status}): {body}")
+        return json.loads(body)
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None,
+                 timeout: Optional[float] = None) -> Tuple[int, str]:
+        """Envoie une requête HTTP/1.1 et lit la réponse jusqu'à la fermeture.
+
+        Le démon ferme la connexion après chaque réponse : un client sur
+        socket brut suffit, sans charger http.client au démarrage de la CLI.
+        """
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        head = (f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n'
+                f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\n'
+                f'Connection: close\r\n\r\n').encode('ascii')
+        if self.socket_path is not None:
+            family, address = socket.AF_UNIX, self.socket_path
+        else:
+            family, address = socket.AF_INET, (self.host, self.port)
+        connection = socket.socket(family, socket.SOCK_STREAM)
+        connection.settimeout(timeout or self.timeout)
+        with connection:
+            connection.connect(address)
+            connection.sendall(head + body)
+            chunks = []
+            while True:
+                chunk = connection.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        response = b''.join(chunks)
+        header, separator, content = response.partition(b'\r\n\r\n')
+        status_line = header.split(b'\r\n', 1)[0].split()
+        if not separator or len(status_line) < 2 or not status_line[1].isdigit():
+            raise DaemonError('réponse HTTP invalide du démon')
+        return int(status_line[1]), content.decode('utf-8')
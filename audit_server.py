@@ -0,0 +1,198 @@
+"""
+Démon d'audit : analyseur gardé chaud, interrogé par socket Unix ou HTTP local.
+"""
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Any, Optional, Tuple
+from audit_client import DaemonClient, DEFAULT_SOCKET
+from exceptions import DaemonError
+from exporters import JsonExporter
+from logger import logger, start_worker_logging, stop_worker_logging, init_worker_logging
+from portfolio import analyze_one
+
+# Taille maximale d'une requête (corps JSON)
+MAX_REQUEST_BYTES = 1024 * 1024
+
+# Délai de lecture d'une requête (secondes) : un client bloqué ne garde pas sa connexion
+REQUEST_TIMEOUT = 30.0
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 408: 'Request Timeout',
+            422: 'Unprocessable Entity', 500: 'Internal Server Error'}
+
+
+def _warm_up() -> int:
+    """Premier appel d'un worker : les modules d'analyse sont déjà importés."""
+    return os.getpid()
+
+
+def _init_worker(log_queue, log_level) -> None:
+    if log_queue is not None:
+        init_worker_logging(log_queue, log_level)
+
+
+class AuditServer:
+    """Serveur asyncio acceptant des demandes d'audit.
+
+    Les connexions sont gérées par la boucle asyncio ; l'analyse, liée au
+    CPU, est confiée à un pool de processus démarré une fois pour toutes :
+    ses workers gardent modules, expressions compilées, copybooks et
+    connexions au cache de résultats d'une requête à l'autre.
+
+    Protocole (HTTP/1.1, une requête par connexion, corps JSON) :
+    - `GET /health` : état du démon ;
+    - `POST /audit` : `{"file_path", "display_path", "detailed",
+      "copybook_paths", "streaming", "mapped", "rules", "skip_rules",
+      "cache_dir"}`, réponse identique à `JsonExporter` ; `cache_dir`
+      (cache de résultats du client) remplace celui du démon ;
+    - `POST /shutdown` : arrêt du démon.
+
+    Une requête qui n'est pas reçue en entier dans `request_timeout`
+    secondes est rejetée (408) et sa connexion fermée.
+    """
+
+    def __init__(self, socket_path: Optional[str] = DEFAULT_SOCKET, host: str = '127.0.0.1',
+                 port: Optional[int] = None, jobs: Optional[int] = None,
+                 cache_dir: Optional[str] = None, request_timeout: float = REQUEST_TIMEOUT):
+        self.socket_path = socket_path if port is None else None
+        self.host = host
+        self.port = port
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.request_timeout = request_timeout
+        self.requests = 0
+        # Adresse effective une fois à l'écoute (port choisi par le système si 0)
+        self.address: Optional[str] = None
+        self.ready = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def serve_forever(self) -> None:
+        """Démarre le démon et bloque jusqu'à son arrêt."""
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        self._stopping = asyncio.Event()
+        log_queue = start_worker_logging()
+        self._executor = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_worker,
+                                             initargs=(log_queue, logger.level))
+        loop = asyncio.get_running_loop()
+        try:
+            # Démarre les workers avant la première requête
+            await asyncio.gather(*(loop.run_in_executor(self._executor, _warm_up)
+                                   for _ in range(self.jobs)))
+            server = await self._listen()
+            logger.info("Démon d'audit à l'écoute sur %s (%d workers)", self.address, self.jobs)
+            self.ready.set()
+            async with server:
+                await self._stopping.wait()
+        finally:
+            self._executor.shutdown()
+            stop_worker_logging()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self.ready.clear()
+            logger.info("Démon d'audit arrêté après %d requêtes", self.requests)
+
+    async def _listen(self):
+        if self.socket_path is None:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+            host, port = server.sockets[0].getsockname()[:2]
+            self.address = f'http://{host}:{port}'
+            return server
+        directory = os.path.dirname(self.socket_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            if DaemonClient(self.socket_path).available():
+                raise DaemonError(f"Un démon écoute déjà sur {self.socket_path}")
+            # Socket orphelin d'un démon interrompu
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        self.address = self.socket_path
+        return server
+
+    def stop(self) -> None:
+        """Demande l'arrêt du démon (depuis la boucle asyncio)."""
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Lit une requête HTTP, la traite et répond en JSON."""
+        try:
+            try:
+                method, path, body = await asyncio.wait_for(self._read_request(reader),
+                                                            self.request_timeout)
+                status, payload = await self._dispatch(method, path, body)
+            except asyncio.TimeoutError:
+                status, payload = 408, json.dumps({'error': 'requête incomplète dans le délai imparti'})
+            except DaemonError as e:
+                status, payload = 400, json.dumps({'error': str(e)})
+            except ValueError as e:
+                status, payload = 400, json.dumps({'error': f"Requête invalide: {e}"})
+            except Exception as e:
+                logger.error("Erreur du démon d'audit: %s", e)
+                status, payload = 500, json.dumps({'error': str(e)})
+            data = payload.encode('utf-8')
+            writer.write(
+                f'HTTP/1.1 {status} {_REASONS.get(status, "")}\r\n'
+                f'Content-Type: application/json; charset=utf-8\r\n'
+                f'Content-Length: {len(data)}\r\n'
+                f'Connection: close\r\n\r\n'.encode('ascii') + data
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) < 2:
+            raise DaemonError('ligne de requête HTTP invalide')
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > MAX_REQUEST_BYTES:
+            raise DaemonError('requête trop volumineuse')
+        body = await reader.readexactly(length) if length else b''
+        return request_line[0].upper(), request_line[1], body
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Tuple[int, str]:
+        if method == 'GET' and path == '/health':
+            return 200, json.dumps({'status': 'ok', 'pid': os.getpid(), 'jobs': self.jobs,
+                                    'requests': self.requests})
+        if method == 'POST' and path == '/audit':
+            self.requests += 1
+            return await self._audit(json.loads(body or b'{}'))
+        if method == 'POST' and path == '/shutdown':
+            asyncio.get_running_loop().call_soon(self.stop)
+            return 200, json.dumps({'status': 'stopping'})
+        return 404, json.dumps({'error': f"Route inconnue: {method} {path}"})
+
+    async def _audit(self, request: Dict[str, Any]) -> Tuple[int, str]:
+        """Analyse un fichier dans le pool, puis l'exporte comme `JsonExporter`."""
+        file_path = request.get('file_path')
+        if not file_path:
+            raise DaemonError('file_path manquant')
+        loop = asyncio.get_running_loop()
+        analyze = partial(analyze_one, file_path, request.get('copybook_paths') or [],
+                          request.get('cache_dir') or self.cache_dir,
+                          rules=request.get('rules'), skip_rules=request.get('skip_rules'),
+                          streaming=bool(request.get('streaming')), mapped=bool(request.get('mapped')))
+        result = await loop.run_in_executor(self._executor, analyze)
+        if result['error']:
+            return 422, json.dumps({'error': result['error']})
+        # L'export relit les lignes signalées : hors de la boucle asyncio
+        output = await loop.run_in_executor(
+            None, JsonExporter.export, result, request.get('display_path') or file_path,
+            bool(request.get('detailed')), file_path
+        )
+        return 200, output
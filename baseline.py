@@ -0,0 +1,202 @@
+"""
+Empreintes stables des problèmes et référentiel des problèmes connus.
+"""
+import hashlib
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import groupby
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+from call_graph import program_name
+from issues import Issue
+from lexer import logical_lines
+from source_buffer import SourceBuffer
+
+# En-tête du fichier de référentiel, suivi des empreintes (entiers de 64 bits, petit-boutiste)
+BASELINE_MAGIC = b'CBLBSL1\n'
+
+# En-tête de section (WORKING-STORAGE SECTION, 2000-TRAITEMENT SECTION...)
+SECTION_HEADER_PATTERN = re.compile(
+    rb'^(?:[^\r\n]{6} )?[ \t]*([A-Za-z0-9][\w-]*)[ \t]+SECTION\b', re.MULTILINE | re.IGNORECASE
+)
+
+# Paragraphe PROGRAM-ID de la division IDENTIFICATION
+PROGRAM_ID_PATTERN = re.compile(
+    rb'^(?:[^\r\n]{6} )?[ \t]*PROGRAM-ID\.?[ \t]+[\'"]?([\w-]+)', re.MULTILINE | re.IGNORECASE
+)
+
+
+def _digest(*parts: str) -> int:
+    """Empreinte de 64 bits, identique d'un processus à l'autre (contrairement à hash)."""
+    data = '\0'.join(parts).encode('utf-8', errors='surrogatepass')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+class SourceScopes:
+    """Programme, portée (section, ou à défaut division) et contenu normalisé des lignes d'un source.
+
+    Les en-têtes de section sont repérés d'une seule recherche sur le
+    fichier projeté en mémoire ; la portée d'une ligne s'obtient ensuite
+    par dichotomie sur leurs positions.
+    """
+
+    def __init__(self, file_path: str):
+        self.buffer = None
+        self._starts: List[int] = []
+        self._names: List[str] = []
+        self.program = program_name(file_path, None)
+        try:
+            self.buffer = SourceBuffer(file_path)
+        except (OSError, ValueError):
+            return
+        match = PROGRAM_ID_PATTERN.search(self.buffer.data)
+        if match:
+            self.program = program_name(file_path, match.group(1).decode('ascii', 'replace'))
+        headers = [(start - 1, f'{name} DIVISION')
+                   for name, spans in self.buffer.divisions.items() for start, _ in spans]
+        headers.extend(
+            (self.buffer.line_index(match.start()), match.group(1).decode('ascii', 'replace').upper() + ' SECTION')
+            for match in SECTION_HEADER_PATTERN.finditer(self.buffer.data)
+        )
+        headers.sort()
+        self._starts = [index for index, _ in headers]
+        self._names = [name for _, name in headers]
+
+    def close(self) -> None:
+        """Ferme le fichier source."""
+        if self.buffer is not None:
+            self.buffer.close()
+
+    def scope(self, line_number: Optional[int]) -> str:
+        """Retourne la section ou la division englobant une ligne (numéro base 1)."""
+        if line_number is None:
+            return ''
+        position = bisect_right(self._starts, line_number - 1) - 1
+        return self._names[position] if position >= 0 else ''
+
+    def content(self, line_number: Optional[int]) -> str:
+        """Retourne le code d'une ligne, sans numérotation ni commentaire, espaces réduits."""
+        if self.buffer is None or line_number is None or not 0 < line_number <= len(self.buffer):
+            return ''
+        lines = logical_lines(((line_number, self.buffer.line(line_number)),), self.buffer.source_format)
+        text = next(lines, (line_number, ''))[1]
+        return ' '.join(text.upper().split())
+
+
+def fingerprint_issues(issues: Sequence[Issue], file_path: str) -> List[int]:
+    """Calcule l'empreinte de chaque problème d'un même fichier.
+
+    L'empreinte combine le nom du programme (son PROGRAM-ID, ou à défaut
+    le nom du fichier), le type du problème, la section englobante et le
+    contenu normalisé de la ligne, mais pas le numéro de ligne : ajouter
+    ou retirer du code ailleurs dans le programme ne la modifie pas, et
+    elle ne dépend pas du répertoire d'où le programme est audité. Des
+    problèmes identiques sur ce point sont distingués par leur rang
+    d'apparition.
+    """
+    if not issues:
+        return []
+    scopes = SourceScopes(file_path)
+    program = scopes.program
+    try:
+        occurrences: Dict[Tuple[str, str, str], int] = {}
+        fingerprints = []
+        for issue in issues:
+            key = (issue.rule, scopes.scope(issue.line_number), scopes.content(issue.line_number))
+            rank = occurrences.get(key, 0)
+            occurrences[key] = rank + 1
+            fingerprints.append(_digest(program, *key, str(rank)))
+        return fingerprints
+    finally:
+        scopes.close()
+
+
+class Baseline:
+    """Empreintes des problèmes connus, chargées dans un ensemble (test en O(1)).
+
+    Le fichier est un en-tête suivi des empreintes triées, en entiers de
+    64 bits : un million d'entrées tiennent en 8 Mo et se chargent d'une
+    seule lecture, sans analyse de texte.
+    """
+
+    def __init__(self, fingerprints: Iterable[int] = ()):
+        self.fingerprints = set(fingerprints)
+
+    def __len__(self) -> int:
+        return len(self.fingerprints)
+
+    def __contains__(self, fingerprint: int) -> bool:
+        return fingerprint in self.fingerprints
+
+    @classmethod
+    def load(cls, path: str) -> 'Baseline':
+        """Charge un référentiel écrit par `save`."""
+        with open(path, 'rb') as file:
+            data = file.read()
+        if not data.startswith(BASELINE_MAGIC) or (len(data) - len(BASELINE_MAGIC)) % 8:
+            raise ValueError(f"Fichier de référentiel invalide: {path}")
+        values = array('Q')
+        values.frombytes(data[len(BASELINE_MAGIC):])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return cls(values)
+
+    @staticmethod
+    def save(path: str, fingerprints: Iterable[int]) -> int:
+        """Écrit un référentiel ; retourne le nombre d'empreintes distinctes."""
+        values = array('Q', sorted(set(fingerprints)))
+        if sys.byteorder == 'big':
+            values.byteswap()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(BASELINE_MAGIC)
+            file.write(values.tobytes())
+        return len(values)
+
+
+class BaselineFilter:
+    """Écarte des résultats les problèmes déjà présents dans un référentiel.
+
+    Avec `collect`, les empreintes de tous les problèmes (écartés ou non)
+    sont conservées pour écrire un nouveau référentiel (`save`).
+    """
+
+    def __init__(self, baseline: Optional[Baseline] = None, collect: bool = False):
+        self.baseline = baseline
+        self.collected = array('Q') if collect else None
+        self.suppressed = 0
+
+    def _new_issues(self, issues: Sequence[Issue], file_path: str) -> List[Issue]:
+        fingerprints = fingerprint_issues(issues, file_path)
+        if self.collected is not None:
+            self.collected.extend(fingerprints)
+        if self.baseline is None:
+            return list(issues)
+        known = self.baseline.fingerprints
+        kept = [issue for issue, fingerprint in zip(issues, fingerprints) if fingerprint not in known]
+        self.suppressed += len(issues) - len(kept)
+        return kept
+
+    def apply(self, results: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """Filtre un résultat d'analyse (un fichier, ou portefeuille annoté par fichier)."""
+        issues = []
+        for path, group in groupby(results['issues'], key=lambda issue: issue.file or file_path):
+            issues.extend(self._new_issues(list(group), path))
+        return dict(results, issues=issues)
+
+    def filter_results(self, file_results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Filtre au passage les résultats par fichier d'un audit de portefeuille."""
+        for result in file_results:
+            if result['issues']:
+                result = dict(result, issues=self._new_issues(result['issues'], result['file']))
+            yield result
+
+    def save(self, path: str) -> int:
+        """Écrit le référentiel des empreintes collectées ; retourne leur nombre."""
+        if self.collected is None:
+            raise ValueError("Les empreintes n'ont pas été collectées")
+        return Baseline.save(path, self.collected)
@@ -0,0 +1,9 @@
+"""
+Banc de performance de l'outil d'audit COBOL.
+
+- `generator` : génération déterministe de programmes COBOL synthétiques ;
+- `runner` : mesure du débit (lignes/s) et du pic de mémoire de chaque étape ;
+- `baseline.json` : référence enregistrée, comparée avec un seuil de régression.
+
+Usage : `python -m benchmarks --sizes 1k,100k --check`
+"""
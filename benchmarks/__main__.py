@@ -0,0 +1,7 @@
+"""
+Point d'entrée : python -m benchmarks (depuis la racine du dépôt).
+"""
+from benchmarks.runner import main
+
+if __name__ == '__main__':
+    main()
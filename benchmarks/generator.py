@@ -0,0 +1,190 @@
+"""
+Génération déterministe de programmes COBOL synthétiques.
+"""
+import random
+from typing import List, Dict, Iterator, Optional, TextIO
+
+# Tailles prédéfinies (nombre de lignes visé)
+SIZES: Dict[str, int] = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '1m': 1_000_000,
+}
+
+_VERBS = ('MOVE', 'ADD', 'COMPUTE', 'DISPLAY')
+
+
+class ProgramProfile:
+    """Paramètres d'un programme synthétique.
+
+    Les densités sont des probabilités par instruction générée ; le
+    nombre de sections et d'éléments de données est proportionnel au
+    nombre de lignes visé, pour garder des procédures de taille réaliste.
+    """
+
+    def __init__(self, lines: int = 1_000, seed: int = 42, lines_per_section: int = 50,
+                 data_ratio: float = 0.15, max_nesting: int = 3, goto_density: float = 0.02,
+                 perform_density: float = 0.08, if_density: float = 0.12,
+                 call_density: float = 0.01, comment_density: float = 0.05):
+        self.lines = lines
+        self.seed = seed
+        self.lines_per_section = lines_per_section
+        self.data_ratio = data_ratio
+        self.max_nesting = max_nesting
+        self.goto_density = goto_density
+        self.perform_density = perform_density
+        self.if_density = if_density
+        self.call_density = call_density
+        self.comment_density = comment_density
+
+    @property
+    def sections(self) -> int:
+        procedure_lines = self.lines * (1 - self.data_ratio)
+        return max(2, int(procedure_lines // self.lines_per_section))
+
+    @property
+    def data_items(self) -> int:
+        return max(4, int(self.lines * self.data_ratio))
+
+    @classmethod
+    def for_size(cls, size: str, **overrides) -> 'ProgramProfile':
+        """Retourne le profil d'une taille prédéfinie (1k, 100k, 1m)."""
+        return cls(lines=SIZES[size], **overrides)
+
+
+class ProgramGenerator:
+    """Produit ligne par ligne un programme conforme à un profil.
+
+    À profil égal (graine comprise), le programme généré est identique
+    octet pour octet : les mesures restent comparables d'une exécution à
+    l'autre.
+    """
+
+    def __init__(self, profile: ProgramProfile):
+        self.profile = profile
+        self.random = random.Random(profile.seed)
+        self.variables: List[str] = []
+        self.sections: List[str] = [f'SEC-{n:05d}' for n in range(profile.sections)]
+
+    def lines(self) -> Iterator[str]:
+        """Produit les lignes du programme (sans fin de ligne)."""
+        yield from self._identification()
+        yield from self._data()
+        yield from self._procedure()
+
+    def _identification(self) -> Iterator[str]:
+        yield '       IDENTIFICATION DIVISION.'
+        yield f'       PROGRAM-ID. BENCH{self.profile.seed:03d}.'
+        yield '       AUTHOR. BENCHMARK-GENERATOR.'
+        yield ''
+        yield '       ENVIRONMENT DIVISION.'
+        yield '       CONFIGURATION SECTION.'
+        yield '       SOURCE-COMPUTER. X8086.'
+        yield ''
+
+    def _data(self) -> Iterator[str]:
+        rng = self.random
+        yield '       DATA DIVISION.'
+        yield '       WORKING-STORAGE SECTION.'
+        count = 0
+        while count < self.profile.data_items:
+            group = f'WS-GROUP-{count:05d}'
+            yield f'       01  {group}.'
+            count += 1
+            for _ in range(rng.randint(2, 6)):
+                if rng.random() < 0.1:
+                    yield '           05  FILLER      PIC X(5).'
+                else:
+                    name = f'WS-ITEM-{count:05d}'
+                    self.variables.append(name)
+                    if rng.random() < 0.3:
+                        yield f'           05  {name}  PIC 9(4)  VALUE {rng.randint(0, 999)}.'
+                    else:
+                        yield f'           05  {name}  PIC X({rng.randint(1, 40)}).'
+                count += 1
+        yield ''
+
+    def _procedure(self) -> Iterator[str]:
+        profile = self.profile
+        yield '       PROCEDURE DIVISION.'
+        budget = profile.lines - profile.data_items * 1.1 - 12
+        per_section = max(4, int(budget // len(self.sections)))
+        for index, section in enumerate(self.sections):
+            yield f'       {section} SECTION.'
+            yield from self._statements(per_section - 2, index)
+            if index == 0:
+                yield '           STOP RUN.'
+            else:
+                yield '           EXIT.'
+
+    def _statements(self, count: int, section_index: int) -> Iterator[str]:
+        rng = self.random
+        profile = self.profile
+        depth = 0
+        emitted = 0
+        while emitted < count:
+            indent = '           ' + '    ' * depth
+            roll = rng.random()
+            if roll < profile.comment_density:
+                line = '      * COMMENTAIRE GENERE'
+            elif (roll := roll - profile.comment_density) < profile.if_density:
+                if depth < profile.max_nesting:
+                    line = f'{indent}IF {self._variable()} > {rng.randint(1, 500)}'
+                    depth += 1
+                elif depth:
+                    depth -= 1
+                    line = '           ' + '    ' * depth + 'END-IF'
+                else:
+                    line = f'{indent}CONTINUE'
+            elif (roll := roll - profile.if_density) < profile.perform_density:
+                line = f'{indent}PERFORM {self._target(section_index)}'
+            elif (roll := roll - profile.perform_density) < profile.goto_density:
+                line = f'{indent}GO TO {self._target(section_index)}'
+            elif (roll := roll - profile.goto_density) < profile.call_density:
+                line = f"{indent}CALL 'SUB{rng.randint(0, 99):03d}' USING {self._variable()}"
+            else:
+                line = self._simple_statement(indent)
+            emitted += 1
+            yield line
+            if depth and rng.random() < 0.25:
+                depth -= 1
+                emitted += 1
+                yield '           ' + '    ' * depth + 'END-IF'
+        while depth:
+            depth -= 1
+            yield '           ' + '    ' * depth + 'END-IF'
+
+    def _simple_statement(self, indent: str) -> str:
+        rng = self.random
+        verb = rng.choice(_VERBS)
+        if verb == 'MOVE':
+            return f'{indent}MOVE {self._variable()} TO {self._variable()}'
+        if verb == 'ADD':
+            return f'{indent}ADD {rng.randint(1, 9)} TO {self._variable()}'
+        if verb == 'COMPUTE':
+            return f'{indent}COMPUTE {self._variable()} = {self._variable()} * {rng.randint(2, 99)}'
+        return f'{indent}DISPLAY {self._variable()}'
+
+    def _variable(self) -> str:
+        return self.random.choice(self.variables)
+
+    def _target(self, section_index: int) -> str:
+        # Cibles vers l'avant : le graphe reste acyclique, comme souvent en batch
+        if section_index + 1 >= len(self.sections):
+            return self.sections[-1]
+        return self.sections[self.random.randint(section_index + 1, len(self.sections) - 1)]
+
+    def write(self, stream: TextIO) -> int:
+        """Écrit le programme dans un flux et retourne le nombre de lignes."""
+        count = 0
+        for line in self.lines():
+            stream.write(line + '\n')
+            count += 1
+        return count
+
+
+def generate_program(path: str, profile: Optional[ProgramProfile] = None) -> int:
+    """Écrit un programme synthétique dans un fichier et retourne son nombre de lignes."""
+    generator = ProgramGenerator(profile or ProgramProfile())
+    with open(path, 'w', encoding='utf-8') as file:
+        return generator.write(file)
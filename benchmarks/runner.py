@@ -0,0 +1,273 @@
+"""
+Mesure du débit et du pic mémoire de chaque étape de l'audit.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List, Dict, Any, Callable, Optional
+import click
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.generator import SIZES, ProgramProfile, generate_program
+from cobol_analyzer import CobolAnalyzer
+from cobol_parser import CobolParser
+from cobol_report import CobolReport
+from exporters import JsonExporter, NdjsonExporter, CsvExporter, SonarQubeExporter
+from html_report import HtmlDashboard
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+MAIN_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+
+# Baisse de débit tolérée avant de signaler une régression
+DEFAULT_THRESHOLD = 0.25
+
+# Durée en dessous de laquelle une étape est trop bruitée pour être comparée
+MIN_COMPARABLE_SECONDS = 0.01
+
+# Objectif de démarrage à froid de `audit -f json` sur un petit fichier
+# (interpréteur, imports et analyse compris), cas d'un hook pre-commit
+STARTUP_TARGET_SECONDS = 0.35
+STARTUP_LINES = 200
+
+console = Console()
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus courant (Mo)."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en kilo-octets ailleurs
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _timed(stages: List[Dict[str, Any]], name: str, lines: int, repeat: int,
+           action: Callable[[], Any]) -> Any:
+    """Exécute une étape `repeat` fois et enregistre le meilleur temps."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = action()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    stages.append({
+        'stage': name,
+        'seconds': round(best, 6),
+        'lines_per_sec': round(lines / best) if best else 0,
+        'peak_rss_mb': round(peak_rss_mb(), 1)
+    })
+    return result
+
+
+def _export(exporter, results: Dict[str, Any], file_path: str) -> None:
+    with open(os.devnull, 'w', encoding='utf-8') as stream:
+        exporter.write(results, file_path, stream)
+
+
+def _export_pdf(results: Dict[str, Any], file_path: str) -> None:
+    with open(os.devnull, 'wb') as stream:
+        CobolReport().write(results, file_path, stream, 'pdf')
+
+
+def _export_html(results: Dict[str, Any], file_path: str) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        HtmlDashboard.write(results, file_path, directory)
+
+
+def measure_file(file_path: str, repeat: int = 1) -> Dict[str, Any]:
+    """Mesure chaque étape sur un fichier : parsing, moteurs par division, exports.
+
+    Le pic mémoire est celui du processus à la fin de l'étape : lancer
+    une mesure par processus (voir `run_sizes`) pour des valeurs isolées.
+    """
+    stages: List[Dict[str, Any]] = []
+    with open(file_path, 'rb') as file:
+        lines = sum(1 for _ in file)
+
+    def parse():
+        parser = CobolParser()
+        return parser, parser.parse_file(file_path)
+    parser, divisions = _timed(stages, 'parse', lines, repeat, parse)
+
+    analyzer = CobolAnalyzer()
+    analyzer.parser = parser
+    engines = analyzer._build_engines()
+    for name, engine in engines.items():
+        division_lines = len(divisions[name])
+        # Un moteur accumule ses résultats : il n'est exécuté qu'une fois
+        _timed(stages, f'analyze:{name}', division_lines, 1,
+               lambda: engine.run(divisions[name], parser.line_numbers[name], parser.tokens_for(name)))
+    analyzer.engines = engines
+    _timed(stages, 'analyze:collect', lines, 1,
+           lambda: analyzer._collect_results({name: len(d) for name, d in divisions.items()}))
+    results = {'issues': analyzer.issues, 'metrics': analyzer.metrics, 'calls': analyzer.calls}
+
+    _timed(stages, 'analyze:file', lines, repeat, lambda: CobolAnalyzer().analyze_file(file_path))
+    _timed(stages, 'analyze:streaming', lines, repeat,
+           lambda: CobolAnalyzer().analyze_file(file_path, streaming=True))
+
+    for name, exporter in (('json', JsonExporter), ('ndjson', NdjsonExporter), ('csv', CsvExporter)):
+        _timed(stages, f'export:{name}', lines, repeat, lambda: _export(exporter, results, file_path))
+    _timed(stages, 'export:sonarqube', lines, repeat,
+           lambda: json.dumps(SonarQubeExporter.export(results, file_path)))
+    _timed(stages, 'export:markdown', lines, repeat,
+           lambda: CobolReport().generate(results, file_path, 'markdown'))
+    _timed(stages, 'export:pdf', lines, repeat, lambda: _export_pdf(results, file_path))
+    _timed(stages, 'export:html', lines, repeat, lambda: _export_html(results, file_path))
+
+    return {'lines': lines, 'issues': len(results['issues']), 'stages': stages}
+
+
+def measure_startup(repeat: int = 5, directory: Optional[str] = None) -> Dict[str, Any]:
+    """Mesure le démarrage à froid de la CLI (`audit -f json`) dans un nouveau processus."""
+    stages: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix='cobol-startup-') as tmp:
+        directory = directory or tmp
+        path = os.path.join(directory, 'startup.cbl')
+        lines = generate_program(path, ProgramProfile(lines=STARTUP_LINES))
+        command = [sys.executable, MAIN_SCRIPT, 'audit', path, '-f', 'json', '-o', os.devnull]
+        # Le répertoire courant est temporaire : aucune trace laissée dans le dépôt
+        _timed(stages, 'startup:audit-json', lines, repeat,
+               lambda: subprocess.run(command, cwd=directory, check=True, capture_output=True))
+    return {'lines': lines, 'issues': 0, 'stages': stages}
+
+
+def check_startup(report: Dict[str, Any], target: float = STARTUP_TARGET_SECONDS) -> List[str]:
+    """Retourne un message si le démarrage dépasse l'objectif absolu."""
+    return [
+        f"startup {stage['stage']}: {stage['seconds']:.3f} s (objectif {target:.2f} s)"
+        for stage in report['stages'] if stage['seconds'] > target
+    ]
+
+
+def _measure_size(size: str, directory: str, repeat: int) -> Dict[str, Any]:
+    """Génère puis mesure un programme d'une taille donnée (dans un processus dédié)."""
+    path = os.path.join(directory, f'bench-{size}.cbl')
+    if not os.path.exists(path):
+        generate_program(path, ProgramProfile.for_size(size))
+    return measure_file(path, repeat)
+
+
+def run_sizes(sizes: List[str], repeat: int = 1, directory: Optional[str] = None) -> Dict[str, Any]:
+    """Mesure chaque taille dans un processus neuf, pour isoler les pics mémoire."""
+    reports = {}
+    with tempfile.TemporaryDirectory(prefix='cobol-bench-') as tmp:
+        for size in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                reports[size] = executor.submit(_measure_size, size, directory or tmp, repeat).result()
+    return reports
+
+
+def compare_to_baseline(reports: Dict[str, Any], baseline: Dict[str, Any],
+                        threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """Retourne les étapes dont le débit a baissé de plus de `threshold`."""
+    regressions = []
+    for size, report in reports.items():
+        reference = {s['stage']: s for s in baseline.get(size, {}).get('stages', [])}
+        for stage in report['stages']:
+            expected = reference.get(stage['stage'])
+            if expected is None or expected['seconds'] < MIN_COMPARABLE_SECONDS:
+                continue
+            floor = expected['lines_per_sec'] * (1 - threshold)
+            if stage['lines_per_sec'] < floor:
+                regressions.append(
+                    f"{size} {stage['stage']}: {stage['lines_per_sec']:,.0f} lignes/s "
+                    f"(référence {expected['lines_per_sec']:,.0f})"
+                )
+    return regressions
+
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    """Charge la référence enregistrée (vide si absente)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(reports: Dict[str, Any], path: str = BASELINE_PATH) -> None:
+    """Enregistre les mesures comme nouvelle référence (fusionnée par taille)."""
+    baseline = load_baseline(path)
+    baseline.update(reports)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def _display(reports: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    for size, report in reports.items():
+        reference = {s['stage']: s for s in baseline.get(size, {}).get('stages', [])}
+        table = Table(title=f"{size} — {report['lines']:,} lignes, {report['issues']:,} problèmes")
+        table.add_column("Étape", style="cyan")
+        table.add_column("Temps (s)", justify="right")
+        table.add_column("Lignes/s", justify="right", style="magenta")
+        table.add_column("Référence", justify="right")
+        table.add_column("Pic RSS (Mo)", justify="right", style="green")
+        for stage in report['stages']:
+            expected = reference.get(stage['stage'])
+            table.add_row(
+                stage['stage'],
+                f"{stage['seconds']:.3f}",
+                f"{stage['lines_per_sec']:,.0f}",
+                f"{expected['lines_per_sec']:,.0f}" if expected else '-',
+                f"{stage['peak_rss_mb']:.1f}"
+            )
+        console.print(table)
+
+
+@click.command()
+@click.option('--sizes', default='1k,100k', show_default=True,
+              help=f"Tailles à mesurer, parmi {', '.join(SIZES)}")
+@click.option('--repeat', '-r', type=click.IntRange(min=1), default=3, show_default=True,
+              help='Répétitions par étape (le meilleur temps est retenu)')
+@click.option('--check', is_flag=True,
+              help='Échoue si une étape régresse par rapport à la référence')
+@click.option('--threshold', type=click.FloatRange(0, 1), default=DEFAULT_THRESHOLD, show_default=True,
+              help='Baisse de débit tolérée pour --check')
+@click.option('--update-baseline', is_flag=True,
+              help='Enregistre les mesures comme nouvelle référence')
+@click.option('--baseline', 'baseline_path', type=click.Path(dir_okay=False), default=BASELINE_PATH,
+              help='Fichier de référence')
+@click.option('--output', '-o', type=click.Path(dir_okay=False),
+              help='Écrit les mesures brutes en JSON')
+@click.option('--startup/--no-startup', default=True, show_default=True,
+              help=f'Mesure le démarrage à froid de la CLI (objectif {STARTUP_TARGET_SECONDS} s)')
+def main(sizes: str, repeat: int, check: bool, threshold: float, update_baseline: bool,
+         baseline_path: str, output: Optional[str], startup: bool):
+    """Mesure le parsing, l'analyse et les exports sur des programmes synthétiques."""
+    sizes = [size.strip().lower() for size in sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        raise click.BadParameter(f"tailles inconnues: {', '.join(unknown)}", param_hint='--sizes')
+
+    reports = run_sizes(sizes, repeat)
+    if startup:
+        reports['startup'] = measure_startup(max(repeat, 5))
+    baseline = load_baseline(baseline_path)
+    _display(reports, baseline)
+
+    if output:
+        with open(output, 'w', encoding='utf-8') as file:
+            json.dump(reports, file, indent=2)
+    if update_baseline:
+        save_baseline(reports, baseline_path)
+        console.print(f"[green]Référence mise à jour: {baseline_path}")
+    if check:
+        regressions = compare_to_baseline(reports, baseline, threshold)
+        if startup:
+            regressions += check_startup(reports['startup'])
+        for regression in regressions:
+            console.print(f"[red]Régression: {regression}")
+        if regressions:
+            sys.exit(1)
+        console.print("[green]Aucune régression au-delà du seuil")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Index persistant des appels entre programmes d'un portefeuille.
+"""
+import os
+import sqlite3
+from collections import deque
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from result_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_CALL_INDEX = os.path.join(DEFAULT_CACHE_DIR, 'calls.sqlite3')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS programs (
+    file TEXT PRIMARY KEY,
+    program_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS programs_program_id ON programs (program_id);
+CREATE TABLE IF NOT EXISTS calls (
+    file TEXT NOT NULL,
+    target TEXT,
+    via TEXT
+);
+CREATE INDEX IF NOT EXISTS calls_file ON calls (file);
+CREATE INDEX IF NOT EXISTS calls_target ON calls (target);
+"""
+
+
+def program_name(file_path: str, program_id: Optional[str]) -> str:
+    """Nom d'un programme : son PROGRAM-ID, ou à défaut le nom du fichier."""
+    if program_id:
+        return program_id.upper()
+    return os.path.splitext(os.path.basename(file_path))[0].upper()
+
+
+class CallGraphIndex:
+    """Graphe des appels (CALL) entre programmes, stocké dans SQLite.
+
+    Chaque fichier possède ses propres lignes : le réindexer remplace
+    uniquement ses arcs, ce qui permet une mise à jour incrémentale après
+    la modification d'un seul programme. Un appel dynamique (CALL sur une
+    variable) est enregistré avec la variable dans `via` et un arc par
+    candidat connu, ou un arc sans cible si aucun candidat n'est connu.
+    """
+
+    def __init__(self, path: str = DEFAULT_CALL_INDEX):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Ferme la connexion à la base."""
+        self.connection.close()
+
+    def update(self, file_path: str, calls: Dict[str, Any]) -> None:
+        """Remplace les arcs d'un fichier par ceux de sa dernière analyse."""
+        file_path = os.path.realpath(file_path)
+        rows = [(file_path, target, None) for target in calls['static']]
+        for identifier, candidates in calls['dynamic'].items():
+            rows.extend((file_path, target, identifier) for target in candidates or [None])
+        with self.connection:
+            self.connection.execute('DELETE FROM calls WHERE file = ?', (file_path,))
+            self.connection.execute(
+                'INSERT OR REPLACE INTO programs VALUES (?, ?)',
+                (file_path, program_name(file_path, calls['program_id']))
+            )
+            self.connection.executemany('INSERT INTO calls VALUES (?, ?, ?)', rows)
+
+    def remove(self, file_path: str) -> None:
+        """Retire un fichier de l'index."""
+        file_path = os.path.realpath(file_path)
+        with self.connection:
+            self.connection.execute('DELETE FROM calls WHERE file = ?', (file_path,))
+            self.connection.execute('DELETE FROM programs WHERE file = ?', (file_path,))
+
+    def prune(self, root: str, files: Iterable[str]) -> int:
+        """Retire les fichiers indexés sous `root` qui ne sont plus des programmes de `files`.
+
+        Les copybooks de `files` n'étant pas indexés, ceux qu'un index plus
+        ancien contiendrait sont retirés.
+        """
+        from git_changes import is_copybook
+        root = os.path.join(os.path.realpath(root), '')
+        present = {os.path.realpath(path) for path in files if not is_copybook(path)}
+        stale = [
+            path for (path,) in self.connection.execute('SELECT file FROM programs')
+            if path.startswith(root) and path not in present
+        ]
+        for path in stale:
+            self.remove(path)
+        return len(stale)
+
+    def record(self, file_results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Indexe les résultats d'analyse au passage, sans les retenir.
+
+        Les copybooks (git_changes.COPYBOOK_PATTERNS) ne sont pas des
+        programmes : ils ne sont pas indexés.
+        """
+        # Import différé : la CLI n'importe git_changes qu'à la demande
+        from git_changes import is_copybook
+        for result in file_results:
+            if not result['error'] and not is_copybook(result['file']):
+                self.update(result['file'], result['calls'])
+            yield result
+
+    def programs(self) -> Dict[str, List[str]]:
+        """Retourne les fichiers de chaque programme indexé."""
+        programs: Dict[str, List[str]] = {}
+        for file_path, name in self.connection.execute(
+            'SELECT file, program_id FROM programs ORDER BY program_id, file'
+        ):
+            programs.setdefault(name, []).append(file_path)
+        return programs
+
+    def callers(self, program: str) -> List[Tuple[str, str, Optional[str]]]:
+        """Retourne les appelants d'un programme : (programme, fichier, variable)."""
+        return self.connection.execute(
+            'SELECT DISTINCT programs.program_id, calls.file, calls.via FROM calls '
+            'JOIN programs ON programs.file = calls.file '
+            'WHERE calls.target = ? ORDER BY programs.program_id, calls.file',
+            (program.upper(),)
+        ).fetchall()
+
+    def callees(self, program: str) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Retourne les appelés d'un programme : (cible, variable) ; cible None si inconnue."""
+        return self.connection.execute(
+            'SELECT DISTINCT calls.target, calls.via FROM calls '
+            'JOIN programs ON programs.file = calls.file '
+            'WHERE programs.program_id = ? ORDER BY calls.target, calls.via',
+            (program.upper(),)
+        ).fetchall()
+
+    def edges(self) -> Dict[str, Set[str]]:
+        """Retourne le graphe programme -> programmes appelés (cibles connues)."""
+        graph: Dict[str, Set[str]] = {}
+        for name, target in self.connection.execute(
+            'SELECT programs.program_id, calls.target FROM calls '
+            'JOIN programs ON programs.file = calls.file WHERE calls.target IS NOT NULL'
+        ):
+            graph.setdefault(name, set()).add(target)
+        return graph
+
+    def unreachable(self, roots: Iterable[str] = ()) -> List[str]:
+        """Retourne les programmes indexés jamais atteints.
+
+        Sans racines (programmes lancés par les chaînes batch ou les
+        transactions), un programme est inatteignable s'il n'est appelé par
+        aucun autre programme. Avec racines, le graphe est parcouru en
+        largeur depuis celles-ci.
+        """
+        programs = self.programs()
+        graph = self.edges()
+        roots = [root.upper() for root in roots]
+        if not roots:
+            called = {target for targets in graph.values() for target in targets}
+            return sorted(name for name in programs if name not in called)
+
+        seen = set(roots)
+        queue = deque(roots)
+        while queue:
+            for target in graph.get(queue.popleft(), ()):
+                if target not in seen:
+                    seen.add(target)
+                    queue.append(target)
+        return sorted(name for name in programs if name not in seen)
+
+    def unresolved(self) -> List[str]:
+        """Retourne les programmes appelés qui ne sont pas dans l'index."""
+        return [target for (target,) in self.connection.execute(
+            'SELECT DISTINCT target FROM calls WHERE target IS NOT NULL '
+            'AND target NOT IN (SELECT program_id FROM programs) ORDER BY target'
+        )]
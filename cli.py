@@ -1,19 +1,47 @@
 """
 Interface en ligne de commande pour l'outil d'audit COBOL.
 """
+import contextlib
+import json
+import os
+import sys
+from functools import partial
 import click
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.text import Text
-from cobol_analyzer import CobolAnalyzer
-from cobol_report import CobolReport
-from exporters import JsonExporter, CsvExporter, SonarQubeExporter
+from exporters import JsonExporter, NdjsonExporter, CsvExporter
+from issues import LineResolver
 from exceptions import CobolAuditError
-from logger import logger
-from scoring import AuditScorer
+from logger import logger, enable_file_logging, set_level, shutdown_logging, ROTATIONS
+from portfolio import PortfolioAuditor, DEFAULT_PATTERNS
+from result_cache import ResultCache, DEFAULT_CACHE_DIR
+from call_graph import CallGraphIndex, DEFAULT_CALL_INDEX
+from warehouse import ResultWarehouse, DEFAULT_WAREHOUSE, GROUP_BY
+from baseline import Baseline, BaselineFilter
+from audit_client import DaemonClient, DEFAULT_SOCKET
+from watcher import DEFAULT_INTERVAL
+from profiling import profiler, merge_timings, slowest
+
+# Les modules réservés à certains formats ou affichages (cobol_report et
+# markdown, SonarQube, tableaux rich, git) sont importés à la demande :
+# un audit JSON d'un seul fichier ne paie pas leur chargement.
 
 console = Console()
+# Mesures --profile, hors de la sortie standard où peut s'écrire le rapport
+err_console = Console(stderr=True)
+
+# Formats écrits incrémentalement dans le fichier de sortie
+STREAM_EXPORTERS = {'json': JsonExporter, 'ndjson': NdjsonExporter, 'csv': CsvExporter}
+
+# Options d'audit sans effet en mode --watch (résumé affiché en direct, sans cache)
+WATCH_INCOMPATIBLE = {'output_format': '--output-format', 'output_file': '--output-file',
+                      'use_cache': '--cache', 'cache_dir': '--cache-dir', 'since': '--since',
+                      'baseline_path': '--baseline', 'write_baseline': '--write-baseline',
+                      'use_daemon': '--daemon'}
+
+# En-têtes des tableaux de la commande query (clés de la sortie JSON)
+QUERY_HEADERS = {'run': 'Exécution', 'started': 'Début', 'root': 'Racine', 'files': 'Fichiers',
+                 'issues': 'Problèmes', 'file': 'Fichier', 'line': 'Ligne', 'severity': 'Sévérité',
+                 'rule': 'Règle', 'message': 'Message'}
 
 @click.group()
 def cli():
@@ -23,7 +51,7 @@ def cli():
 @cli.command()
 @click.argument('file_path', type=click.Path(exists=True))
 @click.option('--output-format', '-f', 
-              type=click.Choice(['markdown', 'pdf', 'json', 'csv', 'sonarqube']), 
+              type=click.Choice(['markdown', 'pdf', 'json', 'ndjson', 'csv', 'sonarqube']), 
               default='markdown',
               help='Format du rapport de sortie')
 @click.option('--output-file', '-o', 
@@ -39,51 +67,137 @@ def cli():
               type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR']),
               default='INFO',
               help='Niveau de log')
-def audit(file_path: str, output_format: str, output_file: str, verbose: bool, detailed: bool, log_level: str):
+@click.option('--log-file',
+              metavar='FICHIER',
+              is_flag=False,
+              flag_value='',
+              default=None,
+              envvar='COBOL_AUDIT_LOG_FILE',
+              help='Écrit les logs dans un fichier tournant (sans valeur: logs/cobol_audit.log)')
+@click.option('--log-rotate',
+              type=click.Choice(list(ROTATIONS)),
+              default='size',
+              show_default=True,
+              help='Rotation du fichier de log: par taille (10 Mo, 5 archives), par jour ou par heure')
+@click.option('--streaming', '-s',
+              is_flag=True,
+              help='Lecture en flux à mémoire bornée (gros programmes)')
+@click.option('--mmap', 'mapped',
+              is_flag=True,
+              help='Lecture via projection mémoire (mmap) du fichier source')
+@click.option('--copybook-path', '-I', 'copybook_paths',
+              multiple=True,
+              type=click.Path(exists=True, file_okay=False),
+              help='Répertoire de recherche des copybooks (répétable)')
+@click.option('--cache', 'use_cache',
+              is_flag=True,
+              help='Réutilise les résultats des fichiers inchangés')
+@click.option('--cache-dir',
+              type=click.Path(file_okay=False),
+              default=DEFAULT_CACHE_DIR,
+              show_default=True,
+              help='Répertoire du cache de résultats')
+@click.option('--since',
+              metavar='REV',
+              help='N\'audite que les programmes modifiés depuis la révision git REV '
+                   '(FILE_PATH est alors le répertoire à considérer)')
+@click.option('--rules', 'rules',
+              metavar='NOMS',
+              help='N\'exécute que ces règles, séparées par des virgules (voir la commande rules)')
+@click.option('--skip-rules', 'skip_rules',
+              metavar='NOMS',
+              help='Règles à ne pas exécuter, séparées par des virgules')
+@click.option('--baseline', 'baseline_path',
+              type=click.Path(exists=True, dir_okay=False),
+              help='N\'affiche que les problèmes absents de ce référentiel (voir --write-baseline)')
+@click.option('--write-baseline', 'write_baseline',
+              type=click.Path(dir_okay=False),
+              help='Écrit le référentiel des problèmes de cet audit, nouveaux ou non')
+@click.option('--profile', 'profile',
+              is_flag=True,
+              help='Affiche le temps passé par étape et par règle')
+@click.option('--daemon/--no-daemon', 'use_daemon',
+              default=None,
+              help='Confie l\'analyse au démon d\'audit (par défaut: s\'il est lancé, '
+                   'pour un rapport JSON)')
+@click.option('--daemon-address',
+              default=DEFAULT_SOCKET,
+              envvar='COBOL_AUDIT_DAEMON',
+              show_default=True,
+              help='Socket Unix ou URL http://127.0.0.1:PORT du démon (voir serve)')
+@click.option('--watch', '-w',
+              is_flag=True,
+              help='Surveille FILE_PATH (fichier ou répertoire) et réanalyse à chaque modification')
+@click.option('--interval',
+              type=click.FloatRange(min=0.05),
+              default=DEFAULT_INTERVAL,
+              show_default=True,
+              help='Intervalle de scrutation de --watch (secondes)')
+def audit(file_path: str, output_format: str, output_file: str, verbose: bool, detailed: bool, log_level: str,
+          log_file: str, log_rotate: str, streaming: bool, mapped: bool, copybook_paths: tuple, use_cache: bool, cache_dir: str,
+          since: str, rules: str, skip_rules: str, baseline_path: str, write_baseline: str, profile: bool,
+          use_daemon: bool, daemon_address: str, watch: bool, interval: float):
     """Analyse un fichier COBOL et génère un rapport d'audit."""
+    selection = _rule_selection(rules, skip_rules)
+    if watch:
+        _check_watch_options(click.get_current_context())
+    baseline = _baseline_filter(baseline_path, write_baseline)
     try:
         # Configuration du niveau de log
-        logger.setLevel(log_level)
+        _configure_logging(log_level, log_file, log_rotate)
+        if profile:
+            profiler.enable()
         logger.info(f"Début de l'audit du fichier: {file_path}")
 
-        with console.status("[bold green]Analyse en cours..."):
-            analyzer = CobolAnalyzer()
-            results = analyzer.analyze_file(file_path)
+        if watch:
+            _watch(file_path, list(copybook_paths), detailed, interval,
+                   streaming=streaming, mapped=mapped, **selection)
+            return
+
+        if use_daemon is not False:
+            # Client léger : le démon garde l'analyseur chaud entre deux audits
+            eligible = output_format == 'json' and not (since or profile or verbose or detailed or baseline)
+            if use_daemon and not eligible:
+                raise click.UsageError('--daemon ne produit que des rapports JSON, sans --since, '
+                                       '--baseline, --profile, --verbose ni --detailed')
+            client = DaemonClient(daemon_address)
+            if eligible and (use_daemon or client.available()):
+                _audit_with_daemon(client, file_path, output_file, copybook_paths, streaming, mapped,
+                                   cache_dir if use_cache else None, **selection)
+                return
+
+        from cobol_analyzer import CobolAnalyzer
+        with _status("[bold green]Analyse en cours..."):
+            if since:
+                # Audit des seules modifications depuis une révision
+                from git_changes import ChangeSet, filter_new_issues
+                changes = ChangeSet(since, file_path).collect()
+                logger.info(f"{len(changes)} programmes modifiés depuis {since}")
+                auditor = PortfolioAuditor(copybook_paths=list(copybook_paths),
+                                           cache_dir=cache_dir if use_cache else None,
+                                           profile=profile, streaming=streaming, mapped=mapped,
+                                           **selection)
+                results = filter_new_issues(auditor.audit_files(sorted(changes)), changes)
+            else:
+                cache = ResultCache(cache_dir) if use_cache else None
+                analyzer = CobolAnalyzer(list(copybook_paths), cache=cache, **selection)
+                try:
+                    results = analyzer.analyze_file(file_path, streaming=streaming, mapped=mapped)
+                finally:
+                    if analyzer.source is not None:
+                        analyzer.source.close()
+            if baseline is not None:
+                results = baseline.apply(results, file_path)
 
             if verbose or detailed:
                 _display_summary(results, detailed)
 
-            # Sélection de l'exporteur approprié
-            if output_format == 'json':
-                exporter = JsonExporter()
-                output = exporter.export(results, file_path, detailed)
-            elif output_format == 'csv':
-                exporter = CsvExporter()
-                output = exporter.export(results, file_path, detailed)
-            elif output_format == 'sonarqube':
-                exporter = SonarQubeExporter()
-                output = exporter.export(results, file_path, detailed)
-            else:
-                report = CobolReport()
-                output = report.generate(results, file_path, output_format)
-
-            # Sauvegarde ou affichage du rapport
-            if output_file:
-                mode = 'wb' if output_format == 'pdf' else 'w'
-                with open(output_file, mode) as f:
-                    if output_format == 'sonarqube':
-                        import json
-                        json.dump(output, f, indent=2)
-                    else:
-                        f.write(output)
-                console.print(f"[green]Rapport sauvegardé dans {output_file}")
-            else:
-                if output_format == 'sonarqube':
-                    import json
-                    console.print(json.dumps(output, indent=2))
-                else:
-                    console.print(output)
+            _export_results(results, file_path, output_format, output_file, detailed)
 
+        if profile:
+            _display_profile(results)
+        if baseline is not None:
+            _finish_baseline(baseline, write_baseline)
         logger.info("Audit terminé avec succès")
 
     except CobolAuditError as e:
@@ -94,9 +208,634 @@ def audit(file_path: str, output_format: str, output_file: str, verbose: bool, d
         logger.error(f"Erreur inattendue: {str(e)}")
         console.print(f"[red]Erreur inattendue: {str(e)}")
         raise click.Abort()
+    finally:
+        profiler.disable()
+        shutdown_logging()
+
+@cli.command('audit-dir')
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--jobs', '-j',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Nombre de processus (par défaut: nombre de cœurs)')
+@click.option('--pattern', '-p',
+              multiple=True,
+              default=DEFAULT_PATTERNS,
+              show_default=True,
+              help='Motif glob des fichiers à auditer (répétable)')
+@click.option('--output-format', '-f',
+              type=click.Choice(['markdown', 'pdf', 'json', 'ndjson', 'csv', 'sonarqube', 'html']),
+              default='json',
+              help='Format du rapport de sortie')
+@click.option('--output-file', '-o',
+              type=click.Path(),
+              help='Fichier de sortie pour le rapport')
+@click.option('--verbose', '-v',
+              is_flag=True,
+              help='Mode verbeux')
+@click.option('--detailed', '-d',
+              is_flag=True,
+              help='Mode détaillé avec plus d\'informations')
+@click.option('--log-level', '-l',
+              type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR']),
+              default='INFO',
+              help='Niveau de log')
+@click.option('--log-file',
+              metavar='FICHIER',
+              is_flag=False,
+              flag_value='',
+              default=None,
+              envvar='COBOL_AUDIT_LOG_FILE',
+              help='Écrit les logs dans un fichier tournant (sans valeur: logs/cobol_audit.log)')
+@click.option('--log-rotate',
+              type=click.Choice(list(ROTATIONS)),
+              default='size',
+              show_default=True,
+              help='Rotation du fichier de log: par taille (10 Mo, 5 archives), par jour ou par heure')
+@click.option('--streaming', '-s',
+              is_flag=True,
+              help='Lecture en flux à mémoire bornée (gros programmes)')
+@click.option('--mmap', 'mapped',
+              is_flag=True,
+              help='Lecture via projection mémoire (mmap) du fichier source')
+@click.option('--copybook-path', '-I', 'copybook_paths',
+              multiple=True,
+              type=click.Path(exists=True, file_okay=False),
+              help='Répertoire de recherche des copybooks (répétable)')
+@click.option('--cache', 'use_cache',
+              is_flag=True,
+              help='Réutilise les résultats des fichiers inchangés')
+@click.option('--cache-dir',
+              type=click.Path(file_okay=False),
+              default=DEFAULT_CACHE_DIR,
+              show_default=True,
+              help='Répertoire du cache de résultats')
+@click.option('--index-calls',
+              is_flag=True,
+              help='Met à jour l\'index des appels entre programmes (CALL)')
+@click.option('--call-index',
+              type=click.Path(dir_okay=False),
+              default=DEFAULT_CALL_INDEX,
+              show_default=True,
+              help='Fichier de l\'index des appels')
+@click.option('--store-results',
+              is_flag=True,
+              help='Enregistre l\'audit dans l\'entrepôt de résultats (voir la commande query)')
+@click.option('--warehouse',
+              type=click.Path(dir_okay=False),
+              default=DEFAULT_WAREHOUSE,
+              show_default=True,
+              help='Base SQLite de l\'entrepôt de résultats')
+@click.option('--rules', 'rules',
+              metavar='NOMS',
+              help='N\'exécute que ces règles, séparées par des virgules (voir la commande rules)')
+@click.option('--skip-rules', 'skip_rules',
+              metavar='NOMS',
+              help='Règles à ne pas exécuter, séparées par des virgules')
+@click.option('--baseline', 'baseline_path',
+              type=click.Path(exists=True, dir_okay=False),
+              help='N\'affiche que les problèmes absents de ce référentiel (voir --write-baseline)')
+@click.option('--write-baseline', 'write_baseline',
+              type=click.Path(dir_okay=False),
+              help='Écrit le référentiel des problèmes de cet audit, nouveaux ou non')
+@click.option('--profile', 'profile',
+              is_flag=True,
+              help='Affiche le temps par étape et par règle, cumulé sur les fichiers')
+def audit_dir(directory: str, jobs: int, pattern: tuple, output_format: str, output_file: str,
+              verbose: bool, detailed: bool, log_level: str, log_file: str, log_rotate: str,
+              streaming: bool, mapped: bool,
+              copybook_paths: tuple, use_cache: bool, cache_dir: str, index_calls: bool,
+              call_index: str, store_results: bool, warehouse: str, rules: str, skip_rules: str,
+              baseline_path: str, write_baseline: str, profile: bool):
+    """Analyse en parallèle tous les fichiers COBOL d'une arborescence.
+
+    Avec -f html, --output-file désigne le répertoire du tableau de bord.
+    """
+    selection = _rule_selection(rules, skip_rules)
+    if output_format == 'html' and not output_file:
+        raise click.BadParameter("répertoire de sortie requis pour le format html", param_hint='--output-file')
+    baseline = _baseline_filter(baseline_path, write_baseline)
+    try:
+        _configure_logging(log_level, log_file, log_rotate)
+        if profile:
+            profiler.enable()
+        logger.info(f"Début de l'audit du portefeuille: {directory}")
+
+        with _status("[bold green]Analyse du portefeuille en cours..."):
+            auditor = PortfolioAuditor(jobs=jobs, copybook_paths=list(copybook_paths),
+                                       cache_dir=cache_dir if use_cache else None,
+                                       call_index=call_index if index_calls else None,
+                                       warehouse=warehouse if store_results else None, baseline=baseline,
+                                       profile=profile, streaming=streaming, mapped=mapped,
+                                       **selection)
+            if output_format == 'ndjson':
+                # Les problèmes sont écrits fichier par fichier, pendant l'audit
+                with _open_output(output_file) as stream:
+                    resolver = LineResolver()
+                    sink = profiler.timed('export:ndjson', partial(
+                        NdjsonExporter.write_issues, stream=stream, resolver=resolver))
+                    results = auditor.audit_directory(directory, pattern, issue_sink=sink)
+                    resolver.close()
+                if output_file:
+                    console.print(f"[green]Rapport sauvegardé dans {output_file}")
+            elif output_format == 'html':
+                # Les problèmes sont répartis en fragments pendant l'audit
+                from html_report import HtmlDashboard
+                dashboard = HtmlDashboard(output_file)
+                sink = profiler.timed('export:html', dashboard.write_issues)
+                results = auditor.audit_directory(directory, pattern, issue_sink=sink)
+                with profiler.stage('export:html'):
+                    index = dashboard.finish(results, directory)
+                console.print(f"[green]Tableau de bord sauvegardé dans {index}")
+            else:
+                results = auditor.audit_directory(directory, pattern)
+
+            if verbose or detailed:
+                _display_summary(results, detailed)
+
+            if output_format not in ('ndjson', 'html'):
+                _export_results(results, directory, output_format, output_file, detailed)
+
+        if profile:
+            _display_profile(results)
+        if baseline is not None:
+            _finish_baseline(baseline, write_baseline)
+        if results['errors']:
+            console.print(f"[yellow]{len(results['errors'])} fichier(s) n'ont pas pu être analysés")
+        logger.info(f"Audit du portefeuille terminé: {len(results['files'])} fichiers analysés")
+
+    except CobolAuditError as e:
+        logger.error(f"Erreur d'audit: {str(e)}")
+        console.print(f"[red]Erreur d'audit: {str(e)}")
+        raise click.Abort()
+    except Exception as e:
+        logger.error(f"Erreur inattendue: {str(e)}")
+        console.print(f"[red]Erreur inattendue: {str(e)}")
+        raise click.Abort()
+    finally:
+        profiler.disable()
+        shutdown_logging()
+
+@cli.command('serve')
+@click.option('--socket', 'socket_path',
+              type=click.Path(dir_okay=False),
+              default=DEFAULT_SOCKET,
+              show_default=True,
+              help='Socket Unix d\'écoute')
+@click.option('--port',
+              type=click.IntRange(min=0, max=65535),
+              default=None,
+              help='Écoute en HTTP sur 127.0.0.1:PORT au lieu du socket Unix')
+@click.option('--jobs', '-j',
+              type=click.IntRange(min=1),
+              default=None,
+              help='Nombre de processus d\'analyse (par défaut: nombre de cœurs)')
+@click.option('--cache', 'use_cache',
+              is_flag=True,
+              help='Réutilise les résultats des fichiers inchangés')
+@click.option('--cache-dir',
+              type=click.Path(file_okay=False),
+              default=DEFAULT_CACHE_DIR,
+              show_default=True,
+              help='Répertoire du cache de résultats')
+@click.option('--log-level', '-l',
+              type=click.Choice(['DEBUG', 'INFO', 'WARNING', 'ERROR']),
+              default='INFO',
+              help='Niveau de log')
+@click.option('--log-file',
+              metavar='FICHIER',
+              is_flag=False,
+              flag_value='',
+              default=None,
+              envvar='COBOL_AUDIT_LOG_FILE',
+              help='Écrit les logs dans un fichier tournant (sans valeur: logs/cobol_audit.log)')
+@click.option('--log-rotate',
+              type=click.Choice(list(ROTATIONS)),
+              default='size',
+              show_default=True,
+              help='Rotation du fichier de log: par taille (10 Mo, 5 archives), par jour ou par heure')
+def serve(socket_path: str, port: int, jobs: int, use_cache: bool, cache_dir: str,
+          log_level: str, log_file: str, log_rotate: str):
+    """Lance le démon d'audit, qui garde l'analyseur chaud entre les requêtes."""
+    from audit_server import AuditServer
+    try:
+        _configure_logging(log_level, log_file, log_rotate)
+        server = AuditServer(socket_path, port=port, jobs=jobs,
+                             cache_dir=cache_dir if use_cache else None)
+        console.print(f"[green]Démon d'audit sur {f'http://127.0.0.1:{port}' if port is not None else socket_path}"
+                      f" (Ctrl+C pour arrêter)")
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("[yellow]Démon d'audit arrêté")
+    except CobolAuditError as e:
+        console.print(f"[red]Erreur du démon: {str(e)}")
+        raise click.Abort()
+    finally:
+        shutdown_logging()
+
+@cli.command('calls')
+@click.argument('program', required=False)
+@click.option('--callers', 'query', flag_value='callers', default=True,
+              help='Programmes qui appellent PROGRAM (par défaut)')
+@click.option('--callees', 'query', flag_value='callees',
+              help='Programmes appelés par PROGRAM')
+@click.option('--unreachable', 'query', flag_value='unreachable',
+              help='Programmes jamais appelés (ou inatteignables depuis --root)')
+@click.option('--root', 'roots',
+              multiple=True,
+              help='Programme d\'entrée pour --unreachable (répétable)')
+@click.option('--call-index',
+              type=click.Path(exists=True, dir_okay=False),
+              default=DEFAULT_CALL_INDEX,
+              show_default=True,
+              help='Fichier de l\'index des appels (voir audit-dir --index-calls)')
+def calls(program: str, query: str, roots: tuple, call_index: str):
+    """Interroge l'index des appels entre programmes."""
+    from rich.table import Table
+    index = CallGraphIndex(call_index)
+    try:
+        if query == 'unreachable':
+            for name in index.unreachable(roots):
+                console.print(name)
+            return
+        if not program:
+            raise click.UsageError('PROGRAM est requis pour --callers et --callees')
+
+        table = Table(title=f"{'Appelants' if query == 'callers' else 'Appelés'} de {program.upper()}")
+        if query == 'callers':
+            table.add_column("Programme", style="cyan")
+            table.add_column("Fichier", style="blue")
+            table.add_column("Via", style="yellow")
+            for name, file_path, via in index.callers(program):
+                table.add_row(name, file_path, via or '')
+        else:
+            table.add_column("Programme", style="cyan")
+            table.add_column("Via", style="yellow")
+            for target, via in index.callees(program):
+                table.add_row(target or '?', via or '')
+        console.print(table)
+    finally:
+        index.close()
+
+@cli.command('query')
+@click.option('--warehouse',
+              type=click.Path(exists=True, dir_okay=False),
+              default=DEFAULT_WAREHOUSE,
+              show_default=True,
+              help='Base de l\'entrepôt de résultats (voir audit-dir --store-results)')
+@click.option('--run', 'run_id',
+              type=int,
+              help='Exécution interrogée (par défaut: la dernière)')
+@click.option('--rule', 'rules',
+              multiple=True,
+              help='Type de problème, par exemple best_practice (répétable)')
+@click.option('--severity', 'severities',
+              multiple=True,
+              type=click.Choice(['ERROR', 'WARNING', 'INFO'], case_sensitive=False),
+              help='Sévérité (répétable)')
+@click.option('--file', 'file_pattern',
+              metavar='MOTIF',
+              help='Motif glob du chemin des programmes')
+@click.option('--copybook',
+              help='Programmes incluant ce copybook')
+@click.option('--message',
+              help='Texte contenu dans le message du problème')
+@click.option('--count-by',
+              type=click.Choice(GROUP_BY),
+              help='Compte les problèmes par règle, sévérité ou fichier au lieu de les lister')
+@click.option('--runs', 'list_runs',
+              is_flag=True,
+              help='Liste les exécutions enregistrées')
+@click.option('--limit',
+              type=click.IntRange(min=1),
+              default=50,
+              show_default=True,
+              help='Nombre maximal de lignes affichées')
+@click.option('--output-format', '-f',
+              type=click.Choice(['table', 'json']),
+              default='table',
+              help='Format de sortie')
+def query(warehouse: str, run_id: int, rules: tuple, severities: tuple, file_pattern: str, copybook: str,
+          message: str, count_by: str, list_runs: bool, limit: int, output_format: str):
+    """Interroge l'entrepôt des résultats d'audit.
+
+    Exemple: erreurs ALTER GOTO des programmes incluant le copybook CLIENT:
+    query --severity ERROR --message "ALTER GOTO" --copybook CLIENT
+    """
+    from datetime import datetime
+    from rich.table import Table
+    store = ResultWarehouse(warehouse)
+    try:
+        if list_runs:
+            columns = ('run', 'started', 'root', 'files', 'issues')
+            rows = [(run, datetime.fromtimestamp(started).isoformat(timespec='seconds'), root, files, issues)
+                    for run, started, root, files, issues in store.runs(limit)]
+            title = "Exécutions enregistrées"
+        else:
+            if run_id is None and store.latest_run() is None:
+                raise click.UsageError("aucune exécution enregistrée (audit-dir --store-results)")
+            filters = dict(run=run_id, rules=rules, severities=severities, file_pattern=file_pattern,
+                           copybook=copybook, message=message)
+            if count_by:
+                columns = (count_by, 'issues')
+                rows = store.counts(count_by, limit=limit, **filters)
+                title = f"Problèmes par {QUERY_HEADERS[count_by].lower()}"
+            else:
+                columns = ('file', 'line', 'severity', 'rule', 'message')
+                rows = store.issues(limit=limit, **filters)
+                title = "Problèmes"
+    finally:
+        store.close()
+
+    if output_format == 'json':
+        click.echo(json.dumps([dict(zip(columns, row)) for row in rows], indent=2, ensure_ascii=False))
+        return
+    table = Table(title=title)
+    for column in columns:
+        table.add_column(QUERY_HEADERS[column])
+    for row in rows:
+        table.add_row(*('' if value is None else str(value) for value in row))
+    console.print(table)
+
+@cli.command('score')
+@click.argument('report', type=click.Path(exists=True, dir_okay=False))
+@click.option('--weight', '-w', 'weights',
+              multiple=True,
+              help='Poids d\'une métrique, sous la forme metrique=poids (répétable)')
+@click.option('--worst', type=click.IntRange(min=0), default=10, show_default=True,
+              help='Nombre de fichiers les moins bien notés à lister')
+@click.option('--percentiles', default='50,90,99', show_default=True,
+              help='Percentiles de la distribution des scores')
+@click.option('--output-format', '-f',
+              type=click.Choice(['table', 'json']),
+              default='table',
+              help='Format de sortie')
+def score(report: str, weights: tuple, worst: int, percentiles: str, output_format: str):
+    """Recalcule les scores d'un rapport de portefeuille (audit-dir -f json).
+
+    Les métriques par fichier du rapport sont notées en un seul passage,
+    sans relancer l'analyse : utile pour ajuster les poids.
+    """
+    from score_matrix import MetricMatrix
+    with open(report, 'r', encoding='utf-8') as file:
+        document = json.load(file)
+    if 'files' not in document:
+        raise click.BadParameter("rapport de portefeuille attendu (audit-dir -f json)", param_hint='REPORT')
+    try:
+        quantiles = [float(q) for q in percentiles.split(',') if q.strip()]
+    except ValueError:
+        raise click.BadParameter(f"percentiles invalides: {percentiles}", param_hint='--percentiles')
+    if any(not 0 <= q <= 100 for q in quantiles):
+        raise click.BadParameter("les percentiles sont compris entre 0 et 100", param_hint='--percentiles')
+    overrides = {}
+    for weight in weights:
+        name, _, value = weight.partition('=')
+        try:
+            overrides[name.strip()] = float(value)
+        except ValueError:
+            raise click.BadParameter(f"poids invalide: {weight}", param_hint='--weight')
+    try:
+        scores = MetricMatrix.from_results(document['files']).score(overrides)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--weight')
+    summary = scores.summary(quantiles, worst)
+
+    if output_format == 'json':
+        click.echo(json.dumps(summary, indent=2, ensure_ascii=False))
+        return
+    from rich.table import Table
+    table = Table(title=f"Distribution des scores ({summary['files']} fichiers)")
+    table.add_column("Statistique", style="cyan")
+    table.add_column("Valeur", justify="right", style="magenta")
+    for name, value in summary['percentiles'].items():
+        table.add_row(name, f"{value:.1f}")
+    for grade, count in summary['grades'].items():
+        table.add_row(f"Note {grade}", str(count))
+    for name, counts in summary['recommendations'].items():
+        table.add_row(f"{name} (urgent/suggestion)", f"{counts['high']}/{counts['medium']}")
+    console.print(table)
+    if summary['worst']:
+        worst_table = Table(title="Fichiers les moins bien notés")
+        worst_table.add_column("Fichier", style="cyan")
+        worst_table.add_column("Score", justify="right", style="magenta")
+        worst_table.add_column("Note", style="yellow")
+        for entry in summary['worst']:
+            worst_table.add_row(entry['file'], f"{entry['score']:.1f}", entry['grade'])
+        console.print(worst_table)
+
+@cli.command('rules')
+def list_rules():
+    """Liste les règles disponibles (noms utilisables avec --rules/--skip-rules)."""
+    from rich.table import Table
+    from rules import registry
+    table = Table(title="Règles d'analyse")
+    table.add_column("Règle", style="cyan")
+    table.add_column("Division", style="blue")
+    table.add_column("Sévérité", style="yellow")
+    table.add_column("Mots-clés", style="magenta")
+    table.add_column("Requiert")
+    for name, check in registry.rules.items():
+        table.add_row(name, check.scope, check.severity.name if check.severity else '-',
+                      ', '.join(keyword.strip() for keyword in check.keywords) or '*',
+                      ', '.join(check.requires))
+    console.print(table)
+
+def _check_watch_options(ctx: click.Context) -> None:
+    """Refuse les options qu'--watch ignorerait."""
+    from click.core import ParameterSource
+    ignored = [option for name, option in WATCH_INCOMPATIBLE.items()
+               if ctx.get_parameter_source(name) not in (ParameterSource.DEFAULT, None)]
+    if ignored:
+        raise click.UsageError(f"{', '.join(ignored)}: sans effet avec --watch")
+
+def _watch(path: str, copybook_paths: list, detailed: bool, interval: float, **analyze_options):
+    """Affiche un résumé tenu à jour en place, réanalysant les seuls fichiers modifiés."""
+    from datetime import datetime
+    from rich.console import Group
+    from rich.live import Live
+    from rich.panel import Panel
+    from watcher import WatchSession
+
+    if os.path.isdir(path):
+        root, patterns = path, DEFAULT_PATTERNS
+    else:
+        root, patterns = os.path.dirname(path) or '.', [os.path.basename(path)]
+    session = WatchSession(root, patterns, copybook_paths, **analyze_options)
+    try:
+        with Live(console=console, auto_refresh=False) as live:
+            for changed, elapsed in session.watch(interval):
+                results = session.merged()
+                status = (f"{len(session.results)} programme(s) surveillé(s) sous {root} — "
+                          f"{len(changed)} fichier(s) réanalysé(s) en {elapsed * 1000:.0f} ms "
+                          f"à {datetime.now():%H:%M:%S}")
+                if results['errors']:
+                    status += f"\n[yellow]{len(results['errors'])} fichier(s) n'ont pas pu être analysés"
+                header = Panel(status + "\n[dim]Ctrl+C pour arrêter", title="Surveillance")
+                live.update(Group(header, *_summary_renderables(results, detailed)), refresh=True)
+    except KeyboardInterrupt:
+        console.print("[yellow]Surveillance arrêtée")
+
+def _audit_with_daemon(client: DaemonClient, file_path: str, output_file: str,
+                       copybook_paths: tuple, streaming: bool, mapped: bool, cache_dir: str, **selection):
+    """Fait analyser un fichier par le démon et écrit son rapport JSON.
+
+    Avec --cache, le démon utilise le cache de résultats désigné par --cache-dir.
+    """
+    report = client.audit(file_path, copybook_paths=list(copybook_paths),
+                          streaming=streaming, mapped=mapped, cache_dir=cache_dir, **selection)
+    with _open_output(output_file) as stream:
+        stream.write(report)
+    if output_file:
+        console.print(f"[green]Rapport sauvegardé dans {output_file}")
+    logger.info("Audit effectué par le démon %s", client.address)
+
+def _rule_selection(rules: str, skip_rules: str) -> dict:
+    """Convertit --rules/--skip-rules en arguments de CobolAnalyzer (noms vérifiés)."""
+    selection = {
+        'rules': [name.strip() for name in (rules or '').split(',') if name.strip()] or None,
+        'skip_rules': [name.strip() for name in (skip_rules or '').split(',') if name.strip()] or None
+    }
+    if selection['rules'] or selection['skip_rules']:
+        # Le registre n'est chargé que si une sélection est demandée
+        from rules import registry
+        try:
+            registry.select(**selection)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--rules/--skip-rules')
+    return selection
+
+def _baseline_filter(baseline_path: str, write_baseline: str):
+    """Prépare le filtrage par référentiel (--baseline) et la collecte des empreintes."""
+    if not (baseline_path or write_baseline):
+        return None
+    known = None
+    if baseline_path:
+        try:
+            known = Baseline.load(baseline_path)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint='--baseline')
+        logger.info("Référentiel %s: %d problèmes connus", baseline_path, len(known))
+    return BaselineFilter(known, collect=bool(write_baseline))
+
+def _finish_baseline(baseline: BaselineFilter, write_baseline: str):
+    """Signale les problèmes écartés et écrit le nouveau référentiel demandé."""
+    if baseline.baseline is not None:
+        err_console.print(f"[dim]{baseline.suppressed} problème(s) connu(s) du référentiel écarté(s)")
+    if write_baseline:
+        count = baseline.save(write_baseline)
+        err_console.print(f"[green]Référentiel de {count} problème(s) sauvegardé dans {write_baseline}")
+
+def _configure_logging(log_level: str, log_file: str, log_rotate: str):
+    """Applique le niveau de log ; n'ouvre un fichier de log que sur demande."""
+    if log_file is None:
+        set_level(log_level)
+    else:
+        enable_file_logging(log_file or None, log_level, rotation=log_rotate)
+
+def _status(message: str):
+    """Indicateur de progression, omis hors terminal (hooks, CI)."""
+    if console.is_terminal:
+        return console.status(message)
+    return contextlib.nullcontext()
+
+def _open_output(output_file: str):
+    """Ouvre le fichier de sortie, ou la sortie standard à défaut."""
+    if output_file:
+        return open(output_file, 'w', encoding='utf-8', newline='')
+    return contextlib.nullcontext(sys.stdout)
+
+def _export_results(results: dict, file_path: str, output_format: str, output_file: str, detailed: bool):
+    """Exporte les résultats dans le format demandé, vers un fichier ou la console."""
+    with profiler.stage(f'export:{output_format}'):
+        _write_report(results, file_path, output_format, output_file, detailed)
+
+def _write_report(results: dict, file_path: str, output_format: str, output_file: str, detailed: bool):
+    # Exporteurs écrivant directement dans le flux de sortie
+    if output_format in STREAM_EXPORTERS:
+        with _open_output(output_file) as stream:
+            STREAM_EXPORTERS[output_format].write(results, file_path, stream, detailed)
+        if output_file:
+            console.print(f"[green]Rapport sauvegardé dans {output_file}")
+        return
+
+    # Rapport Markdown ou PDF écrit au fil de l'eau dans le fichier de sortie
+    if output_format == 'pdf' or (output_format == 'markdown' and output_file):
+        from cobol_report import CobolReport
+        if output_file:
+            mode, encoding = ('wb', None) if output_format == 'pdf' else ('w', 'utf-8')
+            with open(output_file, mode, encoding=encoding) as f:
+                CobolReport().write(results, file_path, f, output_format)
+            console.print(f"[green]Rapport sauvegardé dans {output_file}")
+        else:
+            CobolReport().write(results, file_path, click.get_binary_stream('stdout'), output_format)
+        return
+
+    # Sélection de l'exporteur approprié
+    if output_format == 'sonarqube':
+        from exporters import SonarQubeExporter
+        exporter = SonarQubeExporter()
+        output = exporter.export(results, file_path, detailed)
+    else:
+        from cobol_report import CobolReport
+        report = CobolReport()
+        output = report.generate(results, file_path, output_format)
+
+    # Sauvegarde ou affichage du rapport
+    if output_file:
+        with open(output_file, 'w') as f:
+            json.dump(output, f, indent=2)
+        console.print(f"[green]Rapport sauvegardé dans {output_file}")
+    else:
+        if output_format == 'sonarqube':
+            console.print(json.dumps(output, indent=2))
+        else:
+            console.print(output)
+
+def _display_profile(results: dict, limit: int = 10):
+    """Affiche le temps passé par étape, puis les fichiers et règles les plus lents."""
+    from rich.table import Table
+    profile = results.get('profile', {})
+    # Étapes des workers (portefeuille) et du processus courant (parsing ou export)
+    timings = merge_timings([profile.get('timings', {}), profiler.snapshot()])
+    total = sum(seconds for seconds, _ in timings.values()) or 1.0
+
+    table = Table(title="Temps par étape")
+    table.add_column("Étape", style="cyan")
+    table.add_column("Temps (s)", justify="right", style="magenta")
+    table.add_column("Part", justify="right")
+    table.add_column("Appels", justify="right", style="blue")
+    for name, seconds in slowest(timings, limit=len(timings)):
+        table.add_row(name, f"{seconds:.3f}", f"{seconds / total:.1%}", f"{timings[name][1]:,}")
+    err_console.print(table)
+
+    if profile.get('files'):
+        files_table = Table(title="Fichiers les plus lents")
+        files_table.add_column("Fichier", style="cyan")
+        files_table.add_column("Temps (s)", justify="right", style="magenta")
+        for file, seconds in sorted(profile['files'], key=lambda item: item[1], reverse=True)[:limit]:
+            files_table.add_row(file, f"{seconds:.3f}")
+        err_console.print(files_table)
+
+        rules_table = Table(title="Règles les plus lentes")
+        rules_table.add_column("Règle", style="cyan")
+        rules_table.add_column("Temps (s)", justify="right", style="magenta")
+        for name, seconds in slowest(timings, 'rule:', limit):
+            rules_table.add_row(name[len('rule:'):], f"{seconds:.3f}")
+        err_console.print(rules_table)
 
 def _display_summary(results: dict, detailed: bool = False):
     """Affiche un résumé des résultats de l'analyse."""
+    for renderable in _summary_renderables(results, detailed):
+        console.print(renderable)
+
+def _summary_renderables(results: dict, detailed: bool = False) -> list:
+    """Construit les panneaux et tables du résumé (affichés tels quels ou en direct)."""
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
+    from scoring import AuditScorer
+
+    renderables = []
     # Calcul du score
     score, grade = AuditScorer.calculate_score(results['metrics'])
     
@@ -116,7 +855,7 @@ def _display_summary(results: dict, detailed: bool = False):
     score_text.append(grade, style='bold ' + score_color)
     score_text.append(')', style='bold')
     
-    console.print(Panel(score_text, title="Résultat Global"))
+    renderables.append(Panel(score_text, title="Résultat Global"))
     
     # Table des métriques
     metrics_table = Table(title="Métriques du Code")
@@ -133,26 +872,26 @@ def _display_summary(results: dict, detailed: bool = False):
         )
     
     # Qualité du code
-    for key in ['complexity', 'unused_vars', 'empty_sections', 
-                'nested_conditions', 'magic_numbers', 'dead_code_sections']:
+    for key in ['complexity', 'unused_vars', 'empty_sections', 'nested_conditions',
+                'magic_numbers', 'dead_code_sections', 'dead_code_paragraphs']:
         metrics_table.add_row(
             "Qualité",
             key.replace('_', ' ').title(),
             str(results['metrics'][key])
         )
     
-    console.print(metrics_table)
+    renderables.append(metrics_table)
     
     # Recommandations
     recommendations = AuditScorer.generate_recommendations(results['metrics'], detailed)
     if recommendations:
-        console.print(Panel('\n'.join(recommendations), title="Recommandations"))
+        renderables.append(Panel('\n'.join(recommendations), title="Recommandations"))
     
     # Analyse détaillée
     if detailed:
         detailed_analysis = AuditScorer.get_detailed_metrics_analysis(results['metrics'])
         if detailed_analysis:
-            console.print(Panel('\n'.join(detailed_analysis), title="Analyse Détaillée"))
+            renderables.append(Panel('\n'.join(detailed_analysis), title="Analyse Détaillée"))
     
     # Table des problèmes
     if results['issues']:
@@ -164,13 +903,23 @@ def _display_summary(results: dict, detailed: bool = False):
         
         for issue in results['issues']:
             issues_table.add_row(
-                issue['severity'],
-                issue['type'],
-                issue['message'],
-                str(issue.get('line', 'N/A'))
+                issue.severity.name,
+                issue.rule,
+                issue.message,
+                str(issue.line_number if issue.line_number is not None else 'N/A')
             )
         
-        console.print(issues_table)
+        renderables.append(issues_table)
+    elif results.get('issue_counts'):
+        # Problèmes écrits au fil de l'audit (ndjson, html) : seuls leurs nombres sont connus
+        counts_table = Table(title="Problèmes Détectés")
+        counts_table.add_column("Sévérité", style="red")
+        counts_table.add_column("Nombre", style="magenta")
+        for severity, count in results['issue_counts'].items():
+            counts_table.add_row(severity, str(count))
+        renderables.append(counts_table)
+
+    return renderables
 
 if __name__ == '__main__':
     cli()
\ No newline at end of file
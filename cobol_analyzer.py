@@ -1,18 +1,49 @@
 """
 Module d'analyse pour détecter les problèmes dans le code COBOL.
 """
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Iterable, Optional, Tuple
+import os
 import re
 from cobol_parser import CobolParser
+from copybooks import CopybookExpander
 from rules import CobolRules
+from rule_engine import RuleEngine, registry
+from source_buffer import SourceBuffer
+from result_cache import ResultCache
+from issues import Issue, Severity
 from exceptions import AnalysisError, ParseError
 from logger import logger
+from profiling import profiler
+
+# Ordre de restitution des problèmes, par vérification
+ISSUE_ORDER = (
+    'goto', 'filler', 'dead_code', 'magic_number', 'nested_conditions',
+    'storage_organization', 'perform_thru', 'altered_goto'
+)
 
 class CobolAnalyzer:
-    def __init__(self):
-        self.parser = CobolParser()
+    def __init__(self, copybook_paths: Optional[List[str]] = None, cache: Optional[ResultCache] = None,
+                 rules: Optional[List[str]] = None, skip_rules: Optional[List[str]] = None):
+        self.copybook_paths = list(copybook_paths or [])
+        # Sélection des vérifications du registre (--rules/--skip-rules) ;
+        # un nom inconnu est signalé dès la construction
+        self.selected_rules = registry.select(rules, skip_rules)
+        self.rule_selection = (list(rules or []), list(skip_rules or []))
+        expander = CopybookExpander(self.copybook_paths) if self.copybook_paths else None
+        self.parser = CobolParser(expander)
+        self.cache = cache
+        self.cache_hit = False
+        # Dépendances enregistrées avec le résultat servi par le cache
+        self.cached_dependencies: Dict[str, Any] = {}
         self.rules = CobolRules()
         self.issues = []
+        self.engines = {}
+        self.checks = {}
+        self.source = None
+        # Graphe de flot de contrôle de la dernière analyse (rules.ControlFlowCheck)
+        self.cfg = None
+        # Programme analysé et ses appels (index des appels du portefeuille)
+        self.calls = {'program_id': None, 'static': [], 'dynamic': {}}
         self.metrics = {
             'total_lines': 0,
             'procedures': 0,
@@ -22,175 +53,174 @@ class CobolAnalyzer:
             'empty_sections': 0,
             'nested_conditions': 0,
             'magic_numbers': 0,
-            'dead_code_sections': 0
+            'dead_code_sections': 0,
+            'dead_code_paragraphs': 0
         }
 
-    def analyze_file(self, file_path: str) -> Dict[str, Any]:
-        """Analyse un fichier COBOL et retourne les résultats."""
+    def analyze_file(self, file_path: str, streaming: bool = False, mapped: bool = False) -> Dict[str, Any]:
+        """Analyse un fichier COBOL et retourne les résultats.
+
+        En mode flux (`streaming`), le fichier est lu de façon incrémentale
+        et aucune division n'est conservée en mémoire. En mode projeté
+        (`mapped`), le fichier est lu via un SourceBuffer (mmap) conservé
+        dans `self.source` pour une relecture des lignes à la demande.
+
+        Si un cache de résultats est configuré, un fichier inchangé depuis
+        sa dernière analyse est servi depuis le cache.
+        """
         try:
-            logger.info(f"Début de l'analyse du fichier: {file_path}")
-            divisions = self.parser.parse_file(file_path)
-            self._analyze_divisions(divisions)
-            self._calculate_metrics(divisions)
+            logger.info("Début de l'analyse du fichier: %s", file_path)
+            cache_key = None
+            if self.cache is not None:
+                with profiler.stage('cache'):
+                    cache_key = self.cache.key_for(file_path, self._cache_context())
+                    entry = self.cache.get_entry(cache_key)
+                if entry is not None:
+                    cached, self.cached_dependencies = entry
+                    self.issues, self.metrics = cached['issues'], cached['metrics']
+                    self.calls = cached['calls']
+                    self.cache_hit = True
+                    logger.info("Résultat servi depuis le cache: %s", file_path)
+                    return cached
+
+            # En flux, la lecture est entrelacée avec les règles : le temps
+            # des règles est déduit de l'étape 'parse'
+            if mapped:
+                self.source = SourceBuffer(file_path)
+                with profiler.stage('parse'):
+                    self._analyze_stream(self.parser.expand(self.source.iter_content()))
+            elif streaming:
+                with profiler.stage('parse'):
+                    self._analyze_stream(self.parser.iter_file(file_path))
+            else:
+                with profiler.stage('parse'):
+                    divisions = self.parser.parse_file(file_path)
+                self._analyze_divisions(divisions)
             
-            logger.info(f"Analyse terminée. {len(self.issues)} problèmes détectés.")
-            return {
+            logger.info("Analyse terminée. %d problèmes détectés.", len(self.issues))
+            results = {
                 'issues': self.issues,
-                'metrics': self.metrics
+                'metrics': self.metrics,
+                'calls': self.calls
             }
+            if cache_key is not None:
+                with profiler.stage('cache'):
+                    self.cache.put(cache_key, results, self._cache_dependencies())
+            return results
         except Exception as e:
-            logger.error(f"Erreur lors de l'analyse: {str(e)}")
+            logger.error("Erreur lors de l'analyse: %s", e)
             raise AnalysisError(f"Erreur lors de l'analyse: {str(e)}")
 
+    def _cache_context(self) -> str:
+        """Retourne le contexte d'analyse qui influe sur les résultats."""
+        context = os.pathsep.join(os.path.abspath(path) for path in self.copybook_paths)
+        if len(self.selected_rules) != len(registry.rules):
+            # Une sélection partielle de règles donne d'autres résultats
+            context += '|' + ','.join(self.selected_rules)
+        return context
+
+    def _dependencies(self) -> Set[str]:
+        """Retourne les fichiers inclus dont dépend le résultat (copybooks).
+
+        Pour un résultat servi par le cache, ce sont ceux enregistrés avec lui.
+        """
+        if self.cache_hit:
+            return {path for path, signature in self.cached_dependencies.items() if signature is not None}
+        if self.parser.expander is None:
+            return set()
+        return self.parser.expander.included
+
+    def _missing(self) -> Set[str]:
+        """Retourne les emplacements où un copybook introuvable a été cherché."""
+        if self.cache_hit:
+            return {path for path, signature in self.cached_dependencies.items() if signature is None}
+        if self.parser.expander is None:
+            return set()
+        return self.parser.expander.missing
+
+    def _cache_dependencies(self) -> Set[str]:
+        """Retourne les fichiers dont dépend le résultat mis en cache.
+
+        Les emplacements où un copybook introuvable a été cherché en font
+        partie : le copybook qui y apparaît invalide le résultat.
+        """
+        return self._dependencies() | self._missing()
+
+    def _build_engines(self) -> Dict[str, RuleEngine]:
+        """Construit un moteur de règles par division analysée (règles sélectionnées)."""
+        return registry.build(*self.rule_selection)
+
     def _analyze_divisions(self, divisions: Dict[str, List[str]]) -> None:
         """Analyse chaque division pour détecter les problèmes."""
         try:
-            self._check_division_structure(divisions)
-            self._analyze_procedure_division(divisions['PROCEDURE'])
-            self._analyze_data_division(divisions['DATA'])
-            self._analyze_advanced_rules(divisions)
+            self.engines = self._build_engines()
+            for name, engine in self.engines.items():
+                # Une division sans vérification retenue n'est pas découpée en jetons
+                if engine.checks:
+                    engine.run(divisions[name], self.parser.line_numbers[name], self.parser.tokens_for(name))
+            self._collect_results({name: len(lines) for name, lines in divisions.items()})
         except Exception as e:
-            logger.error(f"Erreur lors de l'analyse des divisions: {str(e)}")
+            logger.error("Erreur lors de l'analyse des divisions: %s", e)
             raise AnalysisError(f"Erreur lors de l'analyse des divisions: {str(e)}")
 
-    def _analyze_advanced_rules(self, divisions: Dict[str, List[str]]) -> None:
-        """Applique les règles d'analyse avancées."""
-        logger.info("Application des règles d'analyse avancées")
-        
-        # Analyse du code mort
-        dead_sections = self.rules.check_dead_code(divisions['PROCEDURE'])
-        self.metrics['dead_code_sections'] = len(dead_sections)
-        for section in dead_sections:
-            self.issues.append({
-                'severity': 'WARNING',
-                'message': f'Section potentiellement morte détectée: {section}',
-                'type': 'dead_code',
-                'line': section
-            })
-
-        # Vérification des nombres magiques
-        magic_numbers = 0
-        for line in divisions['PROCEDURE']:
-            if self.rules.check_magic_numbers(line):
-                magic_numbers += 1
-                self.issues.append({
-                    'severity': 'INFO',
-                    'message': 'Nombre magique détecté',
-                    'type': 'magic_number',
-                    'line': line
-                })
-        self.metrics['magic_numbers'] = magic_numbers
-
-        # Vérification des conditions imbriquées
-        max_nested = 0
-        for line in divisions['PROCEDURE']:
-            nested_count = self.rules.check_nested_conditions(line)
-            max_nested = max(max_nested, nested_count)
-            if nested_count > 2:
-                self.issues.append({
-                    'severity': 'WARNING',
-                    'message': f'Conditions trop imbriquées ({nested_count} niveaux)',
-                    'type': 'complexity',
-                    'line': line
-                })
-        self.metrics['nested_conditions'] = max_nested
-
-        # Vérification de l'organisation WORKING-STORAGE
-        storage_issues = self.rules.check_working_storage_organization(divisions['DATA'])
-        for issue in storage_issues:
-            self.issues.append({
-                'severity': 'WARNING',
-                'message': issue,
-                'type': 'data_organization'
-            })
-
-        # Vérification des PERFORM THRU
-        for line in divisions['PROCEDURE']:
-            if self.rules.check_perform_thru(line):
-                self.issues.append({
-                    'severity': 'WARNING',
-                    'message': 'Utilisation de PERFORM THRU déconseillée',
-                    'type': 'best_practice',
-                    'line': line
-                })
-
-        # Vérification des ALTER GOTO
-        altered_gotos = self.rules.check_altered_goto(divisions['PROCEDURE'])
-        for goto in altered_gotos:
-            self.issues.append({
-                'severity': 'ERROR',
-                'message': 'Utilisation de ALTER GOTO détectée',
-                'type': 'best_practice',
-                'line': goto
-            })
-
-    def _check_division_structure(self, divisions: Dict[str, List[str]]) -> None:
+    def _analyze_stream(self, stream: Iterable[Tuple[str, int, str]]) -> None:
+        """Analyse un flux de lignes (division, numéro, texte) sans le conserver."""
+        self.engines = self._build_engines()
+        line_counts = dict.fromkeys(self.parser.divisions, 0)
+        for division, line_number, line in stream:
+            line_counts[division] += 1
+            engine = self.engines.get(division)
+            if engine is not None:
+                engine.feed(line_number, line)
+        for engine in self.engines.values():
+            engine.finish()
+        self._collect_results(line_counts)
+
+    def _collect_results(self, line_counts: Dict[str, int]) -> None:
+        """Rassemble les problèmes et métriques produits par les moteurs."""
+        with profiler.stage('collect'):
+            self._gather_issues(line_counts)
+        with profiler.stage('metrics'):
+            self._calculate_metrics(line_counts)
+
+    def _gather_issues(self, line_counts: Dict[str, int]) -> None:
+        """Rassemble les problèmes, le graphe de flot et les appels produits par les moteurs."""
+        self._check_division_structure(line_counts)
+        for engine in self.engines.values():
+            self.checks.update(engine.checks)
+        # Vérifications éventuellement écartées par la sélection de règles
+        if 'control_flow' in self.checks:
+            self.cfg = self.checks['control_flow'].graph
+        program_id = self.checks.get('program_id')
+        calls = self.checks.get('calls')
+        self.calls = {
+            'program_id': program_id.program_id if program_id else None,
+            'static': calls.static if calls else [],
+            'dynamic': calls.dynamic if calls else {}
+        }
+        for name in ISSUE_ORDER:
+            if name in self.checks:
+                self.issues.extend(self.checks[name].issues)
+        # Règles ajoutées par des greffons, après les règles intégrées
+        for name, check in self.checks.items():
+            if name not in ISSUE_ORDER:
+                self.issues.extend(check.issues)
+
+    def _check_division_structure(self, line_counts: Dict[str, int]) -> None:
         """Vérifie la structure des divisions."""
         required_divisions = ['IDENTIFICATION', 'PROCEDURE']
         for div in required_divisions:
-            if not divisions[div]:
-                self.issues.append({
-                    'severity': 'ERROR',
-                    'message': f'Division {div} manquante ou vide',
-                    'type': 'structure'
-                })
-
-    def _analyze_procedure_division(self, procedures: List[str]) -> None:
-        """Analyse la division PROCEDURE."""
-        for line in procedures:
-            if 'GOTO' in line:
-                self.issues.append({
-                    'severity': 'WARNING',
-                    'message': 'Utilisation de GOTO détectée',
-                    'type': 'best_practice',
-                    'line': line
-                })
-
-    def _analyze_data_division(self, data: List[str]) -> None:
-        """Analyse la division DATA."""
-        for line in data:
-            if 'FILLER' in line and len(line.split()) < 3:
-                self.issues.append({
-                    'severity': 'INFO',
-                    'message': 'FILLER sans description explicite',
-                    'type': 'documentation',
-                    'line': line
-                })
-
-    def _calculate_metrics(self, divisions: Dict[str, List[str]]) -> None:
+            if not line_counts[div]:
+                self.issues.append(Issue('structure', Severity.ERROR, f'Division {div} manquante ou vide'))
+
+    def _calculate_metrics(self, line_counts: Dict[str, int]) -> None:
         """Calcule les métriques du code."""
         try:
-            self.metrics['total_lines'] = sum(len(div) for div in divisions.values())
-            self.metrics['procedures'] = len(self.parser.get_procedures())
-            self.metrics['data_items'] = len(self.parser.get_data_items())
-            self.metrics['complexity'] = self._calculate_complexity(divisions['PROCEDURE'])
+            self.metrics['total_lines'] = sum(line_counts.values())
+            for engine in self.engines.values():
+                self.metrics.update(engine.metrics())
             
-            # Analyse de l'utilisation des données
-            data_usage = self.rules.check_data_usage(divisions['DATA'], divisions['PROCEDURE'])
-            self.metrics['unused_vars'] = len([v for v, count in data_usage.items() if count == 0])
-            
-            logger.info(f"Métriques calculées: {self.metrics}")
+            logger.debug("Métriques calculées: %s", self.metrics)
         except Exception as e:
-            logger.error(f"Erreur lors du calcul des métriques: {str(e)}")
+            logger.error("Erreur lors du calcul des métriques: %s", e)
             raise AnalysisError(f"Erreur lors du calcul des métriques: {str(e)}")
-
-    def _calculate_complexity(self, procedures: List[str]) -> int:
-        """Calcule la complexité cyclomatique du code COBOL."""
-        complexity = 1  # Valeur de base
-        
-        for line in procedures:
-            line = line.upper()
-            # Compte les structures de contrôle
-            if any(keyword in line for keyword in ['IF ', 'EVALUATE ']):
-                complexity += 1
-            if 'PERFORM' in line and any(keyword in line for keyword in ['UNTIL ', 'VARYING ']):
-                complexity += 1
-            if 'GOTO ' in line:
-                complexity += 1
-            if 'SECTION.' in line:
-                complexity += 1
-            # Compte les opérateurs AND/OR dans les conditions
-            if 'IF ' in line:
-                complexity += line.count(' AND ') + line.count(' OR ')
-        
-        return complexity
\ No newline at end of file
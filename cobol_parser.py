@@ -1,18 +1,40 @@
 """
 Module de parsing pour analyser le code COBOL.
 """
-from typing import List, Dict, Optional
+from array import array
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 import re
+from lexer import AUTO, TokenTable, logical_lines
+
+DIVISION_PATTERN = re.compile(r'^\s*(\w+)\s+DIVISION\.')
+SECTION_PATTERN = re.compile(r'^\s*[\w-]+\s+SECTION\.', re.IGNORECASE)
+DATA_ITEM_PATTERN = re.compile(r'^\s*\d+\s+\w+')
+
+
+def clean_line(line: str) -> Optional[str]:
+    """Retourne la ligne sans espaces de bord, ou None si vide ou commentaire."""
+    line = line.strip()
+    if not line or line.startswith('*'):
+        return None
+    return line
 
 class CobolParser:
-    def __init__(self):
+    def __init__(self, expander=None, source_format: str = AUTO):
         self.divisions = {
             'IDENTIFICATION': [],
             'ENVIRONMENT': [],
             'DATA': [],
             'PROCEDURE': []
         }
+        # Numéros de ligne source (base 1) des lignes de chaque division
+        self.line_numbers = {name: array('I') for name in self.divisions}
+        # Jetons des lignes de chaque division, découpés par `tokens_for` (voir lexer.TokenTable)
+        self.tokens = {name: TokenTable() for name in self.divisions}
         self.current_division = None
+        # Format de référence du source (lexer.AUTO, FIXED ou FREE)
+        self.source_format = source_format
+        # Développeur des instructions COPY (copybooks.CopybookExpander)
+        self.expander = expander
 
     def parse_file(self, file_path: str) -> Dict[str, List[str]]:
         """Parse un fichier COBOL et retourne sa structure."""
@@ -23,22 +45,73 @@ class CobolParser:
             raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
 
     def parse_content(self, lines: List[str]) -> Dict[str, List[str]]:
-        """Parse le contenu COBOL ligne par ligne."""
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('*'):
-                continue
+        """Parse le contenu COBOL ligne par ligne.
 
+        Les lignes ne sont découpées en jetons qu'à la demande, division par
+        division (`tokens_for`).
+        """
+        for division, line_number, line in self.iter_content(lines):
+            self.divisions[division].append(line)
+            self.line_numbers[division].append(line_number)
+
+        return self.divisions
+
+    def tokens_for(self, division: str) -> TokenTable:
+        """Retourne la table des jetons d'une division.
+
+        Les lignes sont découpées d'un seul bloc à la première demande : une
+        division qu'aucune vérification n'examine ne l'est jamais.
+        """
+        table = self.tokens[division]
+        start = len(table)
+        if start < len(self.divisions[division]):
+            table.extend(self.line_numbers[division][start:], self.divisions[division][start:])
+        return table
+
+    def iter_file(self, file_path: str) -> Iterator[Tuple[str, int, str]]:
+        """Lit un fichier COBOL en flux et produit ses lignes utiles.
+
+        Le fichier est lu de façon incrémentale : aucune division n'est
+        conservée en mémoire, ce qui permet d'analyser des sources de
+        plusieurs centaines de Mo à mémoire bornée.
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                yield from self.iter_content(file)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
+
+    def iter_division(self, file_path: str, division: str) -> Iterator[Tuple[int, str]]:
+        """Produit en flux les lignes (numéro, texte) d'une seule division."""
+        for name, line_number, line in self.iter_file(file_path):
+            if name == division:
+                yield line_number, line
+
+    def iter_content(self, lines: Iterable[str]) -> Iterator[Tuple[str, int, str]]:
+        """Produit (division, numéro de ligne, ligne) pour chaque ligne utile.
+
+        Si un développeur de COPY est configuré, les instructions COPY sont
+        remplacées par le contenu des copybooks.
+        """
+        return self.expand(self._iter_lines(lines))
+
+    def expand(self, stream: Iterable[Tuple[str, int, str]]) -> Iterable[Tuple[str, int, str]]:
+        """Développe les COPY d'un flux si un développeur est configuré."""
+        if self.expander is None:
+            return stream
+        return self.expander.expand(stream)
+
+    def _iter_lines(self, lines: Iterable[str]) -> Iterator[Tuple[str, int, str]]:
+        """Classe chaque ligne de code (lignes de suite jointes) dans sa division."""
+        for line_number, line in logical_lines(enumerate(lines, 1), self.source_format):
             # Détection des divisions
-            division_match = re.match(r'^\s*(\w+)\s+DIVISION\.', line)
+            division_match = DIVISION_PATTERN.match(line)
             if division_match:
                 self.current_division = division_match.group(1).upper()
                 continue
 
             if self.current_division:
-                self.divisions[self.current_division].append(line)
-
-        return self.divisions
+                yield self.current_division, line_number, line
 
     def get_procedures(self) -> List[str]:
         """Retourne la liste des procédures (sections uniquement).
@@ -54,7 +127,7 @@ class CobolParser:
             line = line.strip().upper()
             
             # Ne compte que les sections explicitement déclarées
-            if re.match(r'^\s*[\w-]+\s+SECTION\.', line):
+            if SECTION_PATTERN.match(line):
                 procedures.append(line)
                 
         return procedures
@@ -63,6 +136,6 @@ class CobolParser:
         """Retourne la liste des éléments de données."""
         data_items = []
         for line in self.divisions['DATA']:
-            if re.match(r'^\s*\d+\s+\w+', line):
+            if DATA_ITEM_PATTERN.match(line):
                 data_items.append(line.strip())
         return data_items 
\ No newline at end of file
@@ -1,10 +1,16 @@
 """
 Module de génération de rapports d'audit.
 """
-from typing import Dict, Any
-import markdown
-from pypdf import PdfWriter
+import os
+import re
 from datetime import datetime
+from io import BytesIO, StringIO
+from typing import Dict, Any, BinaryIO, IO, Iterable, Iterator, Union
+from issues import severity_counts
+
+# Titre Markdown (#, ## ou ###) et retrait d'une liste imbriquée dans le PDF
+HEADING_PATTERN = re.compile(r'^(#{1,3})\s+(.*)$')
+PDF_INDENT_PER_SPACE = 6
 
 class CobolReport:
     def __init__(self):
@@ -53,74 +59,108 @@ et fournissant des recommandations pour améliorer la qualité du code.
 - Maintenir une complexité cyclomatique raisonnable (< 10 par section)
 """
 
-    def generate(self, analysis_results: Dict[str, Any], file_path: str, output_format: str = 'markdown') -> str:
-        """Génère le rapport dans le format spécifié."""
-        report_content = self._format_report(analysis_results, file_path)
-        
+    def generate(self, analysis_results: Dict[str, Any], file_path: str,
+                 output_format: str = 'markdown') -> Union[str, bytes]:
+        """Génère le rapport dans le format spécifié (texte Markdown ou octets PDF)."""
+        if output_format == 'markdown':
+            output = StringIO()
+        elif output_format == 'pdf':
+            output = BytesIO()
+        else:
+            raise ValueError(f"Format de sortie non supporté: {output_format}")
+        self.write(analysis_results, file_path, output, output_format)
+        return output.getvalue()
+
+    def write(self, analysis_results: Dict[str, Any], file_path: str, stream: IO,
+              output_format: str = 'markdown') -> None:
+        """Écrit le rapport dans un flux (texte pour Markdown, binaire pour PDF).
+
+        Le rapport est produit morceau par morceau, un problème à la fois :
+        ni le Markdown complet ni le document PDF ne sont construits en
+        mémoire.
+        """
+        chunks = self._iter_report(analysis_results, file_path)
         if output_format == 'markdown':
-            return report_content
+            for chunk in chunks:
+                stream.write(chunk)
         elif output_format == 'pdf':
-            return self._convert_to_pdf(report_content)
+            self._write_pdf(chunks, stream, file_path)
         else:
             raise ValueError(f"Format de sortie non supporté: {output_format}")
 
-    def _format_report(self, results: Dict[str, Any], file_path: str) -> str:
-        """Formate les résultats de l'analyse en rapport."""
+    def _iter_report(self, results: Dict[str, Any], file_path: str) -> Iterator[str]:
+        """Produit le rapport Markdown : en-tête, chaque problème, puis la fin du modèle."""
         metrics = results['metrics']
         issues = results['issues']
 
         # Compte les problèmes par sévérité
-        severity_count = {'ERROR': 0, 'WARNING': 0, 'INFO': 0}
-        for issue in issues:
-            severity_count[issue['severity']] += 1
+        severity_count = severity_counts(issues)
 
-        return self.template.format(
+        fields = dict(
             date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             file_path=file_path,
             metrics=metrics,
             error_count=severity_count['ERROR'],
             warning_count=severity_count['WARNING'],
             info_count=severity_count['INFO'],
-            issues=self._format_issues(issues),
             recommendations=self._generate_recommendations(issues)
         )
+        head, tail = self.template.split('{issues}')
+        yield head.format(**fields)
+        yield from self._iter_issues(issues)
+        yield tail.format(**fields)
 
-    def _format_issues(self, issues: list) -> str:
-        """Formate la section des problèmes."""
+    def _iter_issues(self, issues: list) -> Iterator[str]:
+        """Produit la section des problèmes, un problème à la fois."""
         if not issues:
-            return "Aucun problème détecté."
+            yield "Aucun problème détecté."
+            return
 
-        formatted_issues = []
+        # Les problèmes sont séparés par une ligne vide
+        separator = ''
         for issue in issues:
-            formatted_issues.append(f"""
-### {issue['severity']}: {issue['message']}
-- Type: {issue['type']}
-- Ligne: {issue.get('line', 'N/A')}
-""")
-        return "\n".join(formatted_issues)
+            yield f"""{separator}
+### {issue.severity.name}: {issue.message}
+- Type: {issue.rule}
+- Ligne: {issue.line_number if issue.line_number is not None else 'N/A'}
+"""
+            separator = '\n'
 
     def _generate_recommendations(self, issues: list) -> str:
         """Génère des recommandations basées sur les problèmes détectés."""
         recommendations = set()
         
         for issue in issues:
-            if issue['type'] == 'best_practice':
+            if issue.rule == 'best_practice':
                 recommendations.add("- Éviter l'utilisation de GOTO pour améliorer la lisibilité")
-            elif issue['type'] == 'documentation':
+            elif issue.rule == 'documentation':
                 recommendations.add("- Améliorer la documentation des éléments FILLER")
-            elif issue['type'] == 'structure':
+            elif issue.rule == 'structure':
                 recommendations.add("- Vérifier la structure des divisions COBOL")
-            elif issue['type'] == 'unused_variable':
+            elif issue.rule == 'unused_variable':
                 recommendations.add("- Supprimer ou utiliser les variables déclarées")
-            elif issue['type'] == 'empty_section':
+            elif issue.rule == 'empty_section':
                 recommendations.add("- Fusionner ou supprimer les sections vides")
 
         return "\n".join(recommendations) if recommendations else "Aucune recommandation spécifique."
 
-    def _convert_to_pdf(self, markdown_content: str) -> bytes:
-        """Convertit le contenu Markdown en PDF."""
-        # Note: Cette méthode nécessiterait une implémentation plus complète
-        # avec une bibliothèque de conversion HTML -> PDF
-        html = markdown.markdown(markdown_content)
-        # TODO: Implémenter la conversion HTML -> PDF
-        return html.encode('utf-8') 
\ No newline at end of file
+    @staticmethod
+    def _write_pdf(chunks: Iterable[str], stream: BinaryIO, file_path: str) -> None:
+        """Met en page le rapport Markdown en PDF, au fil des morceaux produits.
+
+        Seuls les titres, les listes et le gras du modèle sont interprétés ;
+        chaque page est écrite dans le flux dès qu'elle est pleine.
+        """
+        # Importé ici : seul l'export PDF en a besoin
+        from pdf_writer import PdfWriter
+        with PdfWriter(stream, title=f"Rapport d'Audit COBOL - {os.path.basename(file_path)}") as pdf:
+            for chunk in chunks:
+                for line in chunk.split('\n'):
+                    stripped = line.strip()
+                    if not stripped:
+                        pdf.space()
+                    elif match := HEADING_PATTERN.match(stripped):
+                        pdf.heading(match.group(2), len(match.group(1)))
+                    else:
+                        indent = (len(line) - len(line.lstrip())) * PDF_INDENT_PER_SPACE
+                        pdf.text(stripped.replace('**', ''), indent=indent)
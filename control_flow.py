@@ -0,0 +1,314 @@
+"""
+Graphe de flot de contrôle des sections et paragraphes de la division PROCEDURE.
+"""
+from collections import deque
+from typing import List, Dict, Iterable, Optional, Tuple
+import re
+
+# Bornes d'un mot COBOL (les tirets font partie des noms)
+_START = r'(?<![\w-])'
+_END = r'(?![\w-])'
+
+SECTION_HEADER_PATTERN = re.compile(r'^([\w-]+)\s+SECTION(?:\s+\d+)?\s*\.', re.IGNORECASE)
+PARAGRAPH_HEADER_PATTERN = re.compile(r'^([\w-]+)\.(?:\s+(.*))?$')
+DECLARATIVES_PATTERN = re.compile(r'^(END\s+)?DECLARATIVES\s*\.', re.IGNORECASE)
+
+# Instructions isolées qui ne sont pas des noms de paragraphe
+PARAGRAPH_RESERVED = {'EXIT', 'GOBACK', 'CONTINUE', 'ELSE', 'THEN'}
+
+# Éléments du flot de contrôle, reconnus dans l'ordre de la ligne
+FLOW_PATTERN = re.compile(
+    # L'initiale attendue écarte rapidement les autres mots
+    _START + r'(?=[AEGIOPS])(?:'
+    r'(?:(?P<close>END-IF|END-EVALUATE)|(?P<open>IF|EVALUATE))' + _END
+    + r'|(?P<phrase>AT\s+END|INVALID\s+KEY|SIZE\s+ERROR|ON\s+EXCEPTION|ON\s+OVERFLOW)' + _END
+    + r'|(?P<goto>GO\s*TO)' + _END
+    + r'(?P<targets>(?:\s+(?!DEPENDING' + _END + r')[\w-]+)*)(?P<depending>\s+DEPENDING' + _END + r')?'
+    + r'|PERFORM\s+(?P<perform>[\w-]+)(?:\s+(?:THRU|THROUGH)\s+(?P<thru>[\w-]+))?'
+    + r'|(?P<stop>STOP\s+RUN|GOBACK|EXIT\s+PROGRAM)' + _END
+    + r'|ALTER\s+(?P<altered>[\w-]+)\s+TO\s+(?:PROCEED\s+TO\s+)?(?P<proceed>[\w-]+)'
+    + r')|(?P<period>\.(?=\s|$))',
+    re.IGNORECASE
+)
+
+# Pré-filtre : une ligne sans aucun de ces mots ne peut contenir que des points
+FLOW_HINT_PATTERN = re.compile(
+    r'IF|EVALUATE|END|KEY|ERROR|EXCEPTION|OVERFLOW|GO|PERFORM|STOP|EXIT|ALTER', re.IGNORECASE
+)
+PERIOD_PATTERN = re.compile(r'\.(?=\s|$)')
+
+# Types d'arcs du graphe
+FALLTHROUGH = 'fallthrough'
+PERFORM = 'perform'
+PERFORM_THRU = 'perform_thru'
+GOTO = 'goto'
+
+# Modes d'atteinte d'un nœud lors du parcours
+_FLOW = 0       # atteint en séquence : peut continuer dans le nœud suivant
+_PERFORMED = 1  # atteint par PERFORM : rend la main à la fin de la plage
+
+
+class CfgNode:
+    """Nœud du graphe : point d'entrée, section ou paragraphe."""
+
+    __slots__ = ('name', 'kind', 'line_number', 'section', 'header')
+
+    def __init__(self, name: str, kind: str, line_number: Optional[int],
+                 section: Optional[int] = None, header: Optional[str] = None):
+        self.name = name
+        self.kind = kind
+        self.line_number = line_number
+        # Identifiant de la section englobante d'un paragraphe
+        self.section = section
+        self.header = header
+
+    def __repr__(self) -> str:
+        return f"CfgNode({self.name!r}, {self.kind}, line={self.line_number})"
+
+
+class ControlFlowGraph:
+    """Graphe des sections et paragraphes reliés par leurs transferts de contrôle.
+
+    Les nœuds sont numérotés dans l'ordre du source ; les arcs portent leur
+    type (enchaînement, PERFORM, PERFORM THRU, GO TO). Les racines sont le
+    début de la division PROCEDURE et les sections DECLARATIVES, appelées
+    par le système d'exécution.
+    """
+
+    def __init__(self):
+        self.nodes: List[CfgNode] = []
+        self.edges: List[List[Tuple[int, str]]] = []
+        self.roots: List[int] = []
+        self._sections: Dict[str, int] = {}
+        self._paragraphs: Dict[str, List[int]] = {}
+        self._members: Dict[int, List[int]] = {}
+        self._reachable: Optional[bytearray] = None
+
+    def add_node(self, name: str, kind: str, line_number: Optional[int] = None,
+                 section: Optional[int] = None, header: Optional[str] = None) -> int:
+        """Ajoute un nœud et retourne son identifiant."""
+        node = len(self.nodes)
+        self.nodes.append(CfgNode(name, kind, line_number, section, header))
+        self.edges.append([])
+        if kind == 'section':
+            self._sections.setdefault(name.upper(), node)
+            self._members[node] = []
+        elif kind == 'paragraph':
+            self._paragraphs.setdefault(name.upper(), []).append(node)
+            if section is not None:
+                self._members[section].append(node)
+        return node
+
+    def add_edge(self, source: int, target: int, kind: str) -> None:
+        """Ajoute un arc typé entre deux nœuds."""
+        self.edges[source].append((target, kind))
+        self._reachable = None
+
+    def find(self, name: str, section: Optional[int] = None) -> Optional[int]:
+        """Résout un nom de procédure, en privilégiant les paragraphes de `section`."""
+        key = name.upper()
+        paragraphs = self._paragraphs.get(key, ())
+        for node in paragraphs:
+            if self.nodes[node].section == section:
+                return node
+        if key in self._sections:
+            return self._sections[key]
+        return paragraphs[0] if paragraphs else None
+
+    def members(self, section: int) -> List[int]:
+        """Retourne les paragraphes d'une section."""
+        return self._members.get(section, [])
+
+    def successors(self, node: int) -> List[int]:
+        """Retourne les nœuds directement accessibles depuis un nœud."""
+        return [target for target, _ in self.edges[node]]
+
+    def reachable(self) -> bytearray:
+        """Marque les nœuds atteignables depuis les racines (parcours en largeur).
+
+        Chaque nœud est visité au plus une fois par mode d'atteinte : un nœud
+        atteint uniquement par PERFORM rend la main à la fin de sa plage et ne
+        se prolonge pas dans le nœud suivant. Le résultat est mémorisé.
+        """
+        if self._reachable is not None:
+            return self._reachable
+        visited = bytearray(2 * len(self.nodes))
+        queue = deque()
+        for root in self.roots:
+            visited[2 * root + _FLOW] = 1
+            queue.append((root, _FLOW))
+        while queue:
+            node, mode = queue.popleft()
+            for target, kind in self.edges[node]:
+                if kind == FALLTHROUGH:
+                    if mode != _FLOW:
+                        continue
+                    target_mode = _FLOW
+                elif kind == GOTO:
+                    target_mode = _FLOW
+                else:
+                    target_mode = _PERFORMED
+                state = 2 * target + target_mode
+                if not visited[state]:
+                    visited[state] = 1
+                    queue.append((target, target_mode))
+        self._reachable = bytearray(
+            visited[2 * node] | visited[2 * node + 1] for node in range(len(self.nodes))
+        )
+        return self._reachable
+
+    def unreachable(self) -> List[int]:
+        """Retourne les sections et paragraphes jamais atteints."""
+        reachable = self.reachable()
+        return [
+            node for node, seen in enumerate(reachable)
+            if not seen and self.nodes[node].kind != 'entry'
+        ]
+
+
+class ControlFlowBuilder:
+    """Construit le graphe de flot de contrôle ligne par ligne, en un passage.
+
+    Les lignes sont celles de la division PROCEDURE, sans indentation : un
+    paragraphe est reconnu à un nom seul suivi d'un point, en début de
+    phrase. Les références (PERFORM, GO TO, ALTER) sont résolues à la fin,
+    les procédures pouvant être citées avant leur déclaration.
+    """
+
+    def __init__(self):
+        self.graph = ControlFlowGraph()
+        entry = self.graph.add_node('PROCEDURE DIVISION', 'entry')
+        self.graph.roots.append(entry)
+        self._current = entry
+        self._section: Optional[int] = None
+        self._terminated = False
+        self._sentence_ended = True
+        self._depth = 0
+        self._phrase = False
+        self._declaratives = False
+        self._references: List[Tuple[int, Optional[int], str, str, Optional[str]]] = []
+
+    def add_line(self, line_number: int, line: str) -> None:
+        """Traite une ligne de la division PROCEDURE."""
+        if match := DECLARATIVES_PATTERN.match(line):
+            self._enter_declaratives(line_number, ending=bool(match.group(1)))
+            return
+
+        if match := SECTION_HEADER_PATTERN.match(line):
+            self._start_node(match.group(1), 'section', line_number, line)
+            self._section = self._current
+            return
+
+        if self._sentence_ended and (match := PARAGRAPH_HEADER_PATTERN.match(line)):
+            name = match.group(1)
+            if name.upper() not in PARAGRAPH_RESERVED and not name.upper().startswith('END-'):
+                self._start_node(name, 'paragraph', line_number, line, self._section)
+                if not match.group(2):
+                    return
+                line = match.group(2)
+
+        self._scan_statements(line)
+        self._sentence_ended = line.endswith('.')
+
+    def _enter_declaratives(self, line_number: int, ending: bool) -> None:
+        """Gère les bornes DECLARATIVES / END DECLARATIVES.
+
+        Les sections déclaratives ne sont pas atteintes en séquence ; le
+        programme commence après END DECLARATIVES.
+        """
+        self._terminated = True
+        self._declaratives = not ending
+        if ending:
+            self._start_node('PROCEDURE DIVISION', 'entry', line_number)
+            self.graph.roots.append(self._current)
+            self._section = None
+
+    def _start_node(self, name: str, kind: str, line_number: int, header: Optional[str] = None,
+                    section: Optional[int] = None) -> None:
+        """Ouvre un nœud et le relie au précédent si celui-ci s'y enchaîne."""
+        node = self.graph.add_node(name, kind, line_number, section, header)
+        if not self._terminated:
+            self.graph.add_edge(self._current, node, FALLTHROUGH)
+        if self._declaratives and kind == 'section':
+            self.graph.roots.append(node)
+        self._current = node
+        self._terminated = False
+        self._sentence_ended = True
+        self._depth = 0
+        self._phrase = False
+
+    def _scan_statements(self, line: str) -> None:
+        """Relève les transferts de contrôle d'une ligne d'instructions."""
+        if not FLOW_HINT_PATTERN.search(line):
+            if PERIOD_PATTERN.search(line):
+                self._depth = 0
+                self._phrase = False
+            return
+        for match in FLOW_PATTERN.finditer(line):
+            if match.group('open'):
+                self._depth += 1
+            elif match.group('close'):
+                self._depth = max(0, self._depth - 1)
+            elif match.group('phrase'):
+                self._phrase = True
+            elif match.group('period'):
+                self._depth = 0
+                self._phrase = False
+            elif match.group('goto'):
+                for target in match.group('targets').split():
+                    if target.upper() not in ('OF', 'IN'):
+                        self._reference(GOTO, target)
+                if not match.group('depending'):
+                    self._stop()
+            elif match.group('perform'):
+                self._reference(PERFORM, match.group('perform'), match.group('thru'))
+            elif match.group('stop'):
+                self._stop()
+            elif match.group('altered'):
+                # ALTER A TO PROCEED TO B : le GO TO du paragraphe A mène à B
+                self._references.append((-1, None, GOTO, match.group('proceed'),
+                                         match.group('altered')))
+
+    def _stop(self) -> None:
+        """Un transfert inconditionnel interrompt l'enchaînement séquentiel."""
+        if self._depth == 0 and not self._phrase:
+            self._terminated = True
+
+    def _reference(self, kind: str, target: str, thru: Optional[str] = None) -> None:
+        self._references.append((self._current, self._section, kind, target, thru))
+
+    def build(self) -> ControlFlowGraph:
+        """Résout les références et retourne le graphe."""
+        graph = self.graph
+        for source, section, kind, target, extra in self._references:
+            if source < 0:
+                # ALTER : l'origine de l'arc est le paragraphe modifié
+                source, target = graph.find(extra), graph.find(target)
+                if source is not None and target is not None:
+                    graph.add_edge(source, target, GOTO)
+                continue
+
+            node = graph.find(target, section)
+            if node is None:
+                continue
+            if kind == PERFORM and extra:
+                last = graph.find(extra, section)
+                end = last if last is not None and last >= node else node
+                # Une plage terminée par une section inclut ses paragraphes
+                end = max([end] + graph.members(end))
+                for member in range(node, end + 1):
+                    graph.add_edge(source, member, PERFORM_THRU)
+            elif kind == PERFORM:
+                graph.add_edge(source, node, PERFORM)
+                for member in graph.members(node):
+                    graph.add_edge(source, member, PERFORM)
+            else:
+                graph.add_edge(source, node, GOTO)
+        self._references = []
+        return graph
+
+    def add_lines(self, lines: Iterable[str]) -> ControlFlowGraph:
+        """Construit le graphe d'une suite de lignes numérotées à partir de 0."""
+        for line_number, line in enumerate(lines):
+            self.add_line(line_number, line)
+        return self.build()
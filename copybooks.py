@@ -0,0 +1,170 @@
+"""
+Résolution et expansion des instructions COPY.
+"""
+import os
+import re
+from functools import lru_cache
+from typing import List, Dict, Iterable, Iterator, Optional, Set, Tuple
+from lexer import logical_lines
+from logger import logger
+
+COPY_START_PATTERN = re.compile(r'^COPY\s', re.IGNORECASE)
+COPY_PATTERN = re.compile(
+    r'^COPY\s+(?P<name>"[^"]+"|\'[^\']+\'|[\w-]+)'
+    r'(?:\s+(?:OF|IN)\s+(?P<library>[\w-]+))?'
+    r'(?:\s+REPLACING\s+(?P<replacing>.*?))?\s*\.?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+REPLACING_PATTERN = re.compile(r'(==.*?==|\S+)\s+BY\s+(==.*?==|\S+)', re.IGNORECASE | re.DOTALL)
+
+# Extensions essayées lors de la résolution d'un nom de copybook
+COPYBOOK_EXTENSIONS = ('', '.cpy', '.CPY', '.cbl', '.CBL', '.cob', '.COB')
+
+# Profondeur maximale d'imbrication des COPY (protection contre les cycles)
+MAX_COPY_DEPTH = 16
+
+# Taille du cache de copybooks partagé par le processus
+COPYBOOK_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=COPYBOOK_CACHE_SIZE)
+def _parse_copybook(path: str, mtime_ns: int, size: int) -> Tuple[str, ...]:
+    """Lit un copybook et retourne ses lignes de code (format reconnu).
+
+    La date de modification et la taille font partie de la clé du cache :
+    un copybook modifié est relu, les autres sont partagés par tous les
+    programmes qui les incluent.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return tuple(line for _, line in logical_lines(enumerate(file, 1)))
+
+
+def load_copybook(path: str) -> Tuple[str, ...]:
+    """Retourne les lignes d'un copybook via le cache du processus."""
+    stat = os.stat(path)
+    return _parse_copybook(path, stat.st_mtime_ns, stat.st_size)
+
+
+def parse_replacing(operands: Optional[str]) -> List[Tuple[re.Pattern, str]]:
+    """Convertit les opérandes d'un REPLACING en couples (motif, remplacement).
+
+    Le pseudo-texte (==...==) est remplacé tel quel ; un mot simple n'est
+    remplacé que s'il apparaît comme mot COBOL complet.
+    """
+    replacements = []
+    for source, target in REPLACING_PATTERN.findall(operands or ''):
+        if source.startswith('=='):
+            pattern = re.compile(re.escape(source[2:-2].strip()))
+        else:
+            pattern = re.compile(r'(?<![\w-])' + re.escape(source) + r'(?![\w-])')
+        if target.startswith('=='):
+            target = target[2:-2].strip()
+        replacements.append((pattern, target))
+    return replacements
+
+
+class CopybookExpander:
+    """Remplace les instructions COPY par le contenu des copybooks.
+
+    Les copybooks sont recherchés dans les répertoires configurés, dans
+    l'ordre. Un copybook introuvable est signalé et l'instruction COPY est
+    conservée telle quelle.
+    """
+
+    def __init__(self, search_paths: Iterable[str]):
+        self.search_paths = list(search_paths)
+        self.unresolved: List[str] = []
+        # Chemins des copybooks effectivement inclus (dépendances du programme)
+        self.included: Set[str] = set()
+        # Chemins où un copybook introuvable a été cherché en vain
+        self.missing: Set[str] = set()
+        self._resolved: Dict[Tuple[str, Optional[str]], Optional[str]] = {}
+
+    def resolve(self, name: str, library: Optional[str] = None) -> Optional[str]:
+        """Retourne le chemin d'un copybook, ou None s'il est introuvable."""
+        key = (name, library)
+        if key not in self._resolved:
+            self._resolved[key] = self._find(name, library)
+        return self._resolved[key]
+
+    def candidates(self, name: str, library: Optional[str] = None) -> List[str]:
+        """Retourne les chemins essayés, dans l'ordre, pour trouver un copybook."""
+        if os.path.isabs(name):
+            return [name]
+        directories = []
+        for base in self.search_paths:
+            if library:
+                directories.append(os.path.join(base, library))
+            directories.append(base)
+        return [
+            os.path.join(directory, candidate + extension)
+            for directory in directories
+            for candidate in dict.fromkeys((name, name.upper(), name.lower()))
+            for extension in COPYBOOK_EXTENSIONS
+        ]
+
+    def _find(self, name: str, library: Optional[str]) -> Optional[str]:
+        for path in self.candidates(name, library):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def expand(self, stream: Iterable[Tuple[str, int, str]]) -> Iterator[Tuple[str, int, str]]:
+        """Développe les COPY d'un flux (division, numéro, ligne).
+
+        Les lignes issues d'un copybook portent le numéro de ligne de
+        l'instruction COPY du programme qui l'inclut.
+        """
+        return self._expand(stream, 0)
+
+    def _expand(self, stream: Iterable[Tuple[str, int, str]], depth: int) -> Iterator[Tuple[str, int, str]]:
+        pending = None
+        for division, line_number, line in stream:
+            if pending is None:
+                if not COPY_START_PATTERN.match(line):
+                    yield division, line_number, line
+                    continue
+                pending = (division, line_number, [])
+            # Une instruction COPY se termine au premier point final
+            pending[2].append(line)
+            if line.endswith('.'):
+                yield from self._expand_statement(*pending, depth)
+                pending = None
+        if pending is not None:
+            yield from self._expand_statement(*pending, depth)
+
+    def _expand_statement(self, division: str, line_number: int, lines: List[str],
+                          depth: int) -> Iterator[Tuple[str, int, str]]:
+        """Développe une instruction COPY (éventuellement sur plusieurs lignes)."""
+        match = COPY_PATTERN.match(' '.join(lines))
+        path = None
+        if match:
+            name = match.group('name')
+            if depth >= MAX_COPY_DEPTH:
+                logger.warning("Imbrication de COPY trop profonde: %s", name)
+            else:
+                path = self.resolve(name.strip('\'"'), match.group('library'))
+                if path is None:
+                    self.unresolved.append(name)
+                    self.missing.update(self.candidates(name.strip('\'"'), match.group('library')))
+                    logger.warning("Copybook introuvable: %s", name)
+        if path is None:
+            for line in lines:
+                yield division, line_number, line
+            return
+
+        self.included.add(path)
+        replacements = parse_replacing(match.group('replacing'))
+        content = (
+            (division, line_number, self._replace(line, replacements))
+            for line in load_copybook(path)
+        )
+        yield from self._expand(content, depth + 1)
+
+    @staticmethod
+    def _replace(line: str, replacements: List[Tuple[re.Pattern, str]]) -> str:
+        """Applique les remplacements d'un REPLACING à une ligne."""
+        for pattern, target in replacements:
+            # Le remplacement est du texte COBOL, pas un modèle de re.sub (\1, \g<...>)
+            line = pattern.sub(lambda _: target, line)
+        return line
@@ -20,4 +20,12 @@ class ReportError(CobolAuditError):
 
 class FileError(CobolAuditError):
     """Erreur lors de la manipulation des fichiers."""
-    pass 
\ No newline at end of file
+    pass 
+
+class VcsError(CobolAuditError):
+    """Erreur lors de l'interrogation du gestionnaire de versions (git)."""
+    pass
+
+class DaemonError(CobolAuditError):
+    """Erreur de communication avec le démon d'audit."""
+    pass
@@ -4,55 +4,97 @@ Module d'export des résultats d'analyse.
 import json
 import csv
 from io import StringIO
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Optional, TextIO
 from datetime import datetime
 from scoring import AuditScorer
+from issues import Issue, LineResolver, severity_counts
+
+def _dump(value: Any, indent: int) -> str:
+    """Sérialise une valeur JSON indentée, à imbriquer au niveau `indent`."""
+    return json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + ' ' * indent)
 
 class JsonExporter:
     """Exporte les résultats au format JSON."""
     
     @staticmethod
-    def export(results: Dict[str, Any], file_path: str, detailed: bool = False) -> str:
+    def export(results: Dict[str, Any], file_path: str, detailed: bool = False,
+               source_path: Optional[str] = None) -> str:
         """Convertit les résultats en JSON."""
+        output = StringIO()
+        JsonExporter.write(results, file_path, output, detailed, source_path)
+        return output.getvalue()
+
+    @staticmethod
+    def write(results: Dict[str, Any], file_path: str, stream: TextIO, detailed: bool = False,
+              source_path: Optional[str] = None) -> None:
+        """Écrit les résultats en JSON dans un flux, problème par problème.
+
+        Le document produit est identique à celui de `export`, sans jamais
+        construire en mémoire la chaîne complète. `source_path` désigne le
+        fichier à relire quand il diffère du chemin affiché (démon d'audit).
+        """
         score, grade = AuditScorer.calculate_score(results['metrics'])
         recommendations = AuditScorer.generate_recommendations(results['metrics'], detailed)
-        detailed_analysis = AuditScorer.get_detailed_metrics_analysis(results['metrics']) if detailed else []
 
-        export_data = {
-            'metadata': {
-                'timestamp': datetime.now().isoformat(),
-                'file_analyzed': file_path,
-                'tool_version': '1.0.0'
-            },
-            'audit_score': {
-                'score': score,
-                'grade': grade
-            },
-            'metrics': results['metrics'],
-            'issues': [
-                {
-                    'severity': issue['severity'],
-                    'message': issue['message'],
-                    'type': issue['type'],
-                    'line': issue.get('line', 'N/A')
-                }
-                for issue in results['issues']
-            ],
-            'recommendations': recommendations,
-            'summary': {
-                'total_issues': len(results['issues']),
-                'severity_counts': {
-                    'ERROR': len([i for i in results['issues'] if i['severity'] == 'ERROR']),
-                    'WARNING': len([i for i in results['issues'] if i['severity'] == 'WARNING']),
-                    'INFO': len([i for i in results['issues'] if i['severity'] == 'INFO'])
-                }
-            }
-        }
+        stream.write('{\n  "metadata": ' + _dump({
+            'timestamp': datetime.now().isoformat(),
+            'file_analyzed': file_path,
+            'tool_version': '1.0.0'
+        }, 2))
+        stream.write(',\n  "audit_score": ' + _dump({'score': score, 'grade': grade}, 2))
+        stream.write(',\n  "metrics": ' + _dump(results['metrics'], 2))
+
+        stream.write(',\n  "issues": [')
+        resolver = LineResolver(source_path or file_path)
+        for index, issue in enumerate(results['issues']):
+            stream.write(',\n    ' if index else '\n    ')
+            stream.write(_dump(issue.to_dict(resolver.text(issue)), 4))
+        resolver.close()
+        stream.write('\n  ]' if results['issues'] else ']')
+
+        stream.write(',\n  "recommendations": ' + _dump(recommendations, 2))
+        stream.write(',\n  "summary": ' + _dump({
+            'total_issues': len(results['issues']),
+            'severity_counts': severity_counts(results['issues'])
+        }, 2))
 
         if detailed:
-            export_data['detailed_analysis'] = detailed_analysis
-        
-        return json.dumps(export_data, indent=2, ensure_ascii=False)
+            detailed_analysis = AuditScorer.get_detailed_metrics_analysis(results['metrics'])
+            stream.write(',\n  "detailed_analysis": ' + _dump(detailed_analysis, 2))
+
+        # Résultat de portefeuille : détail par fichier
+        if 'files' in results:
+            stream.write(',\n  "files": ' + _dump(results['files'], 2))
+            stream.write(',\n  "errors": ' + _dump(results.get('errors', []), 2))
+        stream.write('\n}')
+
+class NdjsonExporter:
+    """Exporte les problèmes au format NDJSON (un problème par ligne).
+
+    Chaque ligne est un document JSON autonome : la sortie peut être lue
+    par un outil en aval pendant que l'audit se poursuit.
+    """
+
+    @staticmethod
+    def export(results: Dict[str, Any], file_path: str, detailed: bool = False) -> str:
+        """Convertit les problèmes en NDJSON."""
+        output = StringIO()
+        NdjsonExporter.write(results, file_path, output, detailed)
+        return output.getvalue()
+
+    @staticmethod
+    def write(results: Dict[str, Any], file_path: str, stream: TextIO, detailed: bool = False) -> None:
+        """Écrit les problèmes d'un résultat dans un flux."""
+        resolver = LineResolver(file_path)
+        NdjsonExporter.write_issues(results['issues'], stream, resolver)
+        resolver.close()
+
+    @staticmethod
+    def write_issues(issues: Iterable[Issue], stream: TextIO, resolver: LineResolver) -> None:
+        """Écrit un lot de problèmes puis vide le flux."""
+        for issue in issues:
+            stream.write(json.dumps(issue.to_dict(resolver.text(issue)), ensure_ascii=False) + '\n')
+        stream.flush()
 
 class CsvExporter:
     """Exporte les résultats au format CSV."""
@@ -61,7 +103,13 @@ class CsvExporter:
     def export(results: Dict[str, Any], file_path: str, detailed: bool = False) -> str:
         """Convertit les résultats en CSV."""
         output = StringIO()
-        csv_writer = csv.writer(output)
+        CsvExporter.write(results, file_path, output, detailed)
+        return output.getvalue()
+
+    @staticmethod
+    def write(results: Dict[str, Any], file_path: str, stream: TextIO, detailed: bool = False) -> None:
+        """Écrit les résultats en CSV dans un flux, ligne par ligne."""
+        csv_writer = csv.writer(stream)
         score, grade = AuditScorer.calculate_score(results['metrics'])
         recommendations = AuditScorer.generate_recommendations(results['metrics'], detailed)
 
@@ -85,8 +133,8 @@ class CsvExporter:
             ])
         
         # Quality metrics
-        for key in ['complexity', 'unused_vars', 'empty_sections', 
-                   'nested_conditions', 'magic_numbers', 'dead_code_sections']:
+        for key in ['complexity', 'unused_vars', 'empty_sections', 'nested_conditions',
+                   'magic_numbers', 'dead_code_sections', 'dead_code_paragraphs']:
             csv_writer.writerow([
                 'Quality',
                 key.replace('_', ' ').title(),
@@ -113,18 +161,25 @@ class CsvExporter:
 
         # Problèmes détectés
         if results['issues']:
+            portfolio = 'files' in results
             csv_writer.writerow(['Issues'])
-            csv_writer.writerow(['Severity', 'Type', 'Message', 'Line'])
+            header = ['Severity', 'Type', 'Message', 'Line Number', 'Line']
+            csv_writer.writerow(header + ['File'] if portfolio else header)
             
+            resolver = LineResolver(file_path)
             for issue in results['issues']:
-                csv_writer.writerow([
-                    issue['severity'],
-                    issue['type'],
-                    issue['message'],
-                    issue.get('line', 'N/A')
-                ])
-
-        return output.getvalue()
+                text = resolver.text(issue)
+                row = [
+                    issue.severity.name,
+                    issue.rule,
+                    issue.message,
+                    issue.line_number if issue.line_number is not None else 'N/A',
+                    text if text is not None else 'N/A'
+                ]
+                if portfolio:
+                    row.append(issue.file or file_path)
+                csv_writer.writerow(row)
+            resolver.close()
 
 class SonarQubeExporter:
     """Exporte les résultats au format SonarQube."""
@@ -139,16 +194,13 @@ class SonarQubeExporter:
             'issues': [
                 {
                     'engineId': 'cobol-audit',
-                    'ruleId': issue['type'],
-                    'severity': issue['severity'].lower(),
+                    'ruleId': issue.rule,
+                    'severity': issue.severity.name.lower(),
                     'type': 'CODE_SMELL',
                     'primaryLocation': {
-                        'message': issue['message'],
-                        'filePath': file_path,
-                        'textRange': {
-                            'startLine': issue.get('line', 1),
-                            'endLine': issue.get('line', 1)
-                        }
+                        'message': issue.message,
+                        'filePath': issue.file or file_path,
+                        'textRange': SonarQubeExporter._text_range(issue)
                     }
                 }
                 for issue in results['issues']
@@ -166,4 +218,14 @@ class SonarQubeExporter:
                 'grade': grade
             },
             'recommendations': recommendations
-        } 
\ No newline at end of file
+        } 
+
+    @staticmethod
+    def _text_range(issue: Issue) -> Dict[str, int]:
+        """Position d'un problème ; la ligne 1 par défaut (problème de fichier)."""
+        line = issue.line_number or 1
+        text_range = {'startLine': line, 'endLine': line}
+        if issue.column_start is not None:
+            text_range['startColumn'] = issue.column_start
+            text_range['endColumn'] = issue.column_end if issue.column_end is not None else issue.column_start
+        return text_range
@@ -0,0 +1,144 @@
+"""
+Sélection des fichiers COBOL modifiés depuis une révision git.
+"""
+import fnmatch
+import os
+import re
+import subprocess
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from exceptions import VcsError
+from portfolio import DEFAULT_PATTERNS, discover_cobol_files
+
+# Motifs identifiant les copybooks parmi les sources COBOL
+COPYBOOK_PATTERNS = ('*.cpy',)
+
+HUNK_PATTERN = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@', re.MULTILINE)
+
+# Plages de lignes modifiées [début, fin] ; None signifie « tout le fichier »
+LineRanges = Optional[List[Tuple[int, int]]]
+
+
+def _git(args: List[str], cwd: str) -> str:
+    """Exécute une commande git et retourne sa sortie standard."""
+    try:
+        completed = subprocess.run(
+            ['git', '-c', 'core.quotepath=off'] + args,
+            cwd=cwd, capture_output=True, text=True, check=True
+        )
+    except FileNotFoundError:
+        raise VcsError("La commande git est introuvable")
+    except subprocess.CalledProcessError as e:
+        raise VcsError(f"Échec de git {' '.join(args)}: {e.stderr.strip()}")
+    return completed.stdout
+
+
+def _matches(path: str, patterns: Iterable[str]) -> bool:
+    name = os.path.basename(path).lower()
+    return any(fnmatch.fnmatch(name, p.lower()) for p in patterns)
+
+
+def is_copybook(path: str, patterns: Iterable[str] = COPYBOOK_PATTERNS) -> bool:
+    """Indique si un fichier est un copybook d'après son nom (voir COPYBOOK_PATTERNS)."""
+    return _matches(path, patterns)
+
+
+def parse_hunk_ranges(diff: str) -> List[Tuple[int, int]]:
+    """Extrait les plages de lignes ajoutées ou modifiées d'un diff -U0."""
+    ranges = []
+    for match in HUNK_PATTERN.finditer(diff):
+        start = int(match.group(1))
+        count = int(match.group(2)) if match.group(2) is not None else 1
+        if count:
+            ranges.append((start, start + count - 1))
+    return ranges
+
+
+def in_ranges(line_number: Optional[int], ranges: LineRanges) -> bool:
+    """Indique si une ligne appartient aux plages modifiées."""
+    if ranges is None:
+        return True
+    if line_number is None:
+        return False
+    return any(start <= line_number <= end for start, end in ranges)
+
+
+class ChangeSet:
+    """Programmes COBOL touchés par les modifications depuis une révision.
+
+    Un programme est retenu s'il a été modifié directement, ou s'il inclut
+    (COPY) un copybook modifié ; dans ce dernier cas, ses lignes COPY
+    correspondantes sont considérées comme modifiées.
+    """
+
+    def __init__(self, since: str, root: str = '.', patterns: Iterable[str] = DEFAULT_PATTERNS,
+                 copybook_patterns: Iterable[str] = COPYBOOK_PATTERNS):
+        self.since = since
+        self.root = os.path.realpath(root)
+        self.patterns = list(patterns)
+        self.copybook_patterns = list(copybook_patterns)
+        self.toplevel = _git(['rev-parse', '--show-toplevel'], self.root).strip()
+
+    def changed_files(self) -> Dict[str, str]:
+        """Retourne les sources COBOL modifiées sous la racine, avec leur statut git."""
+        output = _git(['diff', '--name-status', '--diff-filter=ACMR', self.since, '--', self.root],
+                      self.root)
+        changed = {}
+        for line in output.splitlines():
+            fields = line.split('\t')
+            path = os.path.realpath(os.path.join(self.toplevel, fields[-1]))
+            if _matches(path, self.patterns):
+                changed[path] = fields[0][0]
+        return changed
+
+    def line_ranges(self, path: str) -> List[Tuple[int, int]]:
+        """Retourne les plages de lignes modifiées d'un fichier."""
+        return parse_hunk_ranges(_git(['diff', '-U0', self.since, '--', path], self.root))
+
+    def collect(self) -> Dict[str, LineRanges]:
+        """Retourne les programmes à auditer et leurs plages de lignes modifiées."""
+        selection: Dict[str, LineRanges] = {}
+        copybooks = []
+        for path, status in self.changed_files().items():
+            if _matches(path, self.copybook_patterns):
+                copybooks.append(path)
+            elif status == 'A':
+                selection[path] = None
+            else:
+                selection[path] = self.line_ranges(path)
+
+        for path, lines in self._includers(copybooks).items():
+            if path not in selection:
+                selection[path] = []
+            if selection[path] is not None:
+                selection[path].extend((line, line) for line in lines)
+        return selection
+
+    def _includers(self, copybooks: List[str]) -> Dict[str, List[int]]:
+        """Retourne les programmes incluant un des copybooks, avec les lignes COPY."""
+        if not copybooks:
+            return {}
+        names = sorted({os.path.splitext(os.path.basename(path))[0] for path in copybooks})
+        pattern = re.compile(
+            r'\bCOPY\s+[\'"]?(?:' + '|'.join(re.escape(name) for name in names) + r')(?![\w-])',
+            re.IGNORECASE
+        )
+        programs = [
+            path for path in discover_cobol_files(self.root, self.patterns)
+            if not _matches(path, self.copybook_patterns)
+        ]
+        includers = {}
+        for path in programs:
+            with open(path, 'r', encoding='utf-8', errors='replace') as file:
+                lines = [number for number, line in enumerate(file, 1) if pattern.search(line)]
+            if lines:
+                includers[os.path.realpath(path)] = lines
+        return includers
+
+
+def filter_new_issues(results: Dict[str, Any], selection: Dict[str, LineRanges]) -> Dict[str, Any]:
+    """Ne conserve que les problèmes situés sur des lignes modifiées."""
+    issues = [
+        issue for issue in results['issues']
+        if issue.file in selection and in_ranges(issue.line_number, selection[issue.file])
+    ]
+    return dict(results, issues=issues)
@@ -0,0 +1,363 @@
+"""
+Tableau de bord HTML d'un portefeuille : une page statique de synthèse et
+le détail des problèmes réparti en fragments chargés à la demande.
+"""
+import glob
+import html
+import json
+import os
+from string import Template
+from typing import List, Dict, Any, Iterable, Optional
+from issues import Issue, LineResolver, Severity
+from score_matrix import MetricMatrix
+
+# Nombre de problèmes par fragment (un fichier .js par fragment)
+DEFAULT_SHARD_SIZE = 2000
+
+# Sous-répertoire des fragments et fonction appelée par chacun d'eux
+SHARD_DIRECTORY = 'issues'
+SHARD_CALLBACK = 'COBOL_AUDIT_SHARD'
+
+INDEX_FILE = 'index.html'
+
+PAGE_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="utf-8">
+<title>$title</title>
+<style>
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin: 0.5em 0; width: 100%; }
+th, td { border-bottom: 1px solid #ddd; padding: 0.25em 0.5em; text-align: left; vertical-align: top; }
+td.num, th.num { text-align: right; }
+tbody tr.link { cursor: pointer; }
+tbody tr.link:hover { background: #f3f6fa; }
+code { font-size: 0.9em; white-space: pre-wrap; }
+.bar { display: flex; align-items: center; margin: 0.2em 0; }
+.bar span { width: 3em; }
+.bar div { background: #4a78b0; color: #fff; height: 1.4em; min-width: 2em; padding: 0 0.4em; }
+.pager button { margin-right: 0.5em; }
+.ERROR { color: #b00020; } .WARNING { color: #b06000; } .INFO { color: #2060a0; }
+</style>
+</head>
+<body>
+<h1>$title</h1>
+<p id="overview"></p>
+<h2>Distribution des notes</h2>
+<div id="grades"></div>
+<p id="percentiles"></p>
+<h2>Problèmes par règle</h2>
+<table id="rules">
+<thead><tr><th>Règle</th><th class="num">Erreurs</th><th class="num">Avertissements</th>
+<th class="num">Informations</th><th class="num">Total</th></tr></thead>
+<tbody></tbody>
+</table>
+<h2>Programmes</h2>
+<input id="filter" type="search" placeholder="Filtrer les programmes">
+<table id="programs">
+<thead><tr><th>Programme</th><th class="num">Score</th><th>Note</th><th class="num">Problèmes</th></tr></thead>
+<tbody></tbody>
+</table>
+<div class="pager" id="programs-pager"></div>
+<h2 id="issues-title">Problèmes</h2>
+<table id="issues">
+<thead><tr><th>Programme</th><th class="num">Ligne</th><th>Sévérité</th><th>Règle</th><th>Message</th><th>Code</th></tr></thead>
+<tbody></tbody>
+</table>
+<div class="pager" id="issues-pager"></div>
+<script>
+"use strict";
+const DATA = $data;
+const PAGE_SIZE = 100;
+// Fragments gardés en mémoire : les plus anciens sont oubliés au-delà
+const SHARD_CACHE = 16;
+const SEVERITIES = {1: "INFO", 2: "WARNING", 3: "ERROR"};
+const shards = new Map();
+const waiting = new Map();
+
+window[DATA.callback] = function (index, rows) {
+  const resolve = waiting.get(index);
+  waiting.delete(index);
+  if (resolve) resolve(rows);
+};
+
+function loadShard(index) {
+  if (!shards.has(index)) {
+    if (shards.size >= SHARD_CACHE) shards.delete(shards.keys().next().value);
+    shards.set(index, new Promise(function (resolve, reject) {
+      const script = document.createElement("script");
+      waiting.set(index, resolve);
+      script.src = DATA.shardDirectory + "/shard-" + String(index).padStart(5, "0") + ".js";
+      script.onload = function () { script.remove(); };
+      script.onerror = function () {
+        shards.delete(index);
+        waiting.delete(index);
+        reject(new Error("Fragment introuvable: " + script.src));
+      };
+      document.head.appendChild(script);
+    }));
+  }
+  return shards.get(index);
+}
+
+// Problèmes [start, start + count[ de la numérotation globale
+async function loadIssues(start, count) {
+  const rows = [];
+  if (count <= 0) return rows;
+  const end = start + count;
+  for (let shard = Math.floor(start / DATA.shardSize); shard * DATA.shardSize < end; shard++) {
+    const offset = shard * DATA.shardSize;
+    const chunk = await loadShard(shard);
+    for (let i = Math.max(start - offset, 0); i < Math.min(end - offset, chunk.length); i++) rows.push(chunk[i]);
+  }
+  return rows;
+}
+
+function cell(row, text, className) {
+  const td = row.insertCell();
+  td.textContent = text === null || text === undefined ? "" : String(text);
+  if (className) td.className = className;
+  return td;
+}
+
+function pager(element, page, pages, show) {
+  element.textContent = "";
+  if (pages <= 1) return;
+  const previous = document.createElement("button");
+  previous.textContent = "Précédent";
+  previous.disabled = page === 0;
+  previous.onclick = function () { show(page - 1); };
+  const next = document.createElement("button");
+  next.textContent = "Suivant";
+  next.disabled = page >= pages - 1;
+  next.onclick = function () { show(page + 1); };
+  element.append(previous, next, "Page " + (page + 1) + " / " + pages);
+}
+
+function renderSummary() {
+  document.getElementById("overview").textContent =
+    DATA.programs.length + " programme(s), " + DATA.issueCount + " problème(s)" +
+    (DATA.errors ? ", " + DATA.errors + " fichier(s) non analysé(s)" : "");
+  const grades = document.getElementById("grades");
+  const largest = Math.max(1, ...Object.values(DATA.grades));
+  for (const [grade, count] of Object.entries(DATA.grades)) {
+    const line = document.createElement("div");
+    line.className = "bar";
+    const label = document.createElement("span");
+    label.textContent = grade;
+    const bar = document.createElement("div");
+    bar.style.width = (100 * count / largest) * 0.8 + "%";
+    bar.textContent = count;
+    line.append(label, bar);
+    grades.append(line);
+  }
+  document.getElementById("percentiles").textContent = Object.entries(DATA.percentiles)
+    .map(function (entry) { return entry[0] + " : " + entry[1]; }).join(" — ");
+  const rules = document.querySelector("#rules tbody");
+  for (const [rule, counts] of DATA.rules) {
+    const row = rules.insertRow();
+    cell(row, rule);
+    cell(row, counts[2], "num");
+    cell(row, counts[1], "num");
+    cell(row, counts[0], "num");
+    cell(row, counts[0] + counts[1] + counts[2], "num");
+  }
+}
+
+// Programmes triés du plus mal noté au mieux noté
+const ranked = DATA.programs.map(function (_, index) { return index; })
+  .sort(function (a, b) { return (DATA.programs[a][1] ?? 101) - (DATA.programs[b][1] ?? 101); });
+let visible = ranked;
+
+function showPrograms(page) {
+  const body = document.querySelector("#programs tbody");
+  body.textContent = "";
+  for (const index of visible.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)) {
+    const [file, score, grade, count, start] = DATA.programs[index];
+    const row = body.insertRow();
+    row.className = "link";
+    row.onclick = function () { showIssues(file, start, count, 0); };
+    cell(row, file);
+    cell(row, score === null ? "-" : score.toFixed(1), "num");
+    cell(row, grade);
+    cell(row, count, "num");
+  }
+  pager(document.getElementById("programs-pager"), page, Math.ceil(visible.length / PAGE_SIZE), showPrograms);
+}
+
+document.getElementById("filter").oninput = function (event) {
+  const text = event.target.value.toLowerCase();
+  visible = text ? ranked.filter(function (index) {
+    return DATA.programs[index][0].toLowerCase().includes(text);
+  }) : ranked;
+  showPrograms(0);
+};
+
+let request = 0;
+async function showIssues(label, start, count, page) {
+  const current = ++request;
+  document.getElementById("issues-title").textContent = "Problèmes — " + label + " (" + count + ")";
+  const from = start + page * PAGE_SIZE;
+  let rows;
+  try {
+    rows = await loadIssues(from, Math.min(PAGE_SIZE, start + count - from));
+  } catch (error) {
+    document.getElementById("issues-title").textContent = error.message;
+    return;
+  }
+  // Une page demandée entre-temps a priorité
+  if (current !== request) return;
+  const body = document.querySelector("#issues tbody");
+  body.textContent = "";
+  for (const [program, line, severity, rule, message, text] of rows) {
+    const row = body.insertRow();
+    cell(row, DATA.programs[program][0]);
+    cell(row, line, "num");
+    cell(row, SEVERITIES[severity], SEVERITIES[severity]);
+    cell(row, rule);
+    cell(row, message);
+    const code = document.createElement("code");
+    code.textContent = text || "";
+    row.insertCell().append(code);
+  }
+  pager(document.getElementById("issues-pager"), page, Math.ceil(count / PAGE_SIZE),
+        function (next) { showIssues(label, start, count, next); });
+}
+
+renderSummary();
+showPrograms(0);
+if (DATA.issueCount) showIssues("tous les programmes", 0, DATA.issueCount, 0);
+</script>
+</body>
+</html>
+""")
+
+
+def _json(value: Any) -> str:
+    """Sérialise une valeur JSON compacte, sans '<' (incluse dans une balise script)."""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).replace('<', '\\u003c')
+
+
+class HtmlDashboard:
+    """Écrit le tableau de bord HTML d'un portefeuille dans un répertoire.
+
+    Les problèmes sont reçus au fil de l'audit (`write_issues`, utilisable
+    comme `issue_sink` de `PortfolioAuditor`) et écrits par fragments de
+    `shard_size` dans `issues/shard-NNNNN.js`. La page `index.html`,
+    écrite par `finish`, ne contient que la synthèse (notes, scores par
+    programme, comptes par règle) : elle s'ouvre immédiatement, et charge
+    un fragment seulement quand la page de problèmes affichée le demande.
+
+    Les fragments sont des scripts appelant `COBOL_AUDIT_SHARD(n, [...])`
+    plutôt que des fichiers .json : le navigateur peut les charger depuis
+    le disque (file://), où les requêtes fetch sont refusées.
+    """
+
+    def __init__(self, directory: str, shard_size: int = DEFAULT_SHARD_SIZE,
+                 source_path: Optional[str] = None):
+        if shard_size < 1:
+            raise ValueError("La taille des fragments doit être positive")
+        self.directory = directory
+        self.shard_size = shard_size
+        self.shard_count = 0
+        self.issue_count = 0
+        shard_directory = os.path.join(directory, SHARD_DIRECTORY)
+        os.makedirs(shard_directory, exist_ok=True)
+        # Les fragments d'un tableau de bord précédent ne sont plus référencés
+        for stale in glob.glob(os.path.join(shard_directory, 'shard-*.js')):
+            os.remove(stale)
+        self._rows: List[list] = []
+        # Par programme : [identifiant, premier problème, nombre de problèmes]
+        self._programs: Dict[str, List[int]] = {}
+        # Par règle : nombre de problèmes par sévérité (INFO, WARNING, ERROR)
+        self._rules: Dict[str, List[int]] = {}
+        # Texte des lignes signalées ; `source_path` sert aux problèmes sans fichier
+        self._resolver = LineResolver(source_path)
+
+    def _program(self, file_path: str) -> List[int]:
+        program = self._programs.get(file_path)
+        if program is None:
+            program = self._programs[file_path] = [len(self._programs), self.issue_count, 0]
+        return program
+
+    def write_issues(self, issues: Iterable[Issue], file_path: Optional[str] = None) -> None:
+        """Ajoute des problèmes au tableau de bord, groupés par fichier.
+
+        Les problèmes d'un même fichier doivent être transmis ensemble :
+        chaque programme occupe une plage continue de la numérotation.
+        """
+        current, program = None, None
+        for issue in issues:
+            if issue.file != current or program is None:
+                current = issue.file
+                program = self._program(current or file_path)
+            program[2] += 1
+            counts = self._rules.get(issue.rule)
+            if counts is None:
+                counts = self._rules[issue.rule] = [0, 0, 0]
+            counts[issue.severity - Severity.INFO] += 1
+            self._rows.append([program[0], issue.line_number, int(issue.severity), issue.rule,
+                               issue.message, self._resolver.text(issue)])
+            self.issue_count += 1
+            if len(self._rows) == self.shard_size:
+                self._flush_shard()
+
+    def _flush_shard(self) -> None:
+        if not self._rows:
+            return
+        path = os.path.join(self.directory, SHARD_DIRECTORY, f'shard-{self.shard_count:05d}.js')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'{SHARD_CALLBACK}({self.shard_count},{_json(self._rows)});\n')
+        self.shard_count += 1
+        self._rows = []
+
+    def finish(self, results: Dict[str, Any], file_path: str) -> str:
+        """Écrit les derniers problèmes et la page de synthèse ; retourne son chemin.
+
+        Les scores par programme sont ceux d'`AuditScorer`, calculés par
+        lots (`MetricMatrix`) à partir de l'entrée 'files' du résultat ;
+        un résultat d'un seul fichier est traité comme un portefeuille
+        d'un programme.
+        """
+        self._flush_shard()
+        self._resolver.close()
+        files = results.get('files')
+        if files is None:
+            files = [{'file': file_path, 'metrics': results['metrics']}]
+        for entry in files:
+            self._program(entry['file'])
+        scores = MetricMatrix.from_results(files).score()
+
+        programs: List[list] = [None] * len(self._programs)
+        for file, (identifier, start, count) in self._programs.items():
+            programs[identifier] = [file, None, None, count, start]
+        for entry, score, grade in zip(files, scores.scores, scores.grades()):
+            program = programs[self._programs[entry['file']][0]]
+            program[1] = round(float(score), 2)
+            program[2] = grade
+        summary = scores.summary(worst=0)
+
+        data = {
+            'callback': SHARD_CALLBACK,
+            'shardDirectory': SHARD_DIRECTORY,
+            'shardSize': self.shard_size,
+            'issueCount': self.issue_count,
+            'errors': len(results.get('errors', [])),
+            'grades': summary['grades'],
+            'percentiles': summary['percentiles'],
+            'rules': sorted(self._rules.items(), key=lambda item: -sum(item[1])),
+            'programs': programs
+        }
+        title = f"Audit COBOL - {os.path.basename(os.path.normpath(file_path))}"
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(PAGE_TEMPLATE.substitute(title=html.escape(title), data=_json(data)))
+        return path
+
+    @classmethod
+    def write(cls, results: Dict[str, Any], file_path: str, directory: str,
+              shard_size: int = DEFAULT_SHARD_SIZE) -> str:
+        """Écrit le tableau de bord d'un résultat déjà complet ; retourne le chemin de la page."""
+        dashboard = cls(directory, shard_size, source_path=file_path)
+        dashboard.write_issues(results['issues'], file_path)
+        return dashboard.finish(results, file_path)
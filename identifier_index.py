@@ -0,0 +1,69 @@
+"""
+Index des occurrences d'identifiants COBOL.
+"""
+from array import array
+from typing import List, Dict, Iterable
+from lexer import WORD, tokenize
+
+
+def tokenize_words(line: str) -> List[str]:
+    """Découpe une ligne en mots COBOL (en majuscules).
+
+    Les nombres et les littéraux sont ignorés : ils ne peuvent pas être
+    des identifiants.
+    """
+    kinds, values = tokenize(line)
+    return [value for kind, value in zip(kinds, values) if kind == WORD]
+
+
+class IdentifierIndex:
+    """Associe chaque identifiant aux numéros des lignes où il apparaît.
+
+    Chaque ligne n'est découpée qu'une seule fois ; les requêtes
+    (comptage, variables inutilisées, références croisées) sont ensuite
+    de simples accès au dictionnaire. Les numéros de ligne sont stockés
+    dans des tableaux compacts pour borner la mémoire en mode flux.
+    """
+
+    def __init__(self):
+        self.occurrences: Dict[str, array] = {}
+
+    def add_line(self, line_number: int, line: str) -> None:
+        """Indexe les mots d'une ligne (une seule occurrence par ligne)."""
+        self.add_words(line_number, tokenize_words(line))
+
+    def add_words(self, line_number: int, words: Iterable[str]) -> None:
+        """Indexe les mots déjà découpés d'une ligne (voir `lexer.tokenize`)."""
+        occurrences = self.occurrences
+        for word in set(words):
+            lines = occurrences.get(word)
+            if lines is None:
+                occurrences[word] = array('I', (line_number,))
+            else:
+                lines.append(line_number)
+
+    def add_lines(self, lines: Iterable[str]) -> 'IdentifierIndex':
+        """Indexe une suite de lignes numérotées à partir de 0."""
+        for line_number, line in enumerate(lines):
+            self.add_line(line_number, line)
+        return self
+
+    def lines_of(self, name: str) -> List[int]:
+        """Retourne les lignes où apparaît un identifiant."""
+        return list(self.occurrences.get(name.upper(), ()))
+
+    def count(self, name: str) -> int:
+        """Retourne le nombre de lignes où apparaît un identifiant."""
+        return len(self.occurrences.get(name.upper(), ()))
+
+    def usage(self, names: Iterable[str]) -> Dict[str, int]:
+        """Retourne le nombre de lignes utilisant chacun des identifiants."""
+        return {name: self.count(name) for name in names}
+
+    def unused(self, names: Iterable[str]) -> List[str]:
+        """Retourne les identifiants jamais référencés."""
+        return [name for name in names if name.upper() not in self.occurrences]
+
+    def cross_reference(self, names: Iterable[str]) -> Dict[str, List[int]]:
+        """Retourne, pour chaque identifiant, ses lignes de référence."""
+        return {name: self.lines_of(name) for name in names}
@@ -0,0 +1,145 @@
+"""
+Représentation compacte des problèmes détectés.
+"""
+import sys
+from enum import IntEnum
+from typing import List, Dict, Any, Optional
+from lexer import logical_lines
+from source_buffer import SourceBuffer
+
+
+class Severity(IntEnum):
+    """Sévérité d'un problème (ordonnée : INFO < WARNING < ERROR)."""
+    INFO = 1
+    WARNING = 2
+    ERROR = 3
+
+
+class Issue:
+    """Problème détecté, sans copie du texte de la ligne source.
+
+    Le texte n'est relu qu'à la demande, par les exporteurs, à partir du
+    numéro de ligne (voir `LineResolver`). L'accès par clé (`issue['type']`,
+    `issue.get('line_number')`) reste possible pour les consommateurs qui
+    manipulaient les anciens dictionnaires.
+    """
+
+    __slots__ = ('rule', 'severity', 'message', 'line_number', 'column_start', 'column_end', 'file')
+
+    def __init__(self, rule: str, severity: Severity, message: str,
+                 line_number: Optional[int] = None, column_start: Optional[int] = None,
+                 column_end: Optional[int] = None, file: Optional[str] = None):
+        self.rule = sys.intern(rule)
+        self.severity = severity
+        self.message = message
+        self.line_number = line_number
+        self.column_start = column_start
+        self.column_end = column_end
+        self.file = file
+
+    _FIELDS = {
+        'type': lambda issue: issue.rule,
+        'severity': lambda issue: issue.severity.name,
+        'message': lambda issue: issue.message,
+        'line_number': lambda issue: issue.line_number,
+        'file': lambda issue: issue.file,
+    }
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Accès par clé, comme sur les anciens dictionnaires de problèmes."""
+        field = self._FIELDS.get(key)
+        value = field(self) if field else None
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Issue):
+            return NotImplemented
+        return self.to_record() == other.to_record() and self.file == other.file
+
+    def __repr__(self) -> str:
+        return f"Issue({self.rule!r}, {self.severity.name}, {self.message!r}, line={self.line_number})"
+
+    def to_record(self) -> list:
+        """Forme sérialisable compacte (cache, échanges entre processus)."""
+        return [self.rule, int(self.severity), self.message,
+                self.line_number, self.column_start, self.column_end]
+
+    @classmethod
+    def from_record(cls, record: list) -> 'Issue':
+        """Reconstruit un problème depuis sa forme compacte."""
+        rule, severity, message, line_number, column_start, column_end = record
+        return cls(rule, Severity(severity), message, line_number, column_start, column_end)
+
+    def to_dict(self, text: Optional[str] = None) -> Dict[str, Any]:
+        """Retourne la forme dictionnaire exportée, avec le texte si fourni."""
+        data = {
+            'severity': self.severity.name,
+            'message': self.message,
+            'type': self.rule,
+            'line': text if text is not None else 'N/A'
+        }
+        if self.line_number is not None:
+            data['line_number'] = self.line_number
+        if self.file is not None:
+            data['file'] = self.file
+        return data
+
+
+def severity_counts(issues: List[Issue]) -> Dict[str, int]:
+    """Compte les problèmes par sévérité."""
+    counts = {severity.name: 0 for severity in sorted(Severity, reverse=True)}
+    for issue in issues:
+        counts[issue.severity.name] += 1
+    return counts
+
+
+class LineResolver:
+    """Relit à la demande le texte des lignes signalées par les problèmes.
+
+    Le fichier source est projeté en mémoire (SourceBuffer) ; un seul
+    fichier est ouvert à la fois, les problèmes d'un portefeuille étant
+    regroupés par fichier.
+    """
+
+    def __init__(self, default_path: Optional[str] = None):
+        self.default_path = default_path
+        self._path = None
+        self._buffer = None
+
+    def text(self, issue: Issue) -> Optional[str]:
+        """Retourne le code de la ligne d'un problème, tel que l'ont vu les règles.
+
+        Comme pour l'analyse, le format du source est respecté : en format
+        fixe, la numérotation, la zone d'identification et les
+        commentaires sont retirés. Une ligne de commentaire donne None.
+        """
+        path = issue.file or self.default_path
+        if issue.line_number is None or path is None:
+            return None
+        if path != self._path:
+            self.close()
+            self._path = path
+            try:
+                self._buffer = SourceBuffer(path)
+            except (OSError, ValueError):
+                self._buffer = None
+        if self._buffer is None or not 0 < issue.line_number <= len(self._buffer):
+            return None
+        line = ((issue.line_number, self._buffer.line(issue.line_number)),)
+        return next(logical_lines(line, self._buffer.source_format), (None, None))[1]
+
+    def close(self) -> None:
+        """Ferme le fichier source courant."""
+        if self._buffer is not None:
+            self._buffer.close()
+        self._path = None
+        self._buffer = None
@@ -0,0 +1,351 @@
+"""
+Analyse lexicale du source COBOL : format fixe ou libre, commentaires,
+lignes de suite, littéraux, et table compacte des jetons.
+"""
+import re
+import sys
+from array import array
+from itertools import chain, compress, count, islice
+from operator import itemgetter, not_, sub
+from typing import List, Iterable, Iterator, Optional, Sequence, Tuple
+
+# Formats de référence du source
+AUTO = 'auto'
+FIXED = 'fixed'
+FREE = 'free'
+SOURCE_FORMATS = (AUTO, FIXED, FREE)
+
+# Format fixe : numérotation (colonnes 1-6), indicateur (7), zones A et B (8-72),
+# identification (73-80, ignorée)
+INDICATOR_COLUMN = 6
+CODE_END_COLUMN = 72
+FIXED_INDICATORS = frozenset(' *-/Dd')
+# Commentaire (*, /) ou ligne de débogage (D), ignorée hors WITH DEBUGGING MODE
+SKIPPED_INDICATORS = frozenset('*/Dd')
+CONTINUATION_INDICATOR = '-'
+
+# Commentaire en fin de ligne (COBOL 2002, les deux formats)
+INLINE_COMMENT = '*>'
+
+# Lignes examinées pour reconnaître le format d'un source
+DETECTION_LINES = 50
+
+# Types de jeton (codes du tableau `TokenTable.kinds`)
+WORD = 1
+NUMBER = 2
+STRING = 3
+PERIOD = 4
+SYMBOL = 5
+PSEUDO_TEXT = 6
+# Fin de ligne, dans le découpage d'un bloc de lignes (jamais stocké)
+_LINE_END = 0
+
+# Jetons d'une ligne mise en majuscules ; l'ordre des alternatives suit
+# leur fréquence, le type est ensuite déduit de la valeur (`_KindTable`).
+# Aucun jeton ne franchit une fin de ligne, qui est elle-même un jeton :
+# un bloc de lignes se découpe d'un seul appel (`TokenTable.extend`).
+TOKEN_PATTERN = re.compile(
+    # Littéral préfixé (X'41', N"...")
+    r'''[XNGZB](?:"(?:[^"\n]|"")*"?|'(?:[^'\n]|'')*'?)'''
+    r'|\d+\.\d+'
+    # Mot COBOL (ou entier) : lettres, chiffres et tirets, sans tiret aux extrémités
+    r'|[A-Z0-9]+(?:-+[A-Z0-9]+)*'
+    # Littéral alphanumérique, éventuellement non terminé
+    r'''|"(?:[^"\n]|"")*"?|'(?:[^'\n]|'')*'?'''
+    r'|==.*?=='
+    r'|\*\*|>=|<=|<>|\n|[^\s\w]'
+)
+
+# Nombre de types de jeton gardés en mémoire avant de vider la table
+KIND_CACHE_SIZE = 100_000
+
+
+class _KindTable(dict):
+    """Type de chaque valeur de jeton, calculé à la première rencontre.
+
+    Les valeurs se répètent d'une ligne à l'autre (mots réservés,
+    identifiants) : le type d'une valeur déjà vue s'obtient par une
+    seule recherche dans le dictionnaire.
+    """
+
+    def __missing__(self, value: str) -> int:
+        first = value[0]
+        if first == '\n':
+            kind = _LINE_END
+        elif 'A' <= first <= 'Z':
+            # Littéral préfixé (X'41') ou mot
+            kind = STRING if value[1:2] in ('"', "'") else WORD
+        elif '0' <= first <= '9':
+            # Mot commençant par un chiffre (1ST-PARA) ou nombre
+            kind = NUMBER if value.replace('.', '', 1).isdigit() else WORD
+        elif first == '"' or first == "'":
+            kind = STRING
+        elif first == '.':
+            kind = PERIOD
+        elif value[:2] == '==':
+            kind = PSEUDO_TEXT
+        else:
+            kind = SYMBOL
+        if len(self) >= KIND_CACHE_SIZE:
+            self.clear()
+        self[value] = kind
+        return kind
+
+
+_kind_of = _KindTable().__getitem__
+
+# Littéral, pour le masquage de son contenu (graphe de flot de contrôle)
+LITERAL_PATTERN = re.compile(r'''"(?:[^"]|"")*"?|'(?:[^']|'')*'?''')
+
+# Deux chiffres consécutifs ou plus (nombre magique)
+DIGITS_PATTERN = re.compile(r'\d{2,}')
+
+
+def _is_fixed(line: str) -> bool:
+    """Indique si une ligne non vide porte un indicateur valide en colonne 7.
+
+    Le contenu des colonnes 1 à 6 est libre en format fixe (numéros de
+    séquence, marques de modification comme CHG001) : il n'est pas examiné.
+    """
+    return len(line) > INDICATOR_COLUMN and line[INDICATOR_COLUMN] in FIXED_INDICATORS
+
+
+def detect_format(lines: Iterable[str]) -> str:
+    """Reconnaît le format d'un source d'après ses premières lignes non vides.
+
+    Le format est fixe si la majorité d'entre elles ont un indicateur
+    valide en colonne 7, libre sinon : une ligne isolée ne fait pas
+    basculer tout le fichier.
+    """
+    sample = [line.rstrip('\r\n') for line in lines if line.strip()]
+    fixed = sum(1 for line in sample if _is_fixed(line))
+    return FIXED if fixed * 2 > len(sample) else FREE
+
+
+def _open_quote(text: str) -> Optional[str]:
+    """Retourne le délimiteur d'un littéral resté ouvert en fin de texte."""
+    quote = None
+    for char in text:
+        if quote is None:
+            if char == '"' or char == "'":
+                quote = char
+        elif char == quote:
+            quote = None
+    return quote
+
+
+def strip_inline_comment(code: str) -> str:
+    """Retire un commentaire de fin de ligne (*>) situé hors des littéraux."""
+    position = code.find(INLINE_COMMENT)
+    while position >= 0:
+        if _open_quote(code[:position]) is None:
+            return code[:position]
+        position = code.find(INLINE_COMMENT, position + 2)
+    return code
+
+
+def logical_lines(numbered: Iterable[Tuple[int, str]],
+                  source_format: str = AUTO) -> Iterator[Tuple[int, str]]:
+    """Produit les lignes de code (numéro, texte sans espaces de bord).
+
+    Les lignes vides et les commentaires sont écartés. En format fixe, la
+    zone de numérotation et la zone d'identification sont ignorées, et
+    une ligne de suite (indicateur « - ») est jointe à la ligne qu'elle
+    prolonge, sous le numéro de celle-ci : un littéral non terminé
+    reprend après le délimiteur ouvrant de la suite, un mot coupé se
+    poursuit sans espace. Le format est reconnu sur les premières
+    lignes si `source_format` vaut AUTO.
+    """
+    if source_format not in SOURCE_FORMATS:
+        raise ValueError(f"Format de source inconnu: {source_format}")
+    numbered = iter(numbered)
+    if source_format == AUTO:
+        head = list(islice(numbered, DETECTION_LINES))
+        source_format = detect_format(line for _, line in head)
+        numbered = chain(head, numbered)
+    if source_format == FREE:
+        return _free_lines(numbered)
+    return _fixed_lines(numbered)
+
+
+def _free_lines(numbered: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+    for line_number, line in numbered:
+        line = line.strip()
+        # Une ligne commençant par * (dont *>) est un commentaire
+        if not line or line[0] == '*':
+            continue
+        if INLINE_COMMENT in line:
+            line = strip_inline_comment(line).rstrip()
+            if not line:
+                continue
+        yield line_number, line
+
+
+def _fixed_lines(numbered: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+    pending_number = None
+    pending = ''
+    # Longueur de la zone de code et du dernier segment physique joint
+    width = CODE_END_COLUMN - INDICATOR_COLUMN - 1
+    segment = 0
+    for line_number, line in numbered:
+        line = line.rstrip('\r\n')
+        if len(line) <= INDICATOR_COLUMN:
+            continue
+        indicator = line[INDICATOR_COLUMN]
+        if indicator in SKIPPED_INDICATORS:
+            continue
+        code = line[INDICATOR_COLUMN + 1:CODE_END_COLUMN]
+        if INLINE_COMMENT in code:
+            code = strip_inline_comment(code)
+        if indicator == CONTINUATION_INDICATOR and pending_number is not None:
+            content = code.lstrip()
+            quote = _open_quote(pending)
+            if quote is not None and content[:1] == quote:
+                # Le littéral se poursuit jusqu'à la colonne 72 de la ligne prolongée
+                pending += ' ' * (width - segment) + content[1:]
+            else:
+                pending = pending.rstrip() + content
+            segment = len(code)
+            continue
+        if pending_number is not None:
+            text = pending.strip()
+            if text:
+                yield pending_number, text
+        pending_number, pending = line_number, code
+        segment = len(code)
+    if pending_number is not None:
+        text = pending.strip()
+        if text:
+            yield pending_number, text
+
+
+def tokenize(text: str) -> Tuple[bytearray, List[str]]:
+    """Découpe une ligne de code en jetons : (types, valeurs).
+
+    Les valeurs sont en majuscules, littéraux compris (leur casse
+    d'origine reste dans le texte de la ligne), et internées. Les
+    littéraux gardent leurs délimiteurs : aucun ne peut être pris pour
+    un mot.
+    """
+    text = text.upper()
+    values = list(map(sys.intern, TOKEN_PATTERN.findall(text)))
+    return bytearray(map(_kind_of, values)), values
+
+
+def _mask(match: re.Match) -> str:
+    literal = match.group()
+    if len(literal) > 1 and literal[-1] == literal[0]:
+        return literal[0] + 'X' * (len(literal) - 2) + literal[-1]
+    # Littéral non terminé : masqué jusqu'en fin de ligne
+    return literal[0] + 'X' * (len(literal) - 1)
+
+
+def mask_literals(text: str) -> str:
+    """Remplace le contenu des littéraux par des X (longueur conservée)."""
+    if '"' not in text and "'" not in text:
+        return text
+    return LITERAL_PATTERN.sub(_mask, text)
+
+
+def has_magic_number(kinds: Sequence[int], values: Sequence[str]) -> bool:
+    """Indique si une ligne contient un nombre d'au moins deux chiffres.
+
+    Une ligne commençant par un numéro de niveau (01, 05...) est ignorée.
+    """
+    if NUMBER not in kinds or (len(kinds) > 1 and kinds[0] == NUMBER and len(values[0]) == 2):
+        return False
+    for kind, value in zip(kinds, values):
+        if kind == NUMBER and (len(value) > 1 if '.' not in value else DIGITS_PATTERN.search(value)):
+            return True
+    return False
+
+
+class TokenLine:
+    """Jetons de la ligne en cours, partagés par les vérifications d'un moteur.
+
+    Le moteur de règles (`RuleEngine`) met à jour une seule instance à
+    chaque ligne ; une vérification y accède par `LineCheck.tokens`.
+    """
+
+    __slots__ = ('text', 'kinds', 'values', '_masked')
+
+    def __init__(self):
+        self.set('', (), ())
+
+    def set(self, text: str, kinds: Sequence[int], values: Sequence[str]) -> None:
+        self.text = text
+        self.kinds = kinds
+        self.values = values
+        self._masked = None
+
+    def words(self) -> List[str]:
+        """Retourne les mots de la ligne (hors littéraux et nombres)."""
+        return [value for kind, value in zip(self.kinds, self.values) if kind == WORD]
+
+    def masked(self) -> str:
+        """Retourne le texte de la ligne, contenu des littéraux masqué."""
+        if self._masked is None:
+            self._masked = mask_literals(self.text) if STRING in self.kinds else self.text
+        return self._masked
+
+
+class TokenTable:
+    """Table compacte des jetons d'une suite de lignes de code.
+
+    Les types sont stockés dans un tableau d'octets et les valeurs (mots
+    internés) dans une liste ; `line_starts` donne l'index du premier
+    jeton de chaque ligne et `line_numbers` son numéro dans le source.
+    """
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.values: List[str] = []
+        self.line_starts = array('I')
+        self.line_numbers = array('I')
+
+    def __len__(self) -> int:
+        return len(self.line_starts)
+
+    def append(self, line_number: int, text: str) -> None:
+        """Découpe une ligne et ajoute ses jetons à la table."""
+        kinds, values = tokenize(text)
+        self.line_starts.append(len(self.values))
+        self.line_numbers.append(line_number)
+        self.kinds.frombytes(kinds)
+        self.values.extend(values)
+
+    def extend(self, line_numbers: Sequence[int], lines: Sequence[str]) -> None:
+        """Découpe d'un seul appel une suite de lignes et ajoute leurs jetons à la table.
+
+        Les lignes sont jointes puis découpées ensemble : le coût par ligne
+        se limite au travail de l'expression régulière.
+        """
+        if not lines:
+            return
+        text = '\n'.join(lines).upper()
+        values = list(map(sys.intern, TOKEN_PATTERN.findall(text)))
+        kinds = bytearray(map(_kind_of, values))
+        # Position des fins de ligne parmi les jetons, puis début de chaque
+        # ligne suivante une fois les fins de ligne retirées
+        ends = compress(count(), map(not_, kinds))
+        self.line_starts.append(len(self.values))
+        self.line_starts.extend(map(sub, ends, count(-len(self.values))))
+        self.line_numbers.extend(line_numbers)
+        self.kinds.frombytes(kinds.replace(bytes((_LINE_END,)), b''))
+        self.values.extend(compress(values, kinds))
+
+    def line(self, index: int) -> Tuple[array, List[str]]:
+        """Retourne les jetons (types, valeurs) de la ligne d'index `index`."""
+        start = self.line_starts[index]
+        end = self.line_starts[index + 1] if index + 1 < len(self.line_starts) else len(self.values)
+        return self.kinds[start:end], self.values[start:end]
+
+    def iter_lines(self) -> Iterator[Tuple[array, List[str]]]:
+        """Produit les jetons de chaque ligne, dans l'ordre."""
+        kinds, values = self.kinds, self.values
+        starts = self.line_starts
+        count = len(starts)
+        for index in range(count):
+            start = starts[index]
+            end = starts[index + 1] if index + 1 < count else len(values)
+            yield kinds[start:end], values[start:end]
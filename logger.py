@@ -1,44 +1,178 @@
 """
 Configuration des logs pour l'outil d'audit COBOL.
+
+L'import ne crée ni dossier ni fichier : seuls les avertissements et
+erreurs sont affichés sur la console, et le fichier de log n'est ouvert
+que sur demande (`enable_file_logging`, option --log-file de la CLI).
+
+Avec un fichier de log, l'écriture sur disque est faite par un thread
+d'écoute (`QueueListener`) : le code analysé ne fait que déposer ses
+enregistrements dans une file. Les workers d'un audit de portefeuille
+déposent les leurs dans une file inter-processus relayée par le
+processus parent, qui tient un seul fichier pour tout le lot.
 """
+import atexit
 import logging
 import os
-from datetime import datetime
+from typing import Optional
+
+# Fichier de log par défaut, avec rotation
+LOG_DIR = 'logs'
+LOG_FILE = os.path.join(LOG_DIR, 'cobol_audit.log')
+
+# Rotation par taille : taille maximale d'un fichier et nombre d'archives
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+
+# Rotation dans le temps (option --log-rotate) -> paramètre `when` de logging
+ROTATIONS = {'size': None, 'daily': 'midnight', 'hourly': 'H'}
+
+_FILE_FORMAT = '%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+
+# Handlers de sortie, file et threads d'écoute (QueueListener) du processus
+# courant ; logging.handlers n'est importé que si un fichier est demandé
+_console_handler: Optional[logging.Handler] = None
+_file_handler: Optional[logging.Handler] = None
+_queue_handler: Optional[logging.Handler] = None
+_listener = None
+_worker_listener = None
+
 
 def setup_logger(log_level=logging.INFO):
-    """Configure le logger principal de l'application."""
-    # Crée le dossier logs s'il n'existe pas
-    log_dir = 'logs'
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
-    # Nom du fichier de log avec la date
-    log_file = os.path.join(
-        log_dir, 
-        f'cobol_audit_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log'
-    )
-
-    # Configuration du logger
+    """Configure le logger principal de l'application (console seulement)."""
+    global _console_handler
     logger = logging.getLogger('cobol_audit')
+    if _console_handler is None:
+        # Handler pour console
+        _console_handler = logging.StreamHandler()
+        _console_handler.setLevel(logging.WARNING)  # Warnings et erreurs seulement
+        console_format = logging.Formatter('%(levelname)s: %(message)s')
+        _console_handler.setFormatter(console_format)
+        logger.addHandler(_console_handler)
+    set_level(log_level, logger)
+    return logger
+
+
+def _rotating_handler(log_file: str, rotation: str, max_bytes: int,
+                      backup_count: int) -> logging.Handler:
+    """Crée le handler fichier avec la rotation demandée (taille ou période)."""
+    from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+    if rotation not in ROTATIONS:
+        raise ValueError(f"Rotation de log inconnue: {rotation}")
+    when = ROTATIONS[rotation]
+    if when is None:
+        return RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+    return TimedRotatingFileHandler(
+        log_file, when=when, backupCount=backup_count, encoding='utf-8')
+
+
+def enable_file_logging(log_file: Optional[str] = None, log_level=logging.INFO,
+                        rotation: str = 'size', max_bytes: int = DEFAULT_MAX_BYTES,
+                        backup_count: int = DEFAULT_BACKUP_COUNT) -> str:
+    """Écrit les logs dans un fichier tournant, via une file et un thread d'écoute.
+
+    Un seul fichier est ouvert par processus : un second appel ne fait
+    qu'ajuster le niveau. Retourne le chemin du fichier de log.
+    """
+    global _file_handler, _queue_handler, _listener
+    if _file_handler is not None:
+        set_level(log_level)
+        return _file_handler.baseFilename
+
+    log_file = log_file or LOG_FILE
+    log_dir = os.path.dirname(log_file)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    _file_handler = _rotating_handler(log_file, rotation, max_bytes, backup_count)
+    _file_handler.setFormatter(logging.Formatter(_FILE_FORMAT))
+
+    from logging.handlers import QueueHandler, QueueListener
+    import queue
+    records = queue.SimpleQueue()
+    _listener = QueueListener(records, _file_handler, respect_handler_level=True)
+    _listener.start()
+    _queue_handler = QueueHandler(records)
+    logger.addHandler(_queue_handler)
+    set_level(log_level)
+    return _file_handler.baseFilename
+
+
+def start_worker_logging():
+    """Ouvre la file inter-processus des workers (None sans fichier de log).
+
+    Les enregistrements qui y sont déposés sont écrits par le parent, dans
+    son fichier de log et sur sa console, jusqu'à `stop_worker_logging`.
+    """
+    global _worker_listener
+    if _file_handler is None:
+        return None
+    if _worker_listener is None:
+        from logging.handlers import QueueListener
+        import multiprocessing
+        _worker_listener = QueueListener(
+            multiprocessing.Queue(), _console_handler, _file_handler, respect_handler_level=True)
+        _worker_listener.start()
+    return _worker_listener.queue
+
+
+def stop_worker_logging() -> None:
+    """Écrit les derniers enregistrements des workers puis ferme leur file."""
+    global _worker_listener
+    if _worker_listener is not None:
+        _worker_listener.stop()
+        _worker_listener.queue.close()
+        _worker_listener = None
+
+
+def init_worker_logging(log_queue, log_level) -> None:
+    """Initialise le logger d'un worker : tout part vers la file du parent.
+
+    Sert d'`initializer` au pool de processus ; les handlers hérités du
+    parent (fork) sont retirés pour ne pas écrire deux fois.
+    """
+    from logging.handlers import QueueHandler
+    global _console_handler, _file_handler, _queue_handler, _listener, _worker_listener
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    # Les threads d'écoute du parent n'existent pas dans le worker
+    _console_handler = _file_handler = _listener = _worker_listener = None
+    _queue_handler = QueueHandler(log_queue)
+    logger.addHandler(_queue_handler)
     logger.setLevel(log_level)
 
-    # Handler pour fichier
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(log_level)
-    file_format = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    file_handler.setFormatter(file_format)
-    logger.addHandler(file_handler)
-
-    # Handler pour console
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.WARNING)  # Warnings et erreurs seulement
-    console_format = logging.Formatter('%(levelname)s: %(message)s')
-    console_handler.setFormatter(console_format)
-    logger.addHandler(console_handler)
 
-    return logger
+def set_level(log_level, target: Optional[logging.Logger] = None) -> None:
+    """Applique le niveau de log demandé.
+
+    Sans fichier de log, seule la console (WARNING et au-delà) reçoit les
+    messages : le logger est alors relevé à WARNING pour que les messages
+    d'information ne soient même pas construits en enregistrements.
+    """
+    target = target or logger
+    level = logging.getLevelName(log_level) if isinstance(log_level, str) else log_level
+    if _file_handler is not None:
+        _file_handler.setLevel(level)
+        target.setLevel(level)
+    else:
+        target.setLevel(max(level, logging.WARNING))
+
+
+@atexit.register
+def shutdown_logging() -> None:
+    """Vide les files, arrête les threads d'écoute et ferme le fichier de log."""
+    global _file_handler, _queue_handler, _listener
+    stop_worker_logging()
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logger.removeHandler(_queue_handler)
+        _queue_handler = None
+    if _file_handler is not None:
+        _file_handler.close()
+        _file_handler = None
+
 
 # Logger global
-logger = setup_logger() 
\ No newline at end of file
+logger = setup_logger()
@@ -0,0 +1,157 @@
+"""
+Écriture incrémentale de documents PDF texte (sans dépendance externe).
+"""
+import textwrap
+import zlib
+from array import array
+from typing import BinaryIO, List, Optional
+
+# Format A4 en points, marges et pied de page
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 50
+FOOTER_SIZE = 8
+
+# Corps du texte : taille de police et interligne (en points)
+BODY_SIZE = 10
+LEADING = 1.3
+
+# Tailles des titres, par niveau
+HEADING_SIZES = {1: 18, 2: 14, 3: 11}
+
+# Largeur moyenne d'un caractère Helvetica, en fraction de la taille de police
+AVERAGE_CHAR_WIDTH = 0.5
+
+# Polices standard (aucune police à embarquer) et encodage du texte
+FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold'}
+TEXT_ENCODING = 'cp1252'
+
+# Objets réservés : catalogue, arbre des pages (écrit en dernier), polices
+_CATALOG, _PAGES, _FIRST_FONT = 1, 2, 3
+
+
+def _escape(text: str) -> bytes:
+    """Encode une chaîne littérale PDF (WinAnsi, caractères inconnus remplacés)."""
+    data = text.encode(TEXT_ENCODING, errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class PdfWriter:
+    """Écrit un document PDF dans un flux binaire, page par page.
+
+    Chaque page est écrite dans le flux dès qu'elle est pleine : seuls
+    son contenu et la table des positions des objets (un entier par
+    objet) sont gardés en mémoire, quelle que soit la longueur du
+    document. L'arbre des pages et la table de références croisées sont
+    écrits par `close`.
+    """
+
+    def __init__(self, stream: BinaryIO, title: Optional[str] = None):
+        self.stream = stream
+        self.title = title
+        self.page_count = 0
+        self._position = 0
+        # Position de chaque objet dans le flux (index = numéro - 1)
+        self._offsets = array('Q', bytes(8 * (_FIRST_FONT - 1 + len(FONTS))))
+        self._page_objects = array('I')
+        self._content: List[bytes] = []
+        self._y = 0.0
+        self.closed = False
+        self._write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        self._write_object(_CATALOG, b'<< /Type /Catalog /Pages 2 0 R >>')
+        for number, font in enumerate(FONTS.values(), _FIRST_FONT):
+            self._write_object(number, b'<< /Type /Font /Subtype /Type1 /BaseFont /' + font.encode('ascii')
+                               + b' /Encoding /WinAnsiEncoding >>')
+
+    def __enter__(self) -> 'PdfWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write(self, data: bytes) -> None:
+        self.stream.write(data)
+        self._position += len(data)
+
+    def _new_object(self) -> int:
+        self._offsets.append(0)
+        return len(self._offsets)
+
+    def _write_object(self, number: int, body: bytes) -> None:
+        self._offsets[number - 1] = self._position
+        self._write(b'%d 0 obj\n' % number + body + b'\nendobj\n')
+
+    def heading(self, text: str, level: int = 1) -> None:
+        """Ajoute un titre (niveaux 1 à 3), précédé d'un espace."""
+        size = HEADING_SIZES.get(level, BODY_SIZE)
+        self.space(size * 0.6)
+        self._lines(text, 'F2', size, 0)
+
+    def text(self, text: str, indent: int = 0, bold: bool = False) -> None:
+        """Ajoute un paragraphe, coupé à la largeur de la page."""
+        self._lines(text, 'F2' if bold else 'F1', BODY_SIZE, indent)
+
+    def space(self, height: float = BODY_SIZE * LEADING / 2) -> None:
+        """Ajoute un espace vertical (ignoré en haut de page)."""
+        if self._content and self._y - height > MARGIN:
+            self._y -= height
+
+    def _lines(self, text: str, font: str, size: float, indent: int) -> None:
+        x = MARGIN + indent
+        width = max(1, int((PAGE_WIDTH - MARGIN - x) / (size * AVERAGE_CHAR_WIDTH)))
+        leading = size * LEADING
+        lines = [text] if len(text) <= width else textwrap.wrap(text, width)
+        for line in lines:
+            if not self._content or self._y - leading < MARGIN:
+                self._start_page()
+            self._y -= leading
+            self._content.append(b'BT /%s %g Tf %g %.2f Td (%s) Tj ET\n'
+                                 % (font.encode('ascii'), size, x, self._y, _escape(line)))
+
+    def _start_page(self) -> None:
+        self._flush_page()
+        self.page_count += 1
+        self._y = PAGE_HEIGHT - MARGIN
+        footer = f'{self.title} - page {self.page_count}' if self.title else f'Page {self.page_count}'
+        self._content.append(b'BT /F1 %d Tf %d %d Td (%s) Tj ET\n'
+                             % (FOOTER_SIZE, MARGIN, MARGIN // 2, _escape(footer)))
+
+    def _flush_page(self) -> None:
+        """Écrit la page en cours (contenu compressé, puis objet page)."""
+        if not self._content:
+            return
+        data = zlib.compress(b''.join(self._content))
+        self._content = []
+        content = self._new_object()
+        self._write_object(content, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(data)
+                           + data + b'\nendstream')
+        page = self._new_object()
+        fonts = b' '.join(b'/%s %d 0 R' % (name.encode('ascii'), number)
+                          for number, name in enumerate(FONTS, _FIRST_FONT))
+        self._write_object(page, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+                           b'/Resources << /Font << %s >> >> /Contents %d 0 R >>'
+                           % (PAGE_WIDTH, PAGE_HEIGHT, fonts, content))
+        self._page_objects.append(page)
+
+    def close(self) -> None:
+        """Termine le document : dernière page, arbre des pages, références croisées."""
+        if self.closed:
+            return
+        self.closed = True
+        if not self._content and not self.page_count:
+            self._start_page()
+        self._flush_page()
+        kids = b' '.join(b'%d 0 R' % number for number in self._page_objects)
+        self._write_object(_PAGES, b'<< /Type /Pages /Kids [%s] /Count %d >>'
+                           % (kids, len(self._page_objects)))
+        info = self._new_object()
+        title = b' /Title (%s)' % _escape(self.title) if self.title else b''
+        self._write_object(info, b'<< /Producer (COBOL Audit Tool)%s >>' % title)
+
+        xref = self._position
+        count = len(self._offsets) + 1
+        self._write(b'xref\n0 %d\n0000000000 65535 f \n' % count)
+        self._write(b''.join(b'%010d 00000 n \n' % offset for offset in self._offsets))
+        self._write(b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n'
+                    % (count, info, xref))
+        self.stream.flush()
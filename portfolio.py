@@ -0,0 +1,262 @@
+"""
+Audit parallèle d'un portefeuille de programmes COBOL.
+"""
+import fnmatch
+import os
+from functools import partial
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional
+from issues import Issue, Severity
+from call_graph import CallGraphIndex
+from warehouse import ResultWarehouse
+from baseline import BaselineFilter
+from result_cache import ResultCache
+from logger import logger, start_worker_logging, stop_worker_logging, init_worker_logging
+from profiling import profiler, merge_timings
+
+# Motifs de découverte par défaut (programmes et copybooks)
+DEFAULT_PATTERNS = ('*.cbl', '*.cob', '*.cpy')
+
+# Métriques agrégées par maximum plutôt que par somme
+MAX_METRICS = ('nested_conditions',)
+
+# Destinataire des problèmes d'un fichier, appelé dès la fin de son analyse
+IssueSink = Callable[[List[Issue]], None]
+
+
+def discover_cobol_files(root: str, patterns: Iterable[str] = DEFAULT_PATTERNS) -> List[str]:
+    """Retourne les fichiers COBOL d'une arborescence, triés par chemin.
+
+    La comparaison des motifs ignore la casse : les exports mainframe
+    utilisent souvent des extensions en majuscules (.CBL, .CPY).
+    """
+    patterns = [p.lower() for p in patterns]
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            lowered = name.lower()
+            if any(fnmatch.fnmatch(lowered, p) for p in patterns):
+                files.append(os.path.join(dirpath, name))
+    return files
+
+
+# Caches de résultats ouverts par le processus courant, par répertoire
+_worker_caches: Dict[str, ResultCache] = {}
+
+
+def _worker_cache(cache_dir: Optional[str]) -> Optional[ResultCache]:
+    """Retourne le cache de résultats du processus (une connexion par worker)."""
+    if cache_dir is None:
+        return None
+    if cache_dir not in _worker_caches:
+        _worker_caches[cache_dir] = ResultCache(cache_dir)
+    return _worker_caches[cache_dir]
+
+
+def analyze_one(file_path: str, copybook_paths: Optional[List[str]] = None,
+                cache_dir: Optional[str] = None, profile: bool = False,
+                rules: Optional[List[str]] = None, skip_rules: Optional[List[str]] = None,
+                **options) -> Dict[str, Any]:
+    """Analyse un fichier dans un worker et retourne un résultat sérialisable.
+
+    `rules` et `skip_rules` sélectionnent les vérifications du registre ;
+    les autres options sont transmises à `CobolAnalyzer.analyze_file`. Les
+    erreurs sont capturées par fichier pour qu'un membre invalide
+    n'interrompe pas l'audit du portefeuille. Avec `profile`, le temps
+    passé par étape et par règle est joint au résultat ('timings').
+    """
+    if not profile:
+        return _analyze_one(file_path, copybook_paths, cache_dir, rules, skip_rules, **options)
+    with profiler.isolated():
+        result = _analyze_one(file_path, copybook_paths, cache_dir, rules, skip_rules, **options)
+        result['timings'] = profiler.snapshot()
+    return result
+
+
+def _analyze_one(file_path: str, copybook_paths: Optional[List[str]], cache_dir: Optional[str],
+                 rules: Optional[List[str]], skip_rules: Optional[List[str]], **options) -> Dict[str, Any]:
+    # Importé à l'appel : la CLI utilisée en client du démon d'audit
+    # (audit_client) ne charge pas l'analyseur
+    from cobol_analyzer import CobolAnalyzer
+    analyzer = CobolAnalyzer(copybook_paths, cache=_worker_cache(cache_dir),
+                             rules=rules, skip_rules=skip_rules)
+    try:
+        results = analyzer.analyze_file(file_path, **options)
+        return {
+            'file': file_path,
+            'issues': results['issues'],
+            'metrics': results['metrics'],
+            'calls': results['calls'],
+            'cached': analyzer.cache_hit,
+            'timings': None,
+            # Copybooks inclus (enregistrés avec le résultat s'il vient du cache)
+            'dependencies': sorted(analyzer._dependencies()),
+            # Emplacements des copybooks introuvables
+            'missing': sorted(analyzer._missing()),
+            'error': None
+        }
+    except Exception as e:
+        return {'file': file_path, 'issues': [], 'metrics': {}, 'calls': None,
+                'cached': False, 'timings': None, 'dependencies': [], 'missing': [], 'error': str(e)}
+    finally:
+        if analyzer.source is not None:
+            analyzer.source.close()
+
+
+class PortfolioAuditor:
+    """Répartit l'analyse d'un ensemble de fichiers sur plusieurs processus."""
+
+    def __init__(self, jobs: Optional[int] = None, copybook_paths: Optional[List[str]] = None,
+                 cache_dir: Optional[str] = None, call_index: Optional[str] = None,
+                 warehouse: Optional[str] = None, baseline: Optional[BaselineFilter] = None,
+                 profile: bool = False, **analyze_options):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.copybook_paths = copybook_paths
+        self.cache_dir = cache_dir
+        # Chemin de l'index des appels entre programmes (call_graph.CallGraphIndex)
+        self.call_index = call_index
+        # Chemin de l'entrepôt SQLite des résultats (warehouse.ResultWarehouse)
+        self.warehouse = warehouse
+        # Filtre des problèmes connus d'un référentiel (baseline.BaselineFilter)
+        self.baseline = baseline
+        # Mesure du temps par étape et par règle dans chaque worker (--profile)
+        self.profile = profile
+        # Options transmises à analyze_one (streaming, mapped, rules, skip_rules)
+        self.analyze_options = analyze_options
+
+    def audit_directory(self, root: str, patterns: Iterable[str] = DEFAULT_PATTERNS,
+                        issue_sink: Optional[IssueSink] = None) -> Dict[str, Any]:
+        """Découvre puis analyse tous les fichiers COBOL d'une arborescence."""
+        files = discover_cobol_files(root, patterns)
+        logger.info("%d fichiers COBOL découverts sous %s", len(files), root)
+        results = self.audit_files(files, issue_sink)
+        if self.call_index is not None:
+            index = CallGraphIndex(self.call_index)
+            removed = index.prune(root, files)
+            index.close()
+            if removed:
+                logger.info("Index des appels: %d fichiers disparus retirés", removed)
+        return results
+
+    def audit_files(self, files: List[str], issue_sink: Optional[IssueSink] = None) -> Dict[str, Any]:
+        """Analyse une liste de fichiers et fusionne les résultats.
+
+        Avec `issue_sink`, les problèmes de chaque fichier lui sont transmis
+        dès que le fichier est analysé, au lieu d'être conservés dans le
+        résultat fusionné. Si un index des appels est configuré, les arcs
+        de chaque fichier analysé y sont remplacés au fil de l'eau ; si un
+        entrepôt de résultats est configuré, l'audit y est enregistré comme
+        une nouvelle exécution. Le filtre de référentiel s'applique ensuite :
+        l'entrepôt conserve tous les problèmes, le résultat et `issue_sink`
+        ne reçoivent que les nouveaux.
+        """
+        file_results = self.iter_results(files)
+        index = None
+        if self.call_index is not None:
+            index = CallGraphIndex(self.call_index)
+            file_results = index.record(file_results)
+        warehouse = None
+        if self.warehouse is not None:
+            warehouse = ResultWarehouse(self.warehouse)
+            file_results = warehouse.record(file_results)
+        if self.baseline is not None:
+            file_results = self.baseline.filter_results(file_results)
+        results = self.merge_results(file_results, issue_sink)
+        if index is not None:
+            index.close()
+        if warehouse is not None:
+            warehouse.close()
+        if self.cache_dir is not None:
+            logger.info("Cache: %d/%d fichiers inchangés servis depuis le cache",
+                        results['cache_hits'], len(files))
+            _worker_cache(self.cache_dir).evict()
+        return results
+
+    def iter_results(self, files: List[str]) -> Iterator[Dict[str, Any]]:
+        """Produit les résultats par fichier au fil de l'analyse, dans l'ordre des fichiers."""
+        analyze = partial(analyze_one, copybook_paths=self.copybook_paths,
+                          cache_dir=self.cache_dir, profile=self.profile,
+                          **self.analyze_options)
+        if self.jobs == 1 or len(files) <= 1:
+            yield from map(analyze, files)
+            return
+        # Importé ici : un audit séquentiel ne charge pas multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Des lots de plusieurs fichiers amortissent le coût de l'IPC,
+        # tout en gardant assez de lots pour équilibrer la charge.
+        chunksize = max(1, len(files) // (self.jobs * 4))
+        # Les logs des workers sont relayés au parent (un seul fichier par lot)
+        log_queue = start_worker_logging()
+        initializer = init_worker_logging if log_queue is not None else None
+        try:
+            with ProcessPoolExecutor(max_workers=self.jobs, initializer=initializer,
+                                     initargs=(log_queue, logger.level)) as executor:
+                yield from executor.map(analyze, files, chunksize=chunksize)
+        finally:
+            stop_worker_logging()
+
+    @staticmethod
+    def merge_results(file_results: Iterable[Dict[str, Any]],
+                      issue_sink: Optional[IssueSink] = None) -> Dict[str, Any]:
+        """Fusionne les résultats par fichier en un résultat de portefeuille.
+
+        Le résultat conserve les clés 'issues' et 'metrics' attendues par les
+        exporteurs ; chaque problème est annoté avec son fichier d'origine.
+        Si les fichiers ont été mesurés, 'profile' cumule leurs temps par
+        étape ('timings') et donne le temps total de chaque fichier ('files').
+        Avec `issue_sink`, les problèmes ne sont pas conservés : seul leur
+        nombre par sévérité l'est ('issue_counts').
+        """
+        from cobol_analyzer import CobolAnalyzer
+        issues = []
+        timings = []
+        file_times = []
+        cache_hits = 0
+        issue_counts = {severity.name: 0 for severity in sorted(Severity, reverse=True)}
+        metrics = dict.fromkeys(CobolAnalyzer().metrics, 0)
+        files = []
+        errors = []
+
+        for result in file_results:
+            if result['error']:
+                logger.error("Échec de l'analyse de %s: %s", result['file'], result['error'])
+                errors.append({'file': result['file'], 'error': result['error']})
+                continue
+
+            cache_hits += result['cached']
+            if result.get('timings'):
+                timings.append(result['timings'])
+                file_times.append((result['file'], sum(t for t, _ in result['timings'].values())))
+            for issue in result['issues']:
+                issue.file = result['file']
+            if issue_sink is not None:
+                for issue in result['issues']:
+                    issue_counts[issue.severity.name] += 1
+                issue_sink(result['issues'])
+            else:
+                issues.extend(result['issues'])
+
+            for key, value in result['metrics'].items():
+                if key in MAX_METRICS:
+                    metrics[key] = max(metrics.get(key, 0), value)
+                else:
+                    metrics[key] = metrics.get(key, 0) + value
+
+            files.append({
+                'file': result['file'],
+                'metrics': result['metrics'],
+                'issue_count': len(result['issues'])
+            })
+
+        merged = {
+            'issues': issues,
+            'metrics': metrics,
+            'files': files,
+            'errors': errors,
+            'cache_hits': cache_hits
+        }
+        if issue_sink is not None:
+            merged['issue_counts'] = issue_counts
+        if timings:
+            merged['profile'] = {'timings': merge_timings(timings), 'files': file_times}
+        return merged
@@ -0,0 +1,140 @@
+"""
+Mesure du temps passé par étape et par règle (option --profile).
+"""
+import contextlib
+import time
+from typing import List, Dict, Any, Callable, Iterable, Tuple
+
+# Contexte sans effet, partagé, retourné lorsque la mesure est désactivée
+_DISABLED = contextlib.nullcontext()
+
+
+class _Stage:
+    """Chronomètre d'une étape ; le temps des sous-étapes en est déduit."""
+
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._nested.append(0.0)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        nested = self.profiler._nested.pop()
+        self.profiler.add(self.name, elapsed - nested)
+        if self.profiler._nested:
+            self.profiler._nested[-1] += elapsed
+        return False
+
+
+class Profiler:
+    """Accumule le temps propre (hors sous-étapes) de chaque étape nommée.
+
+    Désactivé, il ne coûte qu'un appel de méthode par étape et aucun par
+    ligne : `timed` retourne alors la fonction d'origine telle quelle.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        # Nom de l'étape -> [secondes, nombre d'appels]
+        self.timings: Dict[str, List[float]] = {}
+        self._nested: List[float] = []
+
+    def enable(self) -> None:
+        """Active la mesure et repart de zéro."""
+        self.enabled = True
+        self.reset()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.timings = {}
+        self._nested = []
+
+    @contextlib.contextmanager
+    def isolated(self):
+        """Mesure un bloc à part : les mesures en cours sont restaurées ensuite."""
+        saved = (self.enabled, self.timings, self._nested)
+        self.enabled = True
+        self.reset()
+        try:
+            yield self
+        finally:
+            self.enabled, self.timings, self._nested = saved
+
+    def stage(self, name: str):
+        """Retourne un contexte chronométrant une étape."""
+        if not self.enabled:
+            return _DISABLED
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        """Ajoute du temps mesuré à une étape (et le déduit de l'étape englobante)."""
+        entry = self.timings.get(name)
+        if entry is None:
+            self.timings[name] = [seconds, calls]
+        else:
+            entry[0] += seconds
+            entry[1] += calls
+
+    def timed(self, name: str, function: Callable) -> Callable:
+        """Retourne `function` chronométrée sous `name` (inchangée si désactivé).
+
+        Destinée aux appels par ligne (`LineCheck.visit`) : le temps est
+        cumulé directement, sans créer de contexte à chaque appel.
+        """
+        if not self.enabled:
+            return function
+        clock = time.perf_counter
+        timings = self.timings
+        nested = self._nested
+        entry = timings.setdefault(name, [0.0, 0])
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return function(*args)
+            finally:
+                elapsed = clock() - start
+                entry[0] += elapsed
+                entry[1] += 1
+                if nested:
+                    nested[-1] += elapsed
+        return wrapper
+
+    def snapshot(self) -> Dict[str, Tuple[float, int]]:
+        """Retourne une copie sérialisable des mesures."""
+        return {name: (seconds, int(calls)) for name, (seconds, calls) in self.timings.items()}
+
+    def total(self) -> float:
+        return sum(seconds for seconds, _ in self.timings.values())
+
+
+def merge_timings(snapshots: Iterable[Dict[str, Tuple[float, int]]]) -> Dict[str, Tuple[float, int]]:
+    """Additionne les mesures de plusieurs fichiers (mode portefeuille)."""
+    merged: Dict[str, List[float]] = {}
+    for snapshot in snapshots:
+        for name, (seconds, calls) in snapshot.items():
+            entry = merged.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+    return {name: (seconds, int(calls)) for name, (seconds, calls) in merged.items()}
+
+
+def slowest(timings: Dict[str, Any], prefix: str = '', limit: int = 10) -> List[Tuple[str, float]]:
+    """Retourne les étapes (éventuellement filtrées par préfixe) les plus lentes."""
+    selected = [
+        (name, value[0]) for name, value in timings.items()
+        if name.startswith(prefix)
+    ]
+    return sorted(selected, key=lambda item: item[1], reverse=True)[:limit]
+
+
+# Instance partagée par le processus (activée par --profile)
+profiler = Profiler()
@@ -0,0 +1,158 @@
+"""
+Cache persistant des résultats d'analyse, indexé par empreinte de contenu.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from issues import Issue
+from logger import logger
+
+DEFAULT_CACHE_DIR = '.cobol-audit-cache'
+
+# Taille maximale du cache sur disque (résultats compressés)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Version du jeu de règles : à incrémenter dès qu'une règle change de
+# comportement, pour invalider les résultats mis en cache.
+RULESET_VERSION = '7'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    dependencies TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+"""
+
+
+def file_digest(file_path: str) -> str:
+    """Calcule l'empreinte SHA-256 du contenu d'un fichier."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat_signature(path: str) -> Optional[List[int]]:
+    """Retourne (mtime, taille) d'un fichier, ou None s'il a disparu."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ResultCache:
+    """Cache SQLite des résultats `issues`/`metrics` par fichier.
+
+    La clé combine l'empreinte du contenu du fichier, la version du jeu
+    de règles et le contexte d'analyse (chemins de copybooks). Les
+    copybooks inclus sont enregistrés comme dépendances : un résultat
+    n'est servi que si aucun d'eux n'a changé. L'éviction supprime les
+    entrées les moins récemment utilisées au-delà de `max_bytes` ; elle
+    est déclenchée par `put` dès que la taille estimée dépasse la limite.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(directory, 'results.sqlite3'), timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(_SCHEMA)
+        # Taille estimée du cache, recalculée à chaque éviction
+        self._size: Optional[int] = None
+
+    def close(self) -> None:
+        """Ferme la connexion à la base."""
+        self.connection.close()
+
+    def key_for(self, file_path: str, context: str = '') -> str:
+        """Construit la clé de cache d'un fichier dans un contexte d'analyse."""
+        material = f"{RULESET_VERSION}\0{context}\0{file_digest(file_path)}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retourne un résultat mis en cache, ou None s'il est absent ou périmé."""
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Optional[List[int]]]]]:
+        """Retourne un résultat mis en cache et ses dépendances, ou None.
+
+        Les dépendances associent chaque fichier à sa signature lors de la
+        mise en cache : None pour un emplacement où un copybook introuvable
+        a été cherché.
+        """
+        row = self.connection.execute(
+            'SELECT dependencies, payload FROM results WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        dependencies = json.loads(row[0])
+        if any(_stat_signature(path) != signature for path, signature in dependencies.items()):
+            return None
+
+        with self.connection:
+            self.connection.execute(
+                'UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key)
+            )
+        results = json.loads(zlib.decompress(row[1]))
+        results['issues'] = [Issue.from_record(record) for record in results['issues']]
+        return results, dependencies
+
+    def put(self, key: str, results: Dict[str, Any], dependencies: Iterable[str] = ()) -> None:
+        """Enregistre le résultat d'analyse d'un fichier."""
+        data = dict(results, issues=[issue.to_record() for issue in results['issues']])
+        payload = zlib.compress(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        signatures = {path: _stat_signature(path) for path in dependencies}
+        with self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                (key, json.dumps(signatures), payload, len(payload), time.time())
+            )
+        # Estimation par excès (remplacements, autres processus) : evict recompte
+        self._size = self.size() if self._size is None else self._size + len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def size(self) -> int:
+        """Retourne la taille totale des résultats en cache (octets)."""
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def evict(self) -> int:
+        """Supprime les entrées les plus anciennes au-delà de la taille maximale."""
+        size = self.size()
+        excess = size - self.max_bytes
+        self._size = size
+        if excess <= 0:
+            return 0
+
+        removed = []
+        for key, entry_size in self.connection.execute(
+            'SELECT key, size FROM results ORDER BY last_access'
+        ).fetchall():
+            if excess <= 0:
+                break
+            removed.append((key,))
+            excess -= entry_size
+            self._size -= entry_size
+        with self.connection:
+            self.connection.executemany('DELETE FROM results WHERE key = ?', removed)
+        logger.info("Cache: %d entrées évincées", len(removed))
+        return len(removed)
+
+    def clear(self) -> None:
+        """Vide le cache."""
+        with self.connection:
+            self.connection.execute('DELETE FROM results')
+        self._size = 0
@@ -0,0 +1,279 @@
+"""
+Moteur de règles à passage unique pour les divisions COBOL.
+"""
+from collections import deque
+from typing import List, Dict, Any, Callable, FrozenSet, Iterable, Optional, Sequence, Tuple, Type
+from issues import Issue, Severity
+from lexer import TokenLine, TokenTable, tokenize
+from profiling import profiler
+
+# Valeur de `LineCheck.context` demandant la division entière en mémoire
+FULL_CONTEXT = -1
+
+# Divisions auxquelles une vérification peut s'appliquer (`LineCheck.scope`)
+SCOPES = ('IDENTIFICATION', 'DATA', 'PROCEDURE')
+
+
+class LineCheck:
+    """Vérification alimentée ligne par ligne par le moteur de règles.
+
+    Chaque vérification accumule ses problèmes dans `issues` et, si elle
+    produit une métrique, expose son nom dans `metric` et sa valeur dans
+    `value`.
+
+    Une vérification qui n'a besoin que de la ligne courante laisse
+    `context` à 0 et peut s'exécuter en flux sans que la division soit
+    chargée. Une vérification qui a besoin des lignes précédentes le
+    déclare via `context` (nombre de lignes, ou FULL_CONTEXT) et reçoit
+    alors dans `window` une vue tamponnée de ces lignes.
+
+    Les jetons de la ligne courante (`lexer.TokenLine`) sont partagés par
+    toutes les vérifications du moteur via `tokens` : aucune n'a besoin de
+    redécouper le texte. `line_tokens` les retourne, ou découpe la ligne
+    si la vérification est appelée hors moteur. Une vérification qui ne
+    s'intéresse qu'aux lignes contenant certains mots déclare ces mots (en
+    majuscules) dans `keywords` : le moteur ne l'appelle que si l'un d'eux
+    figure parmi les jetons de la ligne, hors littéraux. Ce n'est qu'un
+    pré-filtre : `visit` reste responsable du test exact, et peut être
+    appelée seule. Sans `keywords`, toutes les lignes lui sont transmises.
+
+    `scope` (division analysée), `severity` (sévérité des problèmes
+    signalés) et `requires` (vérifications dont elle dépend) servent au
+    registre des règles (`RuleRegistry`).
+    """
+
+    name = ''
+    metric: Optional[str] = None
+    context = 0
+    keywords: Tuple[str, ...] = ()
+    scope = 'PROCEDURE'
+    severity: Optional[Severity] = None
+    requires: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.issues: List[Issue] = []
+        self.value = 0
+        self.window = None
+        self.tokens: Optional[TokenLine] = None
+
+    @classmethod
+    def create(cls, dependencies: Dict[str, 'LineCheck']) -> 'LineCheck':
+        """Instancie la vérification à partir des vérifications requises (`requires`)."""
+        return cls()
+
+    def line_tokens(self, line: str) -> TokenLine:
+        """Retourne les jetons d'une ligne : ceux du moteur, ou découpés ici hors moteur."""
+        tokens = self.tokens
+        if tokens is None or tokens.text != line:
+            tokens = TokenLine()
+            tokens.set(line, *tokenize(line))
+        return tokens
+
+    def visit(self, index: int, line: str) -> None:
+        """Traite une ligne (index = numéro de ligne dans le source).
+
+        Une vérification qui ne la redéfinit pas ne reçoit aucune ligne.
+        """
+
+    def finish(self) -> None:
+        """Appelée une fois toutes les lignes visitées."""
+        pass
+
+    def report(self, rule: str, severity: Severity, message: str, line_number: Optional[int] = None) -> None:
+        """Enregistre un problème détecté sur une ligne."""
+        self.issues.append(Issue(rule, severity, message, line_number))
+
+
+class RuleEngine:
+    """Applique toutes les vérifications enregistrées en un seul parcours.
+
+    Les lignes peuvent être fournies d'un bloc (`run`) ou une à une
+    (`feed` puis `finish`) depuis un parseur en flux.
+
+    Chaque ligne est découpée en jetons une seule fois, par le parseur
+    (`run` avec une `TokenTable`) ou à défaut par le moteur. Les mots-clés
+    déclarés par les vérifications (`LineCheck.keywords`) sont cherchés
+    parmi ces jetons pour savoir quelles vérifications appeler. Les
+    vérifications sans mot-clé sont appelées en premier, puis celles
+    déclenchées, dans l'ordre d'enregistrement.
+
+    Si la mesure est activée (`profiling.profiler`) au moment de
+    l'enregistrement, le temps de chaque vérification est cumulé sous
+    `rule:<nom>`.
+    """
+
+    def __init__(self, checks: Iterable[LineCheck] = ()):
+        self.checks: Dict[str, LineCheck] = {}
+        self.buffer = None
+        # Jetons de la ligne en cours, partagés par les vérifications
+        self.tokens = TokenLine()
+        # Vérifications appelées sur chaque ligne
+        self._visitors = []
+        # Vérifications déclenchées par mot-clé : (mots-clés, visite), dans l'ordre
+        self._triggers: List[Tuple[FrozenSet[str], Callable]] = []
+        self._keywords: FrozenSet[str] = frozenset()
+        # Mots-clés trouvés dans une ligne -> visites à appeler
+        self._dispatch: Dict[FrozenSet[str], Tuple[Callable, ...]] = {}
+        for check in checks:
+            self.register(check)
+
+    def register(self, check: LineCheck) -> LineCheck:
+        """Enregistre une vérification sous son nom."""
+        self.checks[check.name] = check
+        check.tokens = self.tokens
+        # Sans `visit` propre, la vérification n'agit que dans `finish`
+        if type(check).visit is not LineCheck.visit:
+            visitor = profiler.timed(f'rule:{check.name}', check.visit)
+            if check.keywords:
+                triggers = frozenset(keyword.upper() for keyword in check.keywords)
+                self._triggers.append((triggers, visitor))
+                self._keywords |= triggers
+                self._dispatch = {}
+            else:
+                self._visitors.append(visitor)
+        self._update_buffer()
+        return check
+
+    def _triggered(self, hits: FrozenSet[str]) -> Tuple[Callable, ...]:
+        """Retourne les visites déclenchées par les mots-clés trouvés dans une ligne."""
+        visitors = tuple(visit for triggers, visit in self._triggers if triggers & hits)
+        self._dispatch[hits] = visitors
+        return visitors
+
+    def _update_buffer(self) -> None:
+        """Dimensionne le tampon selon le contexte demandé par les vérifications."""
+        contexts = [check.context for check in self.checks.values() if check.context]
+        if not contexts:
+            self.buffer = None
+            return
+        if FULL_CONTEXT in contexts:
+            self.buffer = []
+        else:
+            self.buffer = deque(maxlen=max(contexts))
+        for check in self.checks.values():
+            check.window = self.buffer if check.context else None
+
+    def feed(self, index: int, line: str, kinds: Optional[Sequence[int]] = None,
+             values: Optional[Sequence[str]] = None) -> None:
+        """Transmet une ligne aux vérifications qu'elle concerne.
+
+        Les jetons de la ligne sont calculés ici s'ils ne sont pas fournis.
+        """
+        if kinds is None:
+            kinds, values = tokenize(line)
+        self.tokens.set(line, kinds, values)
+        for visit in self._visitors:
+            visit(index, line)
+        if self._triggers:
+            hits = self._keywords.intersection(values)
+            if hits:
+                hits = frozenset(hits)
+                visitors = self._dispatch.get(hits)
+                if visitors is None:
+                    visitors = self._triggered(hits)
+                for visit in visitors:
+                    visit(index, line)
+        if self.buffer is not None:
+            self.buffer.append(line)
+
+    def finish(self) -> Dict[str, LineCheck]:
+        """Termine le parcours et retourne les vérifications par nom."""
+        for check in self.checks.values():
+            profiler.timed(f'rule:{check.name}', check.finish)()
+        return self.checks
+
+    def run(self, lines: Iterable[str], line_numbers: Optional[Iterable[int]] = None,
+            tokens: Optional[TokenTable] = None) -> Dict[str, LineCheck]:
+        """Visite chaque ligne une seule fois et la transmet à toutes les vérifications.
+
+        `tokens` est la table des jetons de ces lignes, si le parseur l'a
+        déjà construite.
+        """
+        feed = self.feed
+        if line_numbers is None:
+            line_numbers = range(len(lines)) if isinstance(lines, list) else None
+        numbered = enumerate(lines) if line_numbers is None else zip(line_numbers, lines)
+        if tokens is None:
+            for index, line in numbered:
+                feed(index, line)
+        else:
+            for (index, line), (kinds, values) in zip(numbered, tokens.iter_lines()):
+                feed(index, line, kinds, values)
+        return self.finish()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Retourne les métriques produites par les vérifications."""
+        return {
+            check.metric: check.value
+            for check in self.checks.values()
+            if check.metric
+        }
+
+
+class RuleRegistry:
+    """Registre des vérifications disponibles, extensible par des greffons.
+
+    Une vérification est enregistrée par sa classe (décorateur `register`),
+    puis instanciée à chaque analyse par `build`, qui construit un moteur
+    par division. Seules les vérifications retenues (`rules`/`skip_rules`)
+    et celles dont elles dépendent sont instanciées : une règle écartée
+    ne coûte rien.
+    """
+
+    def __init__(self):
+        self.rules: Dict[str, Type[LineCheck]] = {}
+
+    def register(self, check_class: Type[LineCheck]) -> Type[LineCheck]:
+        """Enregistre une classe de vérification (utilisable en décorateur)."""
+        if not check_class.name:
+            raise ValueError(f"Vérification sans nom: {check_class.__name__}")
+        if check_class.scope not in SCOPES:
+            raise ValueError(f"Division inconnue pour {check_class.name}: {check_class.scope}")
+        self.rules[check_class.name] = check_class
+        return check_class
+
+    def select(self, rules: Optional[Iterable[str]] = None,
+               skip_rules: Optional[Iterable[str]] = None) -> List[str]:
+        """Retourne les noms des vérifications à exécuter, dans l'ordre d'enregistrement.
+
+        `rules` restreint la sélection (toutes par défaut), `skip_rules` en
+        retire ; les vérifications requises par une vérification retenue
+        sont ajoutées. Un nom inconnu lève une ValueError.
+        """
+        rules = list(rules) if rules else list(self.rules)
+        skip_rules = set(skip_rules or ())
+        unknown = [name for name in (*rules, *skip_rules) if name not in self.rules]
+        if unknown:
+            raise ValueError(f"Règles inconnues: {', '.join(unknown)}")
+        selected = set()
+        pending = [name for name in rules if name not in skip_rules]
+        while pending:
+            name = pending.pop()
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.rules[name].requires)
+        return [name for name in self.rules if name in selected]
+
+    def build(self, rules: Optional[Iterable[str]] = None,
+              skip_rules: Optional[Iterable[str]] = None) -> Dict[str, RuleEngine]:
+        """Instancie les vérifications retenues et retourne un moteur par division."""
+        engines = {scope: RuleEngine() for scope in SCOPES}
+        checks: Dict[str, LineCheck] = {}
+
+        def instantiate(name: str) -> LineCheck:
+            if name not in checks:
+                check_class = self.rules[name]
+                dependencies = {required: instantiate(required) for required in check_class.requires}
+                checks[name] = check = check_class.create(dependencies)
+                # Enregistrée après ses dépendances : leur `finish` passe avant le sien
+                engines[check.scope].register(check)
+            return checks[name]
+
+        for name in self.select(rules, skip_rules):
+            instantiate(name)
+        return engines
+
+
+# Registre partagé ; les vérifications intégrées sont enregistrées par `rules`
+registry = RuleRegistry()
+register_rule = registry.register
@@ -1,8 +1,28 @@
 """
 Règles d'analyse avancées pour le code COBOL.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
 import re
+from rule_engine import LineCheck, RuleEngine, register_rule, registry
+from lexer import PERIOD, has_magic_number, tokenize
+from control_flow import ControlFlowBuilder, ControlFlowGraph
+from issues import Severity
+from cobol_parser import SECTION_PATTERN
+from identifier_index import IdentifierIndex
+
+# Expressions précompilées partagées par les règles
+NAMING_PATTERN = re.compile(r'^[A-Z][A-Z0-9-]*$')
+DATA_ITEM_PATTERN = re.compile(r'^\s*\d+\s+([\w-]+)')
+LEVEL_PATTERN = re.compile(r'^\s*(\d+)')
+VALUE_LITERAL_PATTERN = re.compile(r'\bVALUE\s+(?:IS\s+)?([\'"])([^\'"]*)\1', re.IGNORECASE)
+PROGRAM_ID_PATTERN = re.compile(r'^PROGRAM-ID\.?\s+[\'"]?([\w-]+)', re.IGNORECASE)
+CALL_PATTERN = re.compile(
+    r'(?<![\w-])CALL\s+(?:([\'"])(?P<literal>[^\'"]+)\1|(?P<identifier>[\w-]+))', re.IGNORECASE
+)
+MOVE_LITERAL_PATTERN = re.compile(
+    r'(?<![\w-])MOVE\s+([\'"])(?P<literal>[^\'"]+)\1\s+TO\s+(?P<targets>[\w-]+(?:\s+[\w-]+)*)',
+    re.IGNORECASE
+)
 
 class CobolRules:
     """Règles d'analyse pour le code COBOL."""
@@ -10,15 +30,13 @@ class CobolRules:
     @staticmethod
     def check_nested_conditions(line: str) -> int:
         """Vérifie la profondeur des conditions imbriquées."""
-        return line.count('IF ') + line.count('EVALUATE ')
+        _, values = tokenize(line)
+        return values.count('IF') + values.count('EVALUATE')
 
     @staticmethod
     def check_magic_numbers(line: str) -> bool:
         """Détecte les nombres magiques dans le code."""
-        # Ignore les numéros de niveau (01, 05, etc.)
-        if re.match(r'^\s*\d{2}\s+', line):
-            return False
-        return bool(re.search(r'(?<!\d)\d{2,}(?!\d)', line))
+        return has_magic_number(*tokenize(line))
 
     @staticmethod
     def check_paragraph_length(lines: List[str]) -> int:
@@ -28,66 +46,427 @@ class CobolRules:
     @staticmethod
     def check_naming_convention(name: str) -> bool:
         """Vérifie si le nom suit les conventions COBOL."""
-        return bool(re.match(r'^[A-Z][A-Z0-9-]*$', name))
+        return bool(NAMING_PATTERN.match(name))
 
     @staticmethod
     def check_dead_code(lines: List[str]) -> List[str]:
-        """Détecte le code mort potentiel."""
-        dead_sections = []
-        current_section = None
-        has_entry_point = False
-
-        for line in lines:
-            if 'SECTION.' in line:
-                if current_section and not has_entry_point:
-                    dead_sections.append(current_section)
-                current_section = line
-                has_entry_point = False
-            elif current_section and ('PERFORM ' in line or 'GOTO ' in line):
-                has_entry_point = True
-
-        return dead_sections
+        """Détecte les sections inatteignables depuis le point d'entrée."""
+        control_flow = ControlFlowCheck()
+        check = DeadCodeCheck(control_flow)
+        RuleEngine([control_flow, check]).run(lines)
+        return check.dead_sections
 
     @staticmethod
     def check_data_usage(data_lines: List[str], proc_lines: List[str]) -> Dict[str, int]:
-        """Analyse l'utilisation des données."""
-        usage = {}
-        for line in data_lines:
-            if match := re.match(r'^\s*\d+\s+(\w+)', line):
-                var_name = match.group(1)
-                if var_name != 'FILLER':
-                    usage[var_name] = 0
+        """Analyse l'utilisation des données.
 
-        for line in proc_lines:
-            for var in usage:
-                if var in line:
-                    usage[var] += 1
+        Retourne, pour chaque variable déclarée, le nombre de lignes de la
+        division PROCEDURE qui la référencent comme mot COBOL complet.
+        """
+        check = DataUsageCheck(CobolRules.declared_variables(data_lines))
+        RuleEngine([check]).run(proc_lines)
+        return check.usage
 
-        return usage
+    @staticmethod
+    def declared_variables(data_lines: List[str]) -> List[str]:
+        """Retourne les noms des variables déclarées (hors FILLER)."""
+        check = DataItemCheck()
+        for index, line in enumerate(data_lines):
+            check.visit(index, line)
+        return check.variables
 
     @staticmethod
     def check_perform_thru(line: str) -> bool:
         """Détecte l'utilisation de PERFORM THRU (déconseillé)."""
-        return 'PERFORM' in line and 'THRU' in line
+        _, values = tokenize(line)
+        return 'PERFORM' in values and ('THRU' in values or 'THROUGH' in values)
+
+    @staticmethod
+    def check_alter(line: str) -> bool:
+        """Détecte une instruction ALTER sur une ligne."""
+        _, values = tokenize(line)
+        return 'ALTER' in values and 'TO' in values
 
     @staticmethod
     def check_altered_goto(lines: List[str]) -> List[str]:
         """Détecte les GOTOs modifiés (ALTER)."""
-        altered_gotos = []
-        for line in lines:
-            if 'ALTER' in line and 'TO' in line:
-                altered_gotos.append(line)
-        return altered_gotos
+        return [line for line in lines if CobolRules.check_alter(line)]
 
     @staticmethod
     def check_working_storage_organization(data_lines: List[str]) -> List[str]:
         """Vérifie l'organisation de la WORKING-STORAGE SECTION."""
-        issues = []
-        current_level = 0
-        for line in data_lines:
-            if match := re.match(r'^\s*(\d+)', line):
-                level = int(match.group(1))
-                if level != 1 and level <= current_level:
-                    issues.append(f"Niveau {level} mal organisé: {line.strip()}")
-                current_level = level
-        return issues 
\ No newline at end of file
+        check = StorageOrganizationCheck()
+        for index, line in enumerate(data_lines):
+            check.visit(index, line)
+        return check.messages
+
+
+@register_rule
+class FillerCheck(LineCheck):
+    """Signale les FILLER sans description explicite."""
+
+    name = 'filler'
+    scope = 'DATA'
+    keywords = ('FILLER',)
+    severity = Severity.INFO
+
+    def visit(self, index: int, line: str) -> None:
+        if 'FILLER' in self.line_tokens(line).values and len(line.split()) < 3:
+            self.report('documentation', self.severity, 'FILLER sans description explicite', index)
+
+
+@register_rule
+class StorageOrganizationCheck(LineCheck):
+    """Vérifie l'enchaînement des numéros de niveau de la division DATA."""
+
+    name = 'storage_organization'
+    scope = 'DATA'
+    severity = Severity.WARNING
+
+    def __init__(self):
+        super().__init__()
+        self.messages: List[str] = []
+        self._current_level = 0
+
+    def visit(self, index: int, line: str) -> None:
+        if match := LEVEL_PATTERN.match(line):
+            level = int(match.group(1))
+            if level != 1 and level <= self._current_level:
+                message = f"Niveau {level} mal organisé: {line.strip()}"
+                self.messages.append(message)
+                self.report('data_organization', self.severity, message, index)
+            self._current_level = level
+
+
+@register_rule
+class DataItemCheck(LineCheck):
+    """Compte les éléments de données et collecte les variables déclarées."""
+
+    name = 'data_items'
+    metric = 'data_items'
+    scope = 'DATA'
+
+    def __init__(self):
+        super().__init__()
+        self.variables: List[str] = []
+        # Littéraux des clauses VALUE, par variable (candidats des CALL dynamiques)
+        self.values: Dict[str, List[str]] = {}
+
+    def visit(self, index: int, line: str) -> None:
+        if match := DATA_ITEM_PATTERN.match(line):
+            var_name = match.group(1)
+            if not var_name.startswith('-'):
+                self.value += 1
+            if var_name.upper() != 'FILLER':
+                self.variables.append(var_name)
+                if 'VALUE' in line.upper() and (value := VALUE_LITERAL_PATTERN.search(line)):
+                    self.values.setdefault(var_name.upper(), []).append(value.group(2).strip())
+
+
+@register_rule
+class GotoCheck(LineCheck):
+    """Signale chaque utilisation de GOTO."""
+
+    name = 'goto'
+    keywords = ('GOTO',)
+    severity = Severity.WARNING
+
+    def visit(self, index: int, line: str) -> None:
+        if 'GOTO' in self.line_tokens(line).values:
+            self.report('best_practice', self.severity, 'Utilisation de GOTO détectée', index)
+
+
+@register_rule
+class ControlFlowCheck(LineCheck):
+    """Construit le graphe de flot de contrôle de la division PROCEDURE.
+
+    Le graphe est construit une seule fois par analyse et partagé par les
+    vérifications qui en dépendent (enregistrées après celle-ci).
+    """
+
+    name = 'control_flow'
+
+    def __init__(self):
+        super().__init__()
+        self.builder = ControlFlowBuilder()
+        self.graph: Optional[ControlFlowGraph] = None
+
+    def visit(self, index: int, line: str) -> None:
+        # Le contenu des littéraux ne doit pas passer pour des instructions
+        self.builder.add_line(index, self.line_tokens(line).masked())
+
+    def finish(self) -> None:
+        self.graph = self.builder.build()
+
+
+@register_rule
+class DeadCodeCheck(LineCheck):
+    """Détecte les sections et paragraphes inatteignables depuis le point d'entrée."""
+
+    name = 'dead_code'
+    metric = 'dead_code_sections'
+    severity = Severity.WARNING
+    requires = ('control_flow',)
+
+    def __init__(self, control_flow: ControlFlowCheck):
+        super().__init__()
+        self.control_flow = control_flow
+        self.dead_sections: List[str] = []
+        self.dead_paragraphs: List[str] = []
+
+    @classmethod
+    def create(cls, dependencies: Dict[str, LineCheck]) -> 'DeadCodeCheck':
+        return cls(dependencies['control_flow'])
+
+    def finish(self) -> None:
+        graph = self.control_flow.graph
+        reachable = graph.reachable()
+        for node_id in graph.unreachable():
+            node = graph.nodes[node_id]
+            if node.kind == 'section':
+                self.dead_sections.append(node.header)
+                self.report('dead_code', self.severity,
+                            f'Section potentiellement morte détectée: {node.header}', node.line_number)
+            elif node.section is None or reachable[node.section]:
+                # Les paragraphes d'une section morte ne sont pas signalés en double
+                self.dead_paragraphs.append(node.name)
+                self.report('dead_code', self.severity,
+                            f'Paragraphe potentiellement mort détecté: {node.name}', node.line_number)
+        self.value = len(self.dead_sections)
+
+
+@register_rule
+class DeadParagraphCheck(LineCheck):
+    """Compte les paragraphes inatteignables relevés par DeadCodeCheck.
+
+    Métrique distincte de `dead_code_sections`, qui ne compte que les
+    sections ; elle n'entre pas dans le calcul du score.
+    """
+
+    name = 'dead_paragraphs'
+    metric = 'dead_code_paragraphs'
+    requires = ('dead_code',)
+
+    def __init__(self, dead_code: DeadCodeCheck):
+        super().__init__()
+        self.dead_code = dead_code
+
+    @classmethod
+    def create(cls, dependencies: Dict[str, LineCheck]) -> 'DeadParagraphCheck':
+        return cls(dependencies['dead_code'])
+
+    def finish(self) -> None:
+        self.value = len(self.dead_code.dead_paragraphs)
+
+
+@register_rule
+class MagicNumberCheck(LineCheck):
+    """Compte les lignes contenant des nombres magiques."""
+
+    name = 'magic_number'
+    metric = 'magic_numbers'
+    severity = Severity.INFO
+
+    def visit(self, index: int, line: str) -> None:
+        tokens = self.line_tokens(line)
+        if has_magic_number(tokens.kinds, tokens.values):
+            self.value += 1
+            self.report('magic_number', self.severity, 'Nombre magique détecté', index)
+
+
+@register_rule
+class NestedConditionCheck(LineCheck):
+    """Mesure la profondeur maximale des conditions imbriquées."""
+
+    name = 'nested_conditions'
+    metric = 'nested_conditions'
+    keywords = ('IF', 'EVALUATE')
+    severity = Severity.WARNING
+
+    def visit(self, index: int, line: str) -> None:
+        values = self.line_tokens(line).values
+        nested_count = values.count('IF') + values.count('EVALUATE')
+        if nested_count > self.value:
+            self.value = nested_count
+        if nested_count > 2:
+            self.report('complexity', self.severity,
+                        f'Conditions trop imbriquées ({nested_count} niveaux)', index)
+
+
+@register_rule
+class PerformThruCheck(LineCheck):
+    """Signale les PERFORM THRU."""
+
+    name = 'perform_thru'
+    keywords = ('THRU', 'THROUGH')
+    severity = Severity.WARNING
+
+    def visit(self, index: int, line: str) -> None:
+        values = self.line_tokens(line).values
+        if 'PERFORM' in values and ('THRU' in values or 'THROUGH' in values):
+            self.report('best_practice', self.severity, 'Utilisation de PERFORM THRU déconseillée', index)
+
+
+@register_rule
+class AlteredGotoCheck(LineCheck):
+    """Signale les ALTER GOTO."""
+
+    name = 'altered_goto'
+    keywords = ('ALTER',)
+    severity = Severity.ERROR
+
+    def visit(self, index: int, line: str) -> None:
+        values = self.line_tokens(line).values
+        if 'ALTER' in values and 'TO' in values:
+            self.report('best_practice', self.severity, 'Utilisation de ALTER GOTO détectée', index)
+
+
+@register_rule
+class ComplexityCheck(LineCheck):
+    """Calcule la complexité cyclomatique du code COBOL."""
+
+    name = 'complexity'
+    metric = 'complexity'
+    keywords = ('IF', 'EVALUATE', 'PERFORM', 'GOTO', 'SECTION')
+
+    def __init__(self):
+        super().__init__()
+        self.value = 1  # Valeur de base
+
+    def visit(self, index: int, line: str) -> None:
+        tokens = self.line_tokens(line)
+        kinds, values = tokens.kinds, tokens.values
+        # Compte les structures de contrôle
+        has_if = 'IF' in values
+        if has_if or 'EVALUATE' in values:
+            self.value += 1
+        if 'PERFORM' in values and ('UNTIL' in values or 'VARYING' in values):
+            self.value += 1
+        if 'GOTO' in values:
+            self.value += 1
+        if 'SECTION' in values:
+            position = values.index('SECTION')
+            if position + 1 < len(kinds) and kinds[position + 1] == PERIOD:
+                self.value += 1
+        # Compte les opérateurs AND/OR dans les conditions
+        if has_if:
+            self.value += values.count('AND') + values.count('OR')
+
+
+@register_rule
+class DataUsageCheck(LineCheck):
+    """Compte les références aux variables déclarées dans la division DATA.
+
+    Les lignes sont indexées une seule fois par l'IdentifierIndex ; le
+    comptage se fait ensuite en temps linéaire du nombre de variables.
+    Seuls les mots qui désignent une variable déclarée sont indexés : la
+    mémoire reste bornée par la division DATA, pas par la taille de la
+    division PROCEDURE.
+    """
+
+    name = 'data_usage'
+    metric = 'unused_vars'
+    requires = ('data_items',)
+
+    def __init__(self, variables: List[str]):
+        super().__init__()
+        # La liste peut être complétée pendant le parcours de la division
+        # DATA (DataItemCheck) : elle n'est lue qu'à la fin de l'analyse.
+        self.variables = variables
+        self.index = IdentifierIndex()
+        self.usage: Dict[str, int] = {}
+        self._declared: Set[str] = set()
+        self._declared_count = 0
+
+    @classmethod
+    def create(cls, dependencies: Dict[str, LineCheck]) -> 'DataUsageCheck':
+        return cls(dependencies['data_items'].variables)
+
+    def visit(self, index: int, line: str) -> None:
+        if self._declared_count != len(self.variables):
+            self._declared = {name.upper() for name in self.variables}
+            self._declared_count = len(self.variables)
+        declared = self._declared
+        # Les noms déclarés sont des mots : inutile d'écarter d'abord les autres jetons
+        self.index.add_words(index, declared.intersection(self.line_tokens(line).values))
+
+    def finish(self) -> None:
+        self.usage = self.index.usage(self.variables)
+        self.value = len(self.index.unused(self.usage))
+
+
+@register_rule
+class SectionCountCheck(LineCheck):
+    """Compte les sections explicitement déclarées (procédures)."""
+
+    name = 'sections'
+    metric = 'procedures'
+    keywords = ('SECTION',)
+
+    def visit(self, index: int, line: str) -> None:
+        if SECTION_PATTERN.match(line):
+            self.value += 1
+
+
+@register_rule
+class ProgramIdCheck(LineCheck):
+    """Relève le PROGRAM-ID de la division IDENTIFICATION."""
+
+    name = 'program_id'
+    scope = 'IDENTIFICATION'
+    keywords = ('PROGRAM-ID',)
+
+    def __init__(self):
+        super().__init__()
+        self.program_id: Optional[str] = None
+
+    def visit(self, index: int, line: str) -> None:
+        if self.program_id is None and (match := PROGRAM_ID_PATTERN.match(line)):
+            self.program_id = match.group(1).upper()
+
+
+@register_rule
+class CallCheck(LineCheck):
+    """Relève les appels de sous-programmes (CALL) de la division PROCEDURE.
+
+    Un CALL sur un littéral est statique. Un CALL sur une variable est
+    dynamique : ses candidats sont les littéraux de sa clause VALUE et ceux
+    qui lui sont affectés par MOVE.
+    """
+
+    name = 'calls'
+    keywords = ('CALL', 'MOVE')
+    requires = ('data_items',)
+
+    def __init__(self, data_items: DataItemCheck):
+        super().__init__()
+        self.data_items = data_items
+        self.static: List[str] = []
+        self.dynamic: Dict[str, List[str]] = {}
+        self._moved: Dict[str, List[str]] = {}
+
+    @classmethod
+    def create(cls, dependencies: Dict[str, LineCheck]) -> 'CallCheck':
+        return cls(dependencies['data_items'])
+
+    def visit(self, index: int, line: str) -> None:
+        upper = line.upper()
+        if 'CALL' in upper:
+            for match in CALL_PATTERN.finditer(line):
+                if match.group('literal'):
+                    target = match.group('literal').strip().upper()
+                    if target not in self.static:
+                        self.static.append(target)
+                else:
+                    self.dynamic.setdefault(match.group('identifier').upper(), [])
+        if 'MOVE' in upper and (match := MOVE_LITERAL_PATTERN.search(line)):
+            literal = match.group('literal').strip()
+            for target in match.group('targets').split():
+                self._moved.setdefault(target.upper(), []).append(literal)
+
+    def finish(self) -> None:
+        values = self.data_items.values
+        for identifier in self.dynamic:
+            candidates = values.get(identifier, []) + self._moved.get(identifier, [])
+            self.dynamic[identifier] = sorted({c.upper() for c in candidates if c})
+        self._moved = {}
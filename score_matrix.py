@@ -0,0 +1,216 @@
+"""
+Scoring par lots d'un portefeuille : métriques de N fichiers en colonnes,
+scores, notes et recommandations calculés colonne par colonne.
+"""
+import heapq
+import math
+from array import array
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+from scoring import AuditScorer
+
+try:
+    import numpy
+except ImportError:  # NumPy est optionnel : repli sur des tableaux `array`
+    numpy = None
+
+# Métriques pondérées ou faisant l'objet d'une recommandation
+SCORED_METRICS = tuple(dict.fromkeys([*AuditScorer.METRIC_WEIGHTS, *AuditScorer.THRESHOLD_RECOMMENDATIONS]))
+
+# Seuils des notes, croissants, et notes correspondantes
+GRADE_THRESHOLDS = tuple(sorted(AuditScorer.GRADE_SCALE))
+GRADES = tuple(AuditScorer.GRADE_SCALE[threshold] for threshold in GRADE_THRESHOLDS)
+
+# Niveaux de recommandation d'une métrique (colonnes `BatchScores.flags`)
+FLAG_NONE = 0
+FLAG_MEDIUM = 1
+FLAG_HIGH = 2
+
+DEFAULT_PERCENTILES = (50, 90, 99)
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    """Percentile par interpolation linéaire (méthode par défaut de NumPy)."""
+    position = (len(ordered) - 1) * q / 100
+    low = math.floor(position)
+    high = math.ceil(position)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+class MetricMatrix:
+    """Métriques de N fichiers rangées par colonne (une colonne par métrique).
+
+    Les colonnes sont des tableaux NumPy si le module est disponible (et
+    que `use_numpy` ne l'écarte pas), des `array('d')` sinon. Seules les
+    métriques utiles au scoring sont conservées ; une métrique absente
+    d'un fichier vaut 0, ce qui ne lui coûte aucune pénalité.
+    """
+
+    def __init__(self, files: List[str], columns: Dict[str, Sequence[float]],
+                 use_numpy: Optional[bool] = None):
+        if use_numpy and numpy is None:
+            raise ValueError("NumPy n'est pas installé")
+        self.use_numpy = numpy is not None if use_numpy is None else use_numpy
+        self.files = files
+        self.columns = {}
+        for name in SCORED_METRICS:
+            column = columns.get(name, ())
+            if len(column) not in (0, len(files)):
+                raise ValueError(f"Colonne {name}: {len(column)} valeurs pour {len(files)} fichiers")
+            if self.use_numpy:
+                self.columns[name] = (numpy.asarray(column, dtype=numpy.float64) if len(column)
+                                      else numpy.zeros(len(files)))
+            else:
+                self.columns[name] = array('d', column) if len(column) else array('d', bytes(8 * len(files)))
+
+    @classmethod
+    def from_results(cls, file_results: Iterable[Dict[str, Any]],
+                     use_numpy: Optional[bool] = None) -> 'MetricMatrix':
+        """Construit la matrice à partir des résultats par fichier.
+
+        Chaque résultat est un dictionnaire {'file', 'metrics'}, comme
+        l'entrée 'files' d'un résultat de portefeuille.
+        """
+        files = []
+        columns = {name: array('d') for name in SCORED_METRICS}
+        for result in file_results:
+            files.append(result['file'])
+            metrics = result['metrics']
+            for name, column in columns.items():
+                column.append(metrics.get(name, 0))
+        return cls(files, columns, use_numpy)
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def score(self, weights: Optional[Dict[str, float]] = None) -> 'BatchScores':
+        """Calcule les scores, notes et recommandations de tous les fichiers.
+
+        `weights` remplace tout ou partie de `AuditScorer.METRIC_WEIGHTS`.
+        Les pénalités sont soustraites colonne par colonne, dans le même
+        ordre que `AuditScorer.calculate_score` : les scores sont
+        identiques à ceux d'un calcul fichier par fichier.
+        """
+        weights = {**AuditScorer.METRIC_WEIGHTS, **(weights or {})}
+        unknown = sorted(set(weights) - set(self.columns))
+        if unknown:
+            raise ValueError(f"Métriques inconnues: {', '.join(unknown)}")
+        if self.use_numpy:
+            return self._score_numpy(weights)
+        return self._score_array(weights)
+
+    def _score_numpy(self, weights: Dict[str, float]) -> 'BatchScores':
+        scores = numpy.full(len(self), 100.0)
+        for name, weight in weights.items():
+            scores -= numpy.minimum(self.columns[name] * weight * 10, weight * 100)
+        numpy.clip(scores, 0, 100, out=scores)
+        grades = (numpy.searchsorted(GRADE_THRESHOLDS, scores, side='right') - 1).astype(numpy.uint8)
+        flags = {}
+        for name, thresholds in AuditScorer.THRESHOLD_RECOMMENDATIONS.items():
+            column = self.columns[name]
+            flags[name] = ((column >= thresholds['high'][0]).astype(numpy.int8)
+                           + (column >= thresholds['medium'][0]))
+        return BatchScores(self.files, scores, grades, flags)
+
+    def _score_array(self, weights: Dict[str, float]) -> 'BatchScores':
+        scores = array('d', [100.0]) * len(self)
+        for name, weight in weights.items():
+            cap = weight * 100
+            scores = array('d', [score - min(value * weight * 10, cap)
+                                 for score, value in zip(scores, self.columns[name])])
+        scores = array('d', [max(0, min(100, score)) for score in scores])
+        grades = array('B', [self._grade_index(score) for score in scores])
+        flags = {}
+        for name, thresholds in AuditScorer.THRESHOLD_RECOMMENDATIONS.items():
+            high, medium = thresholds['high'][0], thresholds['medium'][0]
+            flags[name] = array('b', [
+                FLAG_HIGH if value >= high else FLAG_MEDIUM if value >= medium else FLAG_NONE
+                for value in self.columns[name]
+            ])
+        return BatchScores(self.files, scores, grades, flags)
+
+    @staticmethod
+    def _grade_index(score: float) -> int:
+        for index in range(len(GRADE_THRESHOLDS) - 1, 0, -1):
+            if score >= GRADE_THRESHOLDS[index]:
+                return index
+        return 0
+
+
+class BatchScores:
+    """Scores d'un portefeuille et statistiques de leur distribution.
+
+    `scores` et `grade_codes` (index dans `GRADES`) sont des colonnes
+    alignées sur `files` ; `flags` donne, par métrique, le niveau de
+    recommandation de chaque fichier (FLAG_NONE, FLAG_MEDIUM, FLAG_HIGH).
+    """
+
+    def __init__(self, files: List[str], scores: Sequence[float], grade_codes: Sequence[int],
+                 flags: Dict[str, Sequence[int]]):
+        self.files = files
+        self.scores = scores
+        self.grade_codes = grade_codes
+        self.flags = flags
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def grades(self) -> List[str]:
+        """Retourne la note de chaque fichier."""
+        return [GRADES[code] for code in self.grade_codes]
+
+    def percentiles(self, quantiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[float, float]:
+        """Retourne les percentiles demandés de la distribution des scores."""
+        quantiles = list(quantiles)
+        if not len(self):
+            return dict.fromkeys(quantiles, 0.0)
+        if numpy is not None and isinstance(self.scores, numpy.ndarray):
+            return dict(zip(quantiles, (float(value) for value in numpy.percentile(self.scores, quantiles))))
+        ordered = sorted(self.scores)
+        return {q: _percentile(ordered, q) for q in quantiles}
+
+    def grade_histogram(self) -> Dict[str, int]:
+        """Retourne le nombre de fichiers par note, de A à F."""
+        if numpy is not None and isinstance(self.grade_codes, numpy.ndarray):
+            counts = numpy.bincount(self.grade_codes, minlength=len(GRADES)).tolist()
+        else:
+            counts = [0] * len(GRADES)
+            for code in self.grade_codes:
+                counts[code] += 1
+        return {GRADES[code]: counts[code] for code in range(len(GRADES) - 1, -1, -1)}
+
+    def recommendation_counts(self) -> Dict[str, Dict[str, int]]:
+        """Retourne, par métrique, le nombre de fichiers en alerte haute et moyenne."""
+        counts = {}
+        for name, column in self.flags.items():
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                high, medium = int((column == FLAG_HIGH).sum()), int((column == FLAG_MEDIUM).sum())
+            else:
+                high, medium = column.count(FLAG_HIGH), column.count(FLAG_MEDIUM)
+            counts[name] = {'high': high, 'medium': medium}
+        return counts
+
+    def worst(self, count: int = 10) -> List[Tuple[str, float, str]]:
+        """Retourne les `count` fichiers aux scores les plus bas (fichier, score, note).
+
+        À score égal, l'ordre des fichiers du portefeuille est conservé.
+        """
+        if count <= 0:
+            return []
+        if numpy is not None and isinstance(self.scores, numpy.ndarray):
+            indexes = numpy.argsort(self.scores, kind='stable')[:count].tolist()
+        else:
+            indexes = heapq.nsmallest(count, range(len(self)), key=self.scores.__getitem__)
+        return [(self.files[index], float(self.scores[index]), GRADES[self.grade_codes[index]])
+                for index in indexes]
+
+    def summary(self, quantiles: Iterable[float] = DEFAULT_PERCENTILES,
+                worst: int = 10) -> Dict[str, Any]:
+        """Résume la distribution des scores (sérialisable en JSON)."""
+        return {
+            'files': len(self),
+            'percentiles': {f'p{q:g}': round(value, 2) for q, value in self.percentiles(quantiles).items()},
+            'grades': self.grade_histogram(),
+            'recommendations': self.recommendation_counts(),
+            'worst': [{'file': file, 'score': round(score, 2), 'grade': grade}
+                      for file, score, grade in self.worst(worst)]
+        }
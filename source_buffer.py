@@ -0,0 +1,125 @@
+"""
+Tampon source projeté en mémoire (mmap) avec table des débuts de ligne.
+"""
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_right
+from typing import List, Dict, Iterator, Tuple
+from lexer import AUTO, DETECTION_LINES, detect_format, logical_lines
+
+NEWLINE_PATTERN = re.compile(rb'\n')
+# En-tête de division, précédé le cas échéant d'une zone de numérotation (format
+# fixe, contenu quelconque)
+DIVISION_HEADER_PATTERN = re.compile(
+    rb'^(?:[^\r\n]{6} )?[ \t]*([A-Za-z]\w*)[ \t]+DIVISION\.', re.MULTILINE
+)
+
+
+class SourceBuffer:
+    """Représentation compacte d'un fichier source COBOL.
+
+    Le fichier est projeté une seule fois en mémoire ; seule une table
+    `array` des positions de début de ligne est construite, et les
+    divisions sont conservées sous forme de plages de lignes. Le texte
+    d'une ligne n'est décodé qu'à la demande (règles, exporteurs).
+    """
+
+    def __init__(self, file_path: str, encoding: str = 'utf-8', source_format: str = AUTO):
+        self.file_path = file_path
+        self.encoding = encoding
+        try:
+            self._file = open(file_path, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Le fichier {file_path} n'existe pas")
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.data = b''
+        self.offsets = self._build_offsets()
+        self.divisions = self._locate_divisions()
+        if source_format == AUTO:
+            head = (self.line(number) for number in range(1, min(len(self), DETECTION_LINES) + 1))
+            source_format = detect_format(head)
+        self.source_format = source_format
+
+    def _build_offsets(self) -> array:
+        """Construit la table des positions de début de chaque ligne."""
+        offsets = array('I' if self.size < 2 ** 32 else 'Q')
+        if not self.size:
+            return offsets
+        offsets.append(0)
+        offsets.extend(match.end() for match in NEWLINE_PATTERN.finditer(self.data))
+        # Un saut de ligne final n'ouvre pas de nouvelle ligne
+        if offsets[-1] == self.size:
+            offsets.pop()
+        return offsets
+
+    def _locate_divisions(self) -> Dict[str, List[Tuple[int, int]]]:
+        """Retourne, par division, les plages [début, fin) d'index de lignes."""
+        headers = [
+            (self.line_index(match.start()), match.group(1).decode('ascii').upper())
+            for match in DIVISION_HEADER_PATTERN.finditer(self.data)
+        ]
+        divisions: Dict[str, List[Tuple[int, int]]] = {}
+        for position, (index, name) in enumerate(headers):
+            end = headers[position + 1][0] if position + 1 < len(headers) else len(self)
+            divisions.setdefault(name, []).append((index + 1, end))
+        return divisions
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __enter__(self) -> 'SourceBuffer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Libère la projection et le descripteur de fichier."""
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def line_index(self, offset: int) -> int:
+        """Retourne l'index (base 0) de la ligne contenant une position."""
+        return bisect_right(self.offsets, offset) - 1
+
+    def raw_line(self, index: int) -> bytes:
+        """Retourne les octets d'une ligne (index base 0), fin de ligne incluse."""
+        end = self.offsets[index + 1] if index + 1 < len(self.offsets) else self.size
+        return self.data[self.offsets[index]:end]
+
+    def line(self, line_number: int) -> str:
+        """Décode une ligne à la demande (numéro base 1, comme le parseur)."""
+        return self.raw_line(line_number - 1).decode(self.encoding).rstrip('\r\n')
+
+    def _iter_range(self, start: int, end: int) -> Iterator[Tuple[int, str]]:
+        """Produit les lignes de code (numéro, texte) d'une plage d'index."""
+        data, offsets, encoding = self.data, self.offsets, self.encoding
+        count = len(offsets)
+        numbered = (
+            (index + 1, data[offsets[index]:offsets[index + 1] if index + 1 < count else self.size]
+             .decode(encoding))
+            for index in range(start, end)
+        )
+        return logical_lines(numbered, self.source_format)
+
+    def iter_division(self, name: str) -> Iterator[Tuple[int, str]]:
+        """Produit les lignes utiles (numéro, texte) d'une division."""
+        for start, end in self.divisions.get(name, ()):
+            yield from self._iter_range(start, end)
+
+    def iter_content(self) -> Iterator[Tuple[str, int, str]]:
+        """Produit (division, numéro, ligne) dans l'ordre du fichier."""
+        ranges = sorted(
+            (start, end, name)
+            for name, spans in self.divisions.items()
+            for start, end in spans
+        )
+        for start, end, name in ranges:
+            for line_number, line in self._iter_range(start, end):
+                yield name, line_number, line
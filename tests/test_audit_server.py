@@ -0,0 +1,99 @@
+"""
+Tests pour le démon d'audit et son client léger.
+"""
+import json
+import os
+import threading
+import pytest
+from click.testing import CliRunner
+from audit_client import DaemonClient, parse_address
+from audit_server import AuditServer
+from cli import cli
+from cobol_analyzer import CobolAnalyzer
+from exceptions import DaemonError
+from exporters import JsonExporter
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+def _without_timestamp(report: str) -> dict:
+    document = json.loads(report)
+    del document['metadata']['timestamp']
+    return document
+
+@pytest.fixture
+def daemon(tmp_path):
+    server = AuditServer(str(tmp_path / 'daemon.sock'), jobs=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert server.ready.wait(30)
+    client = DaemonClient(server.address)
+    yield client
+    client.shutdown()
+    thread.join(30)
+    assert not os.path.exists(server.address)
+
+def test_parse_address():
+    assert parse_address('/tmp/daemon.sock') == ('/tmp/daemon.sock', None, None)
+    assert parse_address('http://127.0.0.1:8765') == (None, '127.0.0.1', 8765)
+
+def test_daemon_report_matches_json_exporter(daemon):
+    assert daemon.available()
+    expected = JsonExporter.export(CobolAnalyzer().analyze_file(SAMPLE), SAMPLE)
+    assert _without_timestamp(daemon.audit(SAMPLE)) == _without_timestamp(expected)
+    assert daemon.health()['requests'] == 1
+
+    with pytest.raises(DaemonError):
+        daemon.audit(SAMPLE + '.absent')
+
+def test_cli_uses_running_daemon(daemon, tmp_path):
+    output = tmp_path / 'report.json'
+    result = CliRunner().invoke(cli, ['audit', SAMPLE, '-f', 'json', '-o', str(output),
+                                      '--daemon-address', daemon.address])
+    assert result.exit_code == 0, result.output
+    assert daemon.health()['requests'] == 1
+    assert _without_timestamp(output.read_text(encoding='utf-8'))['summary']['total_issues'] > 0
+
+def test_http_daemon_on_localhost():
+    server = AuditServer(port=0, jobs=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert server.ready.wait(30)
+    client = DaemonClient(server.address)
+    try:
+        assert server.address.startswith('http://127.0.0.1:')
+        assert 'issues' in json.loads(client.audit(SAMPLE))
+    finally:
+        client.shutdown()
+        thread.join(30)
+
+def test_missing_daemon_is_not_available(tmp_path):
+    assert not DaemonClient(str(tmp_path / 'absent.sock')).available()
+
+def test_cli_passes_cache_to_daemon(daemon, tmp_path):
+    cache_dir = tmp_path / 'cache'
+    result = CliRunner().invoke(cli, ['audit', SAMPLE, '-f', 'json', '-o', str(tmp_path / 'report.json'),
+                                      '--cache', '--cache-dir', str(cache_dir),
+                                      '--daemon-address', daemon.address])
+    assert result.exit_code == 0, result.output
+    assert daemon.health()['requests'] == 1
+    assert (cache_dir / 'results.sqlite3').exists()
+
+def test_stalled_client_is_disconnected(tmp_path):
+    import socket
+    server = AuditServer(str(tmp_path / 'daemon.sock'), jobs=1, request_timeout=0.2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    assert server.ready.wait(30)
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(10)
+            connection.connect(server.address)
+            # En-têtes jamais terminés : le démon répond 408 et ferme la connexion
+            connection.sendall(b'POST /audit HTTP/1.1\r\n')
+            response = b''
+            while chunk := connection.recv(65536):
+                response += chunk
+        assert response.startswith(b'HTTP/1.1 408')
+    finally:
+        DaemonClient(server.address).shutdown()
+        thread.join(30)
@@ -0,0 +1,118 @@
+"""
+Tests pour les empreintes de problèmes et le référentiel (baseline).
+"""
+import json
+import os
+import shutil
+import pytest
+from click.testing import CliRunner
+from baseline import Baseline, BaselineFilter, SourceScopes, fingerprint_issues
+from cli import cli
+from cobol_analyzer import CobolAnalyzer
+from issues import Issue, Severity
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+PROGRAM = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. BASE01.
+       PROCEDURE DIVISION.
+       PREMIERE SECTION.
+           GO TO FIN.
+           GO  TO FIN.
+       SECONDE SECTION.
+           GO TO FIN.
+       FIN.
+           STOP RUN.
+"""
+
+def _goto(line):
+    return Issue('best_practice', Severity.WARNING, 'Utilisation de GOTO détectée', line)
+
+def test_scopes_and_normalized_content(tmp_path):
+    source = tmp_path / 'BASE01.cbl'
+    source.write_text(PROGRAM.replace('       PROC', '000300 PROC'))
+    scopes = SourceScopes(str(source))
+    assert [scopes.scope(line) for line in (2, 3, 5, 8, 10)] == [
+        'IDENTIFICATION DIVISION', 'PROCEDURE DIVISION', 'PREMIERE SECTION', 'SECONDE SECTION',
+        'SECONDE SECTION']
+    assert scopes.content(6) == scopes.content(5) == 'GO TO FIN.'
+    assert scopes.content(None) == scopes.content(99) == ''
+    scopes.close()
+
+def test_fingerprints_ignore_line_numbers(tmp_path):
+    source = tmp_path / 'BASE01.cbl'
+    source.write_text(PROGRAM)
+    before = fingerprint_issues([_goto(5), _goto(6), _goto(8)], str(source))
+    # Identiques hors du rang, mais distinctes ; la section change l'empreinte
+    assert len(set(before)) == 3
+    source.write_text(PROGRAM.replace('PROCEDURE DIVISION.\n', 'PROCEDURE DIVISION.\n      *> ajout\n\n'))
+    assert fingerprint_issues([_goto(7), _goto(8), _goto(10)], str(source)) == before
+    # Même code dans un autre programme : empreintes différentes
+    (tmp_path / 'AUTRE.cbl').write_text(source.read_text().replace('BASE01', 'AUTRE'))
+    assert not set(fingerprint_issues([_goto(7)], str(tmp_path / 'AUTRE.cbl'))) & set(before)
+
+def test_fingerprints_use_program_id(tmp_path):
+    for application, program_id in (('app1', 'APP1MAIN'), ('app2', 'APP2MAIN'), ('copie', 'APP1MAIN')):
+        (tmp_path / application).mkdir()
+        (tmp_path / application / 'MAIN.cbl').write_text(PROGRAM.replace('BASE01', program_id))
+    first, second, moved = (fingerprint_issues([_goto(5)], str(tmp_path / application / 'MAIN.cbl'))
+                            for application in ('app1', 'app2', 'copie'))
+    # Deux programmes MAIN.cbl distincts ne partagent pas leurs empreintes
+    assert first != second
+    # Le même programme audité depuis un autre répertoire garde les siennes
+    assert moved == first
+    scopes = SourceScopes(str(tmp_path / 'app1' / 'MAIN.cbl'))
+    assert scopes.program == 'APP1MAIN'
+    scopes.close()
+
+def test_baseline_file_round_trip(tmp_path):
+    path = str(tmp_path / 'connus.baseline')
+    values = [0, 1, 2 ** 64 - 1] + list(range(10, 100000, 7))
+    assert Baseline.save(path, values + values[:10]) == len(values)
+    assert os.path.getsize(path) == 8 + 8 * len(values)
+    loaded = Baseline.load(path)
+    assert len(loaded) == len(values) and 2 ** 64 - 1 in loaded and 3 not in loaded
+
+    (tmp_path / 'texte.baseline').write_text('pas un référentiel')
+    with pytest.raises(ValueError):
+        Baseline.load(str(tmp_path / 'texte.baseline'))
+
+def test_filter_keeps_only_new_issues(tmp_path):
+    source = tmp_path / 'sample.cbl'
+    shutil.copy(SAMPLE, source)
+    collector = BaselineFilter(collect=True)
+    results = collector.apply(CobolAnalyzer().analyze_file(str(source)), str(source))
+    known = Baseline(collector.collected)
+    assert len(known) == len(results['issues'])
+
+    # Une ligne ajoutée en tête décale tout, un GOTO est ajouté en fin de section
+    lines = source.read_text().splitlines(keepends=True)
+    lines.insert(33, '               GOTO SKIP-PROCESS\n')
+    lines.insert(2, '      * nouvelle ligne de commentaire\n')
+    source.write_text(''.join(lines))
+    baseline = BaselineFilter(known)
+    new = baseline.apply(CobolAnalyzer().analyze_file(str(source)), str(source))['issues']
+    assert [(issue.rule, issue.line_number) for issue in new] == [('best_practice', 35)]
+    assert baseline.suppressed == len(results['issues'])
+
+def test_cli_baseline_workflow(tmp_path):
+    (tmp_path / 'src').mkdir()
+    shutil.copy(SAMPLE, tmp_path / 'src' / 'a.cbl')
+    shutil.copy(SAMPLE, tmp_path / 'src' / 'b.cbl')
+    reference = str(tmp_path / 'connus.baseline')
+    runner = CliRunner()
+    result = runner.invoke(cli, ['audit-dir', str(tmp_path / 'src'), '-j', '1', '-o', str(tmp_path / 'avant.json'),
+                                 '--write-baseline', reference])
+    assert result.exit_code == 0, result.output
+    assert len(Baseline.load(reference)) > 0
+
+    result = runner.invoke(cli, ['audit-dir', str(tmp_path / 'src'), '-j', '1', '-f', 'ndjson',
+                                 '--baseline', reference])
+    assert result.exit_code == 0, result.output
+    assert result.stdout.strip() == ''
+
+    result = runner.invoke(cli, ['audit', str(tmp_path / 'src' / 'a.cbl'), '-f', 'json', '--no-daemon',
+                                 '--baseline', reference, '-o', str(tmp_path / 'a.json')])
+    assert result.exit_code == 0, result.output
+    with open(tmp_path / 'a.json', encoding='utf-8') as f:
+        assert json.load(f)['issues'] == []
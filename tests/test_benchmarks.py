@@ -0,0 +1,56 @@
+"""
+Tests pour le générateur de programmes et le banc de performance.
+"""
+from io import StringIO
+from benchmarks.generator import ProgramGenerator, ProgramProfile, generate_program
+from benchmarks.runner import check_startup, compare_to_baseline, measure_file
+from cobol_analyzer import CobolAnalyzer
+
+def test_generator_is_deterministic():
+    first, second = StringIO(), StringIO()
+    ProgramGenerator(ProgramProfile(lines=500, seed=7)).write(first)
+    ProgramGenerator(ProgramProfile(lines=500, seed=7)).write(second)
+    assert first.getvalue() == second.getvalue()
+
+    other = StringIO()
+    ProgramGenerator(ProgramProfile(lines=500, seed=8)).write(other)
+    assert other.getvalue() != first.getvalue()
+
+def test_generated_program_matches_profile(tmp_path):
+    path = str(tmp_path / 'bench.cbl')
+    profile = ProgramProfile(lines=2_000, goto_density=0.1)
+    lines = generate_program(path, profile)
+    assert abs(lines - 2_000) < 200
+
+    metrics = CobolAnalyzer().analyze_file(path)['metrics']
+    assert metrics['procedures'] == profile.sections
+    assert metrics['nested_conditions'] >= 1
+
+def test_measure_file_reports_each_stage(tmp_path):
+    path = str(tmp_path / 'bench.cbl')
+    generate_program(path, ProgramProfile(lines=300))
+    report = measure_file(path)
+    stages = [stage['stage'] for stage in report['stages']]
+    assert stages[0] == 'parse'
+    assert 'analyze:PROCEDURE' in stages and 'export:json' in stages
+    assert all(stage['peak_rss_mb'] > 0 for stage in report['stages'])
+
+def test_compare_to_baseline_flags_slow_stages():
+    baseline = {'1k': {'stages': [
+        {'stage': 'parse', 'seconds': 0.5, 'lines_per_sec': 1000},
+        {'stage': 'export:json', 'seconds': 0.5, 'lines_per_sec': 1000},
+        {'stage': 'analyze:IDENTIFICATION', 'seconds': 0.0001, 'lines_per_sec': 1000},
+    ]}}
+    reports = {'1k': {'stages': [
+        {'stage': 'parse', 'seconds': 0.6, 'lines_per_sec': 800},
+        {'stage': 'export:json', 'seconds': 1.0, 'lines_per_sec': 500},
+        {'stage': 'analyze:IDENTIFICATION', 'seconds': 0.001, 'lines_per_sec': 100},
+    ]}}
+    regressions = compare_to_baseline(reports, baseline, threshold=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('1k export:json')
+
+def test_check_startup_against_target():
+    report = {'stages': [{'stage': 'startup:audit-json', 'seconds': 0.5}]}
+    assert check_startup(report, target=0.35)
+    assert not check_startup(report, target=1.0)
@@ -0,0 +1,85 @@
+"""
+Tests pour l'index des appels entre programmes.
+"""
+import pytest
+from call_graph import CallGraphIndex
+from cobol_analyzer import CobolAnalyzer
+from portfolio import PortfolioAuditor
+
+MAIN = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. MAINPGM.
+       DATA DIVISION.
+       WORKING-STORAGE SECTION.
+       01  WS-PGM  PIC X(8) VALUE 'SUBB'.
+       PROCEDURE DIVISION.
+           CALL 'SUBA' USING WS-PGM
+           CALL WS-PGM
+           MOVE 'SUBC' TO WS-PGM
+           STOP RUN.
+"""
+
+def subprogram(name):
+    return (f"       IDENTIFICATION DIVISION.\n       PROGRAM-ID. {name}.\n"
+            f"       PROCEDURE DIVISION.\n           GOBACK.\n")
+
+@pytest.fixture
+def index(tmp_path):
+    index = CallGraphIndex(str(tmp_path / 'calls.sqlite3'))
+    yield index
+    index.close()
+
+def test_analyzer_extracts_static_and_dynamic_calls(tmp_path):
+    program = tmp_path / 'main.cbl'
+    program.write_text(MAIN)
+    calls = CobolAnalyzer().analyze_file(str(program))['calls']
+    assert calls == {'program_id': 'MAINPGM', 'static': ['SUBA'], 'dynamic': {'WS-PGM': ['SUBB', 'SUBC']}}
+
+def test_queries(index):
+    index.update('/src/main.cbl', {'program_id': 'MAINPGM', 'static': ['SUBA'],
+                                   'dynamic': {'WS-PGM': ['SUBB'], 'WS-OTHER': []}})
+    index.update('/src/suba.cbl', {'program_id': 'SUBA', 'static': [], 'dynamic': {}})
+    index.update('/src/lost.cbl', {'program_id': None, 'static': ['SUBA'], 'dynamic': {}})
+
+    assert [caller[0] for caller in index.callers('suba')] == ['LOST', 'MAINPGM']
+    assert index.callees('MAINPGM') == [(None, 'WS-OTHER'), ('SUBA', None), ('SUBB', 'WS-PGM')]
+    assert index.unreachable() == ['LOST', 'MAINPGM']
+    assert index.unreachable(roots=['MAINPGM']) == ['LOST']
+    assert index.unresolved() == ['SUBB']
+
+def test_update_replaces_only_the_file_edges(index):
+    index.update('/src/a.cbl', {'program_id': 'A', 'static': ['X', 'Y'], 'dynamic': {}})
+    index.update('/src/b.cbl', {'program_id': 'B', 'static': ['X'], 'dynamic': {}})
+    index.update('/src/a.cbl', {'program_id': 'A', 'static': ['Y'], 'dynamic': {}})
+    assert [caller[0] for caller in index.callers('X')] == ['B']
+    assert index.callees('A') == [('Y', None)]
+
+def test_portfolio_run_builds_and_prunes_index(tmp_path):
+    (tmp_path / 'main.cbl').write_text(MAIN)
+    for name in ('SUBA', 'SUBB', 'ORPHAN'):
+        (tmp_path / f'{name.lower()}.cbl').write_text(subprogram(name))
+    path = str(tmp_path / 'index' / 'calls.sqlite3')
+
+    PortfolioAuditor(jobs=1, call_index=path).audit_directory(str(tmp_path))
+    (tmp_path / 'orphan.cbl').unlink()
+    PortfolioAuditor(jobs=1, call_index=path).audit_directory(str(tmp_path))
+
+    index = CallGraphIndex(path)
+    assert sorted(index.programs()) == ['MAINPGM', 'SUBA', 'SUBB']
+    assert index.unreachable() == ['MAINPGM']
+    assert index.unresolved() == ['SUBC']
+    index.close()
+
+def test_copybooks_are_not_indexed_as_programs(tmp_path):
+    (tmp_path / 'main.cbl').write_text(MAIN)
+    (tmp_path / 'REC.cpy').write_text("       01  WS-REC  PIC X.\n")
+    path = str(tmp_path / 'calls.sqlite3')
+    # Copybook indexé par une version antérieure : retiré à l'exécution suivante
+    index = CallGraphIndex(path)
+    index.update(str(tmp_path / 'REC.cpy'), {'program_id': None, 'static': [], 'dynamic': {}})
+    index.close()
+
+    PortfolioAuditor(jobs=1, call_index=path).audit_directory(str(tmp_path))
+    index = CallGraphIndex(path)
+    assert sorted(index.programs()) == ['MAINPGM']
+    assert index.unreachable() == ['MAINPGM']
+    index.close()
@@ -37,4 +37,17 @@ def test_analyze_file(sample_file):
 def test_nonexistent_file():
     analyzer = CobolAnalyzer()
     with pytest.raises(FileNotFoundError):
-        analyzer.analyze_file('nonexistent.cbl') 
\ No newline at end of file
+        analyzer.analyze_file('nonexistent.cbl') 
+
+def test_streaming_matches_buffered_analysis(sample_file):
+    buffered = CobolAnalyzer().analyze_file(sample_file)
+    streamed = CobolAnalyzer().analyze_file(sample_file, streaming=True)
+    assert streamed == buffered
+
+def test_rule_selection_limits_issues(sample_file):
+    full = CobolAnalyzer().analyze_file(sample_file)
+    only_goto = CobolAnalyzer(rules=['goto']).analyze_file(sample_file)
+    assert only_goto['issues'] and all('GOTO' in issue.message for issue in only_goto['issues'])
+    skipped = CobolAnalyzer(skip_rules=['goto']).analyze_file(sample_file)
+    assert len(skipped['issues']) == len(full['issues']) - len(only_goto['issues'])
+    assert CobolAnalyzer(rules=['goto'])._cache_context() != CobolAnalyzer()._cache_context()
@@ -0,0 +1,116 @@
+"""
+Tests pour le graphe de flot de contrôle de la division PROCEDURE.
+"""
+from control_flow import ControlFlowBuilder, FALLTHROUGH, GOTO, PERFORM_THRU
+from rules import ControlFlowCheck, DeadCodeCheck, DeadParagraphCheck
+from rule_engine import RuleEngine
+
+def build(lines):
+    return ControlFlowBuilder().add_lines(lines)
+
+def dead_names(graph):
+    return [graph.nodes[node].name for node in graph.unreachable()]
+
+def test_paragraphs_and_fall_through():
+    graph = build([
+        "MAIN-PARA.",
+        "    MOVE A TO B",
+        "        C.",
+        "NEXT-PARA.",
+        "    DISPLAY B.",
+        "    EXIT.",
+    ])
+    assert [node.name for node in graph.nodes[1:]] == ['MAIN-PARA', 'NEXT-PARA']
+    assert (2, FALLTHROUGH) in graph.edges[1]
+    assert dead_names(graph) == []
+
+def test_unconditional_goto_stops_fall_through():
+    graph = build([
+        "START-PARA.",
+        "    GO TO LAST-PARA.",
+        "SKIPPED-PARA.",
+        "    DISPLAY 'X'.",
+        "LAST-PARA.",
+        "    STOP RUN.",
+        "ORPHAN-PARA.",
+        "    DISPLAY 'Y'.",
+    ])
+    assert (3, GOTO) in graph.edges[1]
+    assert dead_names(graph) == ['SKIPPED-PARA', 'ORPHAN-PARA']
+
+def test_conditional_goto_keeps_fall_through():
+    graph = build([
+        "START-PARA.",
+        "    IF A = 1",
+        "        GO TO LAST-PARA",
+        "    END-IF.",
+        "MIDDLE-PARA.",
+        "    GOBACK.",
+        "LAST-PARA.",
+        "    GOBACK.",
+    ])
+    assert dead_names(graph) == []
+
+def test_performed_section_does_not_fall_through():
+    graph = build([
+        "MAIN SECTION.",
+        "    PERFORM WORK",
+        "    STOP RUN.",
+        "WORK SECTION.",
+        "WORK-STEP.",
+        "    DISPLAY 'W'.",
+        "UNUSED SECTION.",
+        "    DISPLAY 'U'.",
+    ])
+    assert dead_names(graph) == ['UNUSED']
+
+def test_perform_thru_covers_range():
+    graph = build([
+        "MAIN-PARA.",
+        "    PERFORM STEP-1 THRU STEP-EXIT",
+        "    STOP RUN.",
+        "STEP-1.",
+        "    GO TO STEP-EXIT.",
+        "STEP-2.",
+        "    DISPLAY 'S'.",
+        "STEP-EXIT.",
+        "    EXIT.",
+    ])
+    assert [target for target, kind in graph.edges[1] if kind == PERFORM_THRU] == [2, 3, 4]
+    assert dead_names(graph) == []
+
+def test_declaratives_and_alter_are_roots_and_edges():
+    graph = build([
+        "DECLARATIVES.",
+        "ERR-HANDLER SECTION.",
+        "    USE AFTER ERROR PROCEDURE ON INFILE.",
+        "END DECLARATIVES.",
+        "MAIN-PARA.",
+        "    ALTER SWITCH-PARA TO PROCEED TO TARGET-PARA.",
+        "    GO TO SWITCH-PARA.",
+        "SWITCH-PARA.",
+        "    GO TO.",
+        "TARGET-PARA.",
+        "    STOP RUN.",
+    ])
+    assert dead_names(graph) == []
+
+def test_dead_code_check_reports_sections_and_paragraphs():
+    control_flow = ControlFlowCheck()
+    check = DeadCodeCheck(control_flow)
+    paragraphs = DeadParagraphCheck(check)
+    engine = RuleEngine([control_flow, check, paragraphs])
+    engine.run([
+        "MAIN SECTION.",
+        "    STOP RUN.",
+        "LOST-PARA.",
+        "    DISPLAY 'L'.",
+        "DEAD SECTION.",
+        "DEAD-PARA.",
+        "    DISPLAY 'D'.",
+    ])
+    assert check.dead_sections == ['DEAD SECTION.']
+    assert check.dead_paragraphs == ['LOST-PARA']
+    # Sections et paragraphes sont comptés dans deux métriques distinctes
+    assert engine.metrics() == {'dead_code_sections': 1, 'dead_code_paragraphs': 1}
+    assert [issue.line_number for issue in check.issues] == [2, 4]
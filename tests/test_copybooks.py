@@ -0,0 +1,78 @@
+"""
+Tests pour l'expansion des instructions COPY.
+"""
+import os
+import pytest
+from copybooks import CopybookExpander, load_copybook, parse_replacing
+from cobol_analyzer import CobolAnalyzer
+
+@pytest.fixture
+def copy_dir(tmp_path):
+    (tmp_path / 'CUSTREC.cpy').write_text(
+        "      * Enregistrement client\n"
+        "       01  :PFX:-CUSTOMER.\n"
+        "           05  :PFX:-ID     PIC 9(6).\n"
+        "           COPY ADDRESS.\n"
+    )
+    (tmp_path / 'ADDRESS.cpy').write_text("           05  ADDR-LINE PIC X(30).\n")
+    return tmp_path
+
+def expand(expander, lines):
+    stream = [('DATA', number, line) for number, line in enumerate(lines, 1)]
+    return [line for _, _, line in expander.expand(stream)]
+
+def test_copy_replacing_and_nested_copy(copy_dir):
+    expander = CopybookExpander([str(copy_dir)])
+    lines = expand(expander, ["01 WS-A PIC X.", "COPY CUSTREC REPLACING ==:PFX:== BY ==WS==."])
+    assert lines == [
+        "01 WS-A PIC X.",
+        "01  WS-CUSTOMER.",
+        "05  WS-ID     PIC 9(6).",
+        "05  ADDR-LINE PIC X(30)."
+    ]
+
+def test_multiline_copy_statement(copy_dir):
+    expander = CopybookExpander([str(copy_dir)])
+    lines = expand(expander, ["COPY CUSTREC", "REPLACING ==:PFX:== BY ==IN==."])
+    assert lines[0] == "01  IN-CUSTOMER."
+
+def test_unresolved_copy_is_kept(copy_dir):
+    expander = CopybookExpander([str(copy_dir)])
+    assert expand(expander, ["COPY MISSING."]) == ["COPY MISSING."]
+    assert expander.unresolved == ['MISSING']
+
+def test_word_replacing_matches_whole_words():
+    (pattern, target), = parse_replacing("WS-A BY WS-B")
+    assert pattern.sub(target, "MOVE WS-A TO WS-AMOUNT") == "MOVE WS-B TO WS-AMOUNT"
+
+def test_replacing_text_is_not_a_regex_template(tmp_path):
+    (tmp_path / 'REC.cpy').write_text("           05  WS-TAG PIC X(4) VALUE TAG.\n")
+    expander = CopybookExpander([str(tmp_path)])
+    lines = expand(expander, ['COPY REC REPLACING TAG BY "A\\1B".'])
+    assert lines == ['05  WS-TAG PIC X(4) VALUE "A\\1B".']
+
+def test_copybook_cache_is_keyed_by_mtime(copy_dir):
+    path = str(copy_dir / 'ADDRESS.cpy')
+    first = load_copybook(path)
+    assert load_copybook(path) is first
+    (copy_dir / 'ADDRESS.cpy').write_text("           05  ADDR-ZIP PIC X(5).\n")
+    os.utime(path, ns=(0, 10 ** 9))
+    assert load_copybook(path) == ("05  ADDR-ZIP PIC X(5).",)
+
+@pytest.mark.parametrize('options', [{}, {'streaming': True}, {'mapped': True}])
+def test_analyzer_counts_copybook_data_items(copy_dir, tmp_path, options):
+    program = tmp_path / 'prog.cbl'
+    program.write_text(
+        "       IDENTIFICATION DIVISION.\n"
+        "       PROGRAM-ID. PROG.\n"
+        "       DATA DIVISION.\n"
+        "       WORKING-STORAGE SECTION.\n"
+        "       COPY CUSTREC REPLACING ==:PFX:== BY ==WS==.\n"
+        "       PROCEDURE DIVISION.\n"
+        "           MOVE 1 TO WS-ID.\n"
+    )
+    without = CobolAnalyzer().analyze_file(str(program), **options)
+    results = CobolAnalyzer([str(copy_dir)]).analyze_file(str(program), **options)
+    assert without['metrics']['data_items'] == 0
+    assert results['metrics']['data_items'] == 3
+    assert results['metrics']['unused_vars'] == 2
@@ -0,0 +1,51 @@
+"""
+Tests pour l'export incrémental des résultats.
+"""
+import json
+import os
+from io import StringIO
+from cobol_analyzer import CobolAnalyzer
+from exporters import JsonExporter, NdjsonExporter, CsvExporter
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+def test_json_write_is_valid_and_resolves_lines():
+    results = CobolAnalyzer().analyze_file(SAMPLE)
+    output = StringIO()
+    JsonExporter.write(results, SAMPLE, output, detailed=True)
+
+    data = json.loads(output.getvalue())
+    assert len(data['issues']) == data['summary']['total_issues'] == len(results['issues'])
+    assert 'detailed_analysis' in data
+    goto = next(issue for issue in data['issues'] if issue['type'] == 'best_practice')
+    assert goto['line'].startswith('GO')
+
+def test_exported_line_text_drops_fixed_format_areas():
+    # Sans numérotation (colonnes 1-6) ni identification (73-80), comme pour les règles
+    sequenced = os.path.join(os.path.dirname(__file__), 'fixtures', 'sequenced.cbl')
+    results = CobolAnalyzer().analyze_file(sequenced)
+    data = json.loads(JsonExporter.export(results, sequenced))
+    assert [issue['line'] for issue in data['issues']] == ['GOTO P-END.']
+    record = json.loads(NdjsonExporter.export(results, sequenced).splitlines()[0])
+    assert record['line'] == 'GOTO P-END.'
+
+def test_json_write_without_issues():
+    results = CobolAnalyzer().analyze_file(SAMPLE)
+    results['issues'] = []
+    data = json.loads(JsonExporter.export(results, SAMPLE))
+    assert data['issues'] == []
+    assert data['summary']['severity_counts'] == {'ERROR': 0, 'WARNING': 0, 'INFO': 0}
+
+def test_ndjson_has_one_issue_per_line():
+    results = CobolAnalyzer().analyze_file(SAMPLE)
+    lines = NdjsonExporter.export(results, SAMPLE).splitlines()
+    assert len(lines) == len(results['issues'])
+    records = [json.loads(line) for line in lines]
+    assert [record['line_number'] for record in records] == [i.line_number for i in results['issues']]
+
+def test_csv_write_lists_issues():
+    results = CobolAnalyzer().analyze_file(SAMPLE)
+    output = StringIO()
+    CsvExporter.write(results, SAMPLE, output)
+    assert 'Line Number' in output.getvalue()
+    assert output.getvalue().count('magic_number') == sum(i.rule == 'magic_number' for i in results['issues'])
@@ -0,0 +1,56 @@
+"""
+Tests pour la sélection des fichiers modifiés depuis une révision git.
+"""
+import os
+import shutil
+import subprocess
+import pytest
+from git_changes import ChangeSet, parse_hunk_ranges, filter_new_issues
+from issues import Issue, Severity
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='git indisponible')
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+                   cwd=repo, check=True, capture_output=True)
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, 'init', '-q')
+    (tmp_path / 'a.cbl').write_text("       PROCEDURE DIVISION.\n           DISPLAY 1.\n")
+    (tmp_path / 'b.cbl').write_text("       DATA DIVISION.\n       COPY REC.\n")
+    (tmp_path / 'REC.cpy').write_text("       01  X PIC 9.\n")
+    git(tmp_path, 'add', '-A')
+    git(tmp_path, 'commit', '-qm', 'init')
+    return tmp_path
+
+def test_parse_hunk_ranges():
+    diff = "@@ -3,0 +4,2 @@\n+a\n+b\n@@ -10 +12 @@\n-x\n+y\n@@ -20,3 +22,0 @@\n"
+    assert parse_hunk_ranges(diff) == [(4, 5), (12, 12)]
+
+def test_collect_changed_programs_and_copybook_includers(repo):
+    with open(repo / 'a.cbl', 'a') as file:
+        file.write("           DISPLAY 12345.\n")
+    (repo / 'REC.cpy').write_text("       01  X PIC 99.\n")
+    (repo / 'c.cbl').write_text("       IDENTIFICATION DIVISION.\n")
+    git(repo, 'add', '-A')
+
+    selection = ChangeSet('HEAD', str(repo)).collect()
+    root = os.path.realpath(repo)
+    assert selection == {
+        os.path.join(root, 'a.cbl'): [(3, 3)],
+        os.path.join(root, 'b.cbl'): [(2, 2)],
+        os.path.join(root, 'c.cbl'): None,
+    }
+
+def test_filter_new_issues():
+    kept = Issue('goto', Severity.WARNING, 'GOTO', 3, file='a.cbl')
+    new = Issue('structure', Severity.ERROR, 'Division manquante', file='new.cbl')
+    results = {'issues': [
+        kept,
+        Issue('goto', Severity.WARNING, 'GOTO', 9, file='a.cbl'),
+        Issue('structure', Severity.ERROR, 'Division manquante', file='a.cbl'),
+        new,
+    ], 'metrics': {}}
+    filtered = filter_new_issues(results, {'a.cbl': [(1, 5)], 'new.cbl': None})
+    assert filtered['issues'] == [kept, new]
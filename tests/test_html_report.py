@@ -0,0 +1,82 @@
+"""
+Tests pour le tableau de bord HTML d'un portefeuille.
+"""
+import json
+import os
+import re
+import shutil
+from click.testing import CliRunner
+from cli import cli
+from html_report import SHARD_CALLBACK, HtmlDashboard
+from issues import Issue, Severity
+from scoring import AuditScorer
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+def _page_data(index_path):
+    with open(index_path, encoding='utf-8') as f:
+        page = f.read()
+    return json.loads(re.search(r'const DATA = (.*);\n', page).group(1))
+
+def _shard(directory, number):
+    with open(os.path.join(directory, 'issues', f'shard-{number:05d}.js'), encoding='utf-8') as f:
+        content = f.read()
+    match = re.fullmatch(SHARD_CALLBACK + r'\((\d+),(.*)\);\n', content, re.S)
+    assert int(match.group(1)) == number
+    return json.loads(match.group(2))
+
+def _issues(file, count, rule='goto_usage', severity=Severity.WARNING):
+    return [Issue(rule, severity, f'Problème {index}', index + 1, file=file) for index in range(count)]
+
+def test_issues_are_split_into_shards(tmp_path):
+    dashboard = HtmlDashboard(str(tmp_path), shard_size=4)
+    dashboard.write_issues(_issues('A.cbl', 5))
+    dashboard.write_issues([])
+    dashboard.write_issues(_issues('C.cbl', 3, 'magic_number', Severity.INFO))
+    results = {'metrics': {}, 'errors': [], 'files': [
+        {'file': 'A.cbl', 'metrics': {'complexity': 12}, 'issue_count': 5},
+        {'file': 'B.cbl', 'metrics': {}, 'issue_count': 0},
+        {'file': 'C.cbl', 'metrics': {'dead_code_sections': 1}, 'issue_count': 3}]}
+    data = _page_data(dashboard.finish(results, str(tmp_path)))
+
+    assert dashboard.shard_count == 2 and data['issueCount'] == 8
+    rows = _shard(str(tmp_path), 0) + _shard(str(tmp_path), 1)
+    assert [row[4] for row in rows[:5]] == [f'Problème {index}' for index in range(5)]
+    assert rows[5][:4] == [1, 1, int(Severity.INFO), 'magic_number']
+    # Plage [premier problème, nombre] et score d'AuditScorer par programme
+    programs = {program[0]: program for program in data['programs']}
+    assert programs['A.cbl'][1:] == [*AuditScorer.calculate_score({'complexity': 12}), 5, 0]
+    assert programs['B.cbl'][3] == 0
+    assert programs['C.cbl'][3:] == [3, 5]
+    assert data['rules'] == [['goto_usage', [0, 5, 0]], ['magic_number', [3, 0, 0]]]
+    assert sum(data['grades'].values()) == 3
+
+def test_page_escapes_embedded_data(tmp_path):
+    results = {'metrics': {}, 'issues': _issues('<b>.cbl', 1)}
+    HtmlDashboard.write(results, '</script><b>.cbl', str(tmp_path))
+    with open(tmp_path / 'index.html', encoding='utf-8') as f:
+        page = f.read()
+    assert page.count('</script>') == 1 and '<b>' not in page
+    assert _page_data(str(tmp_path / 'index.html'))['programs'][0][0] == '<b>.cbl'
+
+def test_stale_shards_are_removed(tmp_path):
+    HtmlDashboard.write({'metrics': {}, 'issues': _issues('A.cbl', 10)}, 'A.cbl', str(tmp_path), shard_size=2)
+    HtmlDashboard.write({'metrics': {}, 'issues': _issues('A.cbl', 1)}, 'A.cbl', str(tmp_path), shard_size=2)
+    assert os.listdir(tmp_path / 'issues') == ['shard-00000.js']
+
+def test_audit_dir_writes_dashboard(tmp_path):
+    (tmp_path / 'src').mkdir()
+    shutil.copy(SAMPLE, tmp_path / 'src' / 'a.cbl')
+    shutil.copy(SAMPLE, tmp_path / 'src' / 'b.cbl')
+    output = tmp_path / 'tableau'
+    result = CliRunner().invoke(cli, ['audit-dir', str(tmp_path / 'src'), '-j', '1',
+                                      '-f', 'html', '-o', str(output)])
+    assert result.exit_code == 0, result.output
+    data = _page_data(str(output / 'index.html'))
+    assert len(data['programs']) == 2
+    assert data['issueCount'] == sum(program[3] for program in data['programs']) > 0
+    # Le texte de la ligne signalée est relu depuis le source
+    assert any(row[5] for row in _shard(str(output), 0))
+
+    result = CliRunner().invoke(cli, ['audit-dir', str(tmp_path / 'src'), '-f', 'html'])
+    assert result.exit_code != 0
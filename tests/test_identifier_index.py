@@ -0,0 +1,32 @@
+"""
+Tests pour l'index des occurrences d'identifiants.
+"""
+from identifier_index import IdentifierIndex, tokenize_words
+from rule_engine import RuleEngine
+from rules import CobolRules, DataUsageCheck
+
+def test_tokenize_words():
+    assert tokenize_words("MOVE ws-amount TO WS-A.") == ['MOVE', 'WS-AMOUNT', 'TO', 'WS-A']
+    assert tokenize_words("ADD 100 TO X") == ['ADD', 'TO', 'X']
+
+def test_index_records_line_numbers_once_per_line():
+    index = IdentifierIndex().add_lines([
+        "MOVE WS-A TO WS-A",
+        "DISPLAY WS-AMOUNT",
+        "ADD 1 TO WS-A"
+    ])
+    assert index.lines_of('WS-A') == [0, 2]
+    assert index.lines_of('ws-amount') == [1]
+    assert index.unused(['WS-A', 'WS-B']) == ['WS-B']
+    assert index.cross_reference(['WS-AMOUNT']) == {'WS-AMOUNT': [1]}
+
+def test_data_usage_matches_whole_words():
+    data_lines = ["01 WS-A PIC 9.", "01 WS-AMOUNT PIC 9(8)."]
+    usage = CobolRules.check_data_usage(data_lines, ["MOVE 0 TO WS-AMOUNT"])
+    assert usage == {'WS-A': 0, 'WS-AMOUNT': 1}
+
+def test_data_usage_indexes_only_declared_names():
+    check = DataUsageCheck(['WS-A'])
+    RuleEngine([check]).run(["MOVE WS-A TO WS-B", "DISPLAY AUTRE-NOM", "ADD 1 TO ws-a"])
+    assert set(check.index.occurrences) == {'WS-A'}
+    assert check.usage == {'WS-A': 2} and check.value == 0
@@ -0,0 +1,49 @@
+"""
+Tests pour la représentation compacte des problèmes.
+"""
+import pickle
+import pytest
+from issues import Issue, Severity, LineResolver, severity_counts
+from exporters import SonarQubeExporter
+
+def test_issue_has_no_instance_dict():
+    issue = Issue('goto', Severity.WARNING, 'GOTO', 12)
+    assert not hasattr(issue, '__dict__')
+    assert issue.rule is Issue('go' + 'to', Severity.INFO, '').rule
+
+def test_mapping_access():
+    issue = Issue('goto', Severity.WARNING, 'GOTO', 12, file='a.cbl')
+    assert issue['type'] == 'goto'
+    assert issue['severity'] == 'WARNING'
+    assert issue.get('line_number') == 12
+    assert 'file' in issue
+
+    structure = Issue('structure', Severity.ERROR, 'Division manquante')
+    assert 'line_number' not in structure
+    assert structure.get('line_number', 'N/A') == 'N/A'
+    with pytest.raises(KeyError):
+        structure['line_number']
+
+def test_record_and_pickle_round_trip():
+    issue = Issue('magic_number', Severity.INFO, 'Nombre magique', 7, 12, 16)
+    assert Issue.from_record(issue.to_record()) == issue
+    assert pickle.loads(pickle.dumps(issue)) == issue
+
+def test_severity_counts():
+    issues = [Issue('a', Severity.ERROR, ''), Issue('b', Severity.INFO, ''), Issue('c', Severity.INFO, '')]
+    assert severity_counts(issues) == {'ERROR': 1, 'WARNING': 0, 'INFO': 2}
+
+def test_line_resolver_reads_text_on_demand(tmp_path):
+    program = tmp_path / 'prog.cbl'
+    program.write_text("       PROCEDURE DIVISION.\n           GO TO FIN.\n")
+    resolver = LineResolver(str(program))
+    assert resolver.text(Issue('goto', Severity.WARNING, 'GOTO', 2)) == 'GO TO FIN.'
+    assert resolver.text(Issue('goto', Severity.WARNING, 'GOTO', 99)) is None
+    assert resolver.text(Issue('structure', Severity.ERROR, 'Division manquante')) is None
+    resolver.close()
+
+def test_sonarqube_text_range_uses_line_number():
+    results = {'issues': [Issue('goto', Severity.WARNING, 'GOTO', 42)], 'metrics': {'total_lines': 1}}
+    exported = SonarQubeExporter.export(results, 'prog.cbl')
+    assert exported['issues'][0]['primaryLocation']['textRange'] == {'startLine': 42, 'endLine': 42}
+    assert exported['issues'][0]['severity'] == 'warning'
@@ -0,0 +1,113 @@
+"""
+Tests pour l'analyseur lexical COBOL.
+"""
+import pytest
+from lexer import (FIXED, FREE, NUMBER, PERIOD, PSEUDO_TEXT, STRING, SYMBOL, WORD, TokenTable,
+                   detect_format, has_magic_number, logical_lines, mask_literals, tokenize)
+from cobol_parser import CobolParser
+
+FIXED_SOURCE = [
+    "000100 IDENTIFICATION DIVISION.                                         PROG0001",
+    "000200 PROGRAM-ID. FIXED01.",
+    "000300* COMMENTAIRE EN COLONNE 7",
+    "000400 PROCEDURE DIVISION.",
+    "000500     DISPLAY 'DEBUT DE LA CHAINE",
+    "000600-    'SUITE'.",
+    "000700     MOVE WS-TOTAL-",
+    "000800-        AMOUNT TO WS-B.",
+    "000900D    DISPLAY 'TRACE'.",
+    "001000     GOBACK.                *> fin",
+]
+
+def test_detect_format():
+    assert detect_format(FIXED_SOURCE) == FIXED
+    assert detect_format(["IDENTIFICATION DIVISION.", "PROGRAM-ID. FREE01."]) == FREE
+    assert detect_format(["       IDENTIFICATION DIVISION.", "      * commentaire"]) == FIXED
+
+def test_fixed_format_with_alphanumeric_sequence_area():
+    source = [line if index % 3 else 'CHG001' + line[6:] for index, line in enumerate(FIXED_SOURCE)]
+    source.append("ABCDEF     STOP RUN.")
+    assert detect_format(source) == FIXED
+    lines = list(logical_lines(enumerate(source, 1)))
+    assert lines[:3] == [(1, 'IDENTIFICATION DIVISION.'), (2, 'PROGRAM-ID. FIXED01.'), (4, 'PROCEDURE DIVISION.')]
+    assert lines[-1] == (11, 'STOP RUN.')
+    # Une ligne isolée hors format ne fait pas basculer le fichier
+    assert detect_format(FIXED_SOURCE + ["MOVE A TO B."]) == FIXED
+    assert detect_format(["IDENTIFICATION DIVISION.", "PROGRAM-ID. FREE01.", "PROCEDURE DIVISION.",
+                          "    ADD 1 TO C."]) == FREE
+
+def test_fixed_format_joins_continuation_lines():
+    lines = list(logical_lines(enumerate(FIXED_SOURCE, 1)))
+    assert lines == [
+        (1, 'IDENTIFICATION DIVISION.'),
+        (2, 'PROGRAM-ID. FIXED01.'),
+        (4, 'PROCEDURE DIVISION.'),
+        (5, "DISPLAY 'DEBUT DE LA CHAINE" + ' ' * 34 + "SUITE'."),
+        (7, 'MOVE WS-TOTAL-AMOUNT TO WS-B.'),
+        (10, 'GOBACK.'),
+    ]
+
+def test_free_format_strips_comments():
+    source = ["*> en-tête", "MOVE A TO B. *> commentaire", "DISPLAY '*> pas un commentaire'.", ""]
+    assert list(logical_lines(enumerate(source, 1), FREE)) == [
+        (2, 'MOVE A TO B.'),
+        (3, "DISPLAY '*> pas un commentaire'."),
+    ]
+    with pytest.raises(ValueError):
+        list(logical_lines(enumerate(source, 1), 'cobol'))
+
+def test_tokenize_kinds_and_values():
+    kinds, values = tokenize("if ws-a >= 10.5 display 'Bonjour' X'41' 1st-para.")
+    assert values == ['IF', 'WS-A', '>=', '10.5', 'DISPLAY', "'BONJOUR'", "X'41'", '1ST-PARA', '.']
+    assert list(kinds) == [WORD, WORD, SYMBOL, NUMBER, WORD, STRING, STRING, WORD, PERIOD]
+    kinds, values = tokenize("COPY LIB REPLACING ==:PFX:== BY ==WS==.")
+    assert kinds[3] == PSEUDO_TEXT and values[3] == '==:PFX:=='
+
+def test_literals_are_not_words():
+    _, values = tokenize("DISPLAY 'GO TO FIN' \"IF\"")
+    assert values == ['DISPLAY', "'GO TO FIN'", '"IF"']
+    assert mask_literals("DISPLAY 'GO TO FIN' WS-A") == "DISPLAY 'XXXXXXXXX' WS-A"
+
+def test_has_magic_number():
+    assert has_magic_number(*tokenize("IF COUNTER > 100"))
+    assert not has_magic_number(*tokenize("05 FILLER PIC X."))
+    assert not has_magic_number(*tokenize("MOVE WS-ITEM-00950 TO WS-B"))
+    assert not has_magic_number(*tokenize("DISPLAY 'CODE 404'"))
+
+def test_token_table_is_compact():
+    table = TokenTable()
+    table.append(12, "MOVE A TO B.")
+    table.append(13, "GOBACK.")
+    assert len(table) == 2
+    assert table.kinds.typecode == 'B' and list(table.line_numbers) == [12, 13]
+    assert list(table.line(1)[1]) == ['GOBACK', '.']
+    assert [values for _, values in table.iter_lines()] == [['MOVE', 'A', 'TO', 'B', '.'], ['GOBACK', '.']]
+    # Les mots sont internés : une seule chaîne par identifiant
+    other = TokenTable()
+    other.append(1, "move a to b.")
+    assert other.values[0] is table.values[0]
+
+def test_parser_builds_token_tables():
+    parser = CobolParser()
+    parser.parse_content([line + '\n' for line in FIXED_SOURCE])
+    assert parser.divisions['PROCEDURE'][1] == 'MOVE WS-TOTAL-AMOUNT TO WS-B.'
+    assert list(parser.line_numbers['PROCEDURE']) == [5, 7, 10]
+    # Les jetons ne sont découpés qu'à la demande
+    assert len(parser.tokens['PROCEDURE']) == 0
+    assert len(parser.tokens_for('PROCEDURE')) == 3
+    assert parser.tokens_for('IDENTIFICATION').values == ['PROGRAM-ID', '.', 'FIXED01', '.']
+    # Découpage d'un seul bloc : mêmes jetons que ligne par ligne
+    table = TokenTable()
+    for line_number, line in zip(parser.line_numbers['PROCEDURE'], parser.divisions['PROCEDURE']):
+        table.append(line_number, line)
+    assert [list(values) for _, values in table.iter_lines()] == \
+        [list(values) for _, values in parser.tokens['PROCEDURE'].iter_lines()]
+    assert table.kinds == parser.tokens['PROCEDURE'].kinds
+
+def test_token_table_extend_keeps_line_boundaries():
+    table = TokenTable()
+    table.extend([4, 9], ["DISPLAY 'NON TERMINE", "MOVE X'41' TO 1ST-B."])
+    assert list(table.line_numbers) == [4, 9]
+    assert table.line(0)[1] == ['DISPLAY', "'NON TERMINE"]
+    assert table.line(1)[1] == ['MOVE', "X'41'", 'TO', '1ST-B', '.']
+    assert list(table.line(1)[0]) == [WORD, STRING, WORD, WORD, PERIOD]
@@ -0,0 +1,52 @@
+"""
+Tests pour la configuration des logs (fichier sur demande, rotation, workers).
+"""
+import logging
+import os
+from logger import logger, enable_file_logging, set_level, shutdown_logging
+from portfolio import PortfolioAuditor
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+def test_file_logging_only_on_request(tmp_path):
+    set_level('INFO')
+    assert logger.level == logging.WARNING
+
+    log_file = str(tmp_path / 'logs' / 'audit.log')
+    try:
+        assert enable_file_logging(log_file, 'INFO') == log_file
+        assert logger.level == logging.INFO
+        logger.info('message de test: %s', 42)
+    finally:
+        shutdown_logging()
+        set_level('INFO')
+    with open(log_file, encoding='utf-8') as file:
+        assert 'message de test: 42' in file.read()
+
+def test_log_file_rotates_by_size(tmp_path):
+    log_file = str(tmp_path / 'audit.log')
+    try:
+        enable_file_logging(log_file, 'INFO', max_bytes=2_000, backup_count=2)
+        for n in range(200):
+            logger.info('ligne %d', n)
+    finally:
+        shutdown_logging()
+        set_level('INFO')
+    assert sorted(os.listdir(tmp_path)) == ['audit.log', 'audit.log.1', 'audit.log.2']
+
+def test_worker_records_reach_parent_log(tmp_path):
+    source = open(SAMPLE, encoding='utf-8').read()
+    for name in ('a.cbl', 'b.cbl', 'c.cbl'):
+        (tmp_path / name).write_text(source, encoding='utf-8')
+    log_file = str(tmp_path / 'batch.log')
+    try:
+        enable_file_logging(log_file, 'INFO')
+        PortfolioAuditor(jobs=2).audit_directory(str(tmp_path))
+    finally:
+        shutdown_logging()
+        set_level('INFO')
+    with open(log_file, encoding='utf-8') as file:
+        content = file.read()
+    for name in ('a.cbl', 'b.cbl', 'c.cbl'):
+        assert f"Début de l'analyse du fichier: {tmp_path / name}" in content
+    assert 'MainProcess' in content
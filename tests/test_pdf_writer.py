@@ -0,0 +1,57 @@
+"""
+Tests pour l'écriture PDF et le rapport PDF.
+"""
+from io import BytesIO
+from pypdf import PdfReader
+from cobol_report import CobolReport
+from issues import Issue, Severity
+from pdf_writer import PdfWriter
+
+METRICS = {'total_lines': 10, 'procedures': 1, 'data_items': 2, 'complexity': 3,
+           'unused_vars': 0, 'empty_sections': 0}
+
+def test_writer_produces_readable_pages():
+    output = BytesIO()
+    with PdfWriter(output, title='Essai') as pdf:
+        pdf.heading('Titre (principal)')
+        for index in range(200):
+            pdf.text(f'Ligne {index} avec accents éàç et \\ barre')
+    reader = PdfReader(BytesIO(output.getvalue()))
+    assert len(reader.pages) == pdf.page_count > 1
+    first = reader.pages[0].extract_text()
+    assert 'Titre (principal)' in first and 'Ligne 0 avec accents éàç' in first
+    assert 'Ligne 199' in reader.pages[-1].extract_text()
+    assert reader.metadata.title == 'Essai'
+
+def test_empty_document_has_one_page():
+    output = BytesIO()
+    PdfWriter(output).close()
+    assert len(PdfReader(BytesIO(output.getvalue())).pages) == 1
+
+def test_long_lines_are_wrapped():
+    output = BytesIO()
+    with PdfWriter(output) as pdf:
+        pdf.text(' '.join(['MOT'] * 200))
+    text = PdfReader(BytesIO(output.getvalue())).pages[0].extract_text()
+    assert text.count('MOT') == 200
+
+def test_pdf_report_lists_every_issue():
+    issues = [Issue('magic_number', Severity.INFO, f'Nombre magique {index}', index)
+              for index in range(1, 501)]
+    pdf = CobolReport().generate({'issues': issues, 'metrics': METRICS}, 'PROG.cbl', 'pdf')
+    assert pdf.startswith(b'%PDF-')
+    reader = PdfReader(BytesIO(pdf))
+    text = ''.join(page.extract_text() for page in reader.pages)
+    assert "Rapport d'Audit COBOL" in text
+    assert 'INFO: Nombre magique 1' in text and 'Ligne: 500' in text
+    assert 'Bonnes Pratiques COBOL' in reader.pages[-1].extract_text()
+
+def test_markdown_report_is_streamed(tmp_path):
+    issues = [Issue('best_practice', Severity.WARNING, 'Utilisation de GOTO détectée', 4)]
+    results = {'issues': issues, 'metrics': METRICS}
+    path = tmp_path / 'rapport.md'
+    with open(path, 'w', encoding='utf-8') as stream:
+        CobolReport().write(results, 'PROG.cbl', stream)
+    content = path.read_text(encoding='utf-8')
+    assert '### WARNING: Utilisation de GOTO détectée\n- Type: best_practice\n- Ligne: 4' in content
+    assert content.split('Date:')[1][20:] == CobolReport().generate(results, 'PROG.cbl').split('Date:')[1][20:]
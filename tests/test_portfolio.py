@@ -0,0 +1,63 @@
+"""
+Tests pour l'audit parallèle de portefeuille.
+"""
+import os
+import shutil
+import pytest
+from portfolio import PortfolioAuditor, discover_cobol_files, analyze_one
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+@pytest.fixture
+def portfolio_dir(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    shutil.copy(SAMPLE, tmp_path / 'a.cbl')
+    shutil.copy(SAMPLE, tmp_path / 'sub' / 'B.COB')
+    (tmp_path / 'notes.txt').write_text('pas du COBOL')
+    return tmp_path
+
+def test_discover_cobol_files(portfolio_dir):
+    files = discover_cobol_files(str(portfolio_dir))
+    names = [os.path.basename(f) for f in files]
+    assert names == ['a.cbl', 'B.COB']
+
+def test_analyze_one_captures_errors(tmp_path):
+    result = analyze_one(str(tmp_path / 'missing.cbl'))
+    assert result['error']
+    assert result['issues'] == []
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_audit_directory_merges_results(portfolio_dir, jobs):
+    single = analyze_one(SAMPLE)
+    results = PortfolioAuditor(jobs=jobs).audit_directory(str(portfolio_dir))
+
+    assert len(results['files']) == 2
+    assert results['errors'] == []
+    assert len(results['issues']) == 2 * len(single['issues'])
+    assert all('file' in issue for issue in results['issues'])
+    assert results['metrics']['total_lines'] == 2 * single['metrics']['total_lines']
+    assert results['metrics']['nested_conditions'] == single['metrics']['nested_conditions']
+
+def test_issue_sink_receives_issues_per_file(portfolio_dir):
+    batches = []
+    results = PortfolioAuditor(jobs=2).audit_directory(str(portfolio_dir), issue_sink=batches.append)
+
+    assert results['issues'] == []
+    assert len(batches) == 2
+    assert [batch[0].file for batch in batches] == [f['file'] for f in results['files']]
+    assert [len(batch) for batch in batches] == [f['issue_count'] for f in results['files']]
+    # Sans problèmes conservés, leur nombre par sévérité reste disponible
+    counts = results['issue_counts']
+    assert list(counts) == ['ERROR', 'WARNING', 'INFO']
+    assert counts == {name: sum(issue.severity.name == name for batch in batches for issue in batch)
+                      for name in counts}
+
+def test_audit_dir_ndjson_verbose_summary(portfolio_dir):
+    from click.testing import CliRunner
+    from cli import cli
+    output = portfolio_dir / 'rapport.ndjson'
+    result = CliRunner().invoke(cli, ['audit-dir', str(portfolio_dir), '-j', '1', '-f', 'ndjson',
+                                      '-o', str(output), '-v'])
+    assert result.exit_code == 0, result.output
+    assert 'Problèmes Détectés' in result.output
+    assert len(output.read_text().splitlines()) > 0
@@ -0,0 +1,50 @@
+"""
+Tests pour la mesure du temps par étape et par règle.
+"""
+import os
+import time
+from cobol_analyzer import CobolAnalyzer
+from portfolio import PortfolioAuditor
+from profiling import Profiler, profiler, merge_timings, slowest
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+def test_disabled_profiler_is_transparent():
+    local = Profiler()
+    visit = lambda index, line: None
+    assert local.timed('rule:x', visit) is visit
+    with local.stage('parse'):
+        pass
+    assert local.timings == {}
+
+def test_nested_stage_time_is_exclusive():
+    local = Profiler()
+    local.enable()
+    with local.stage('outer'):
+        with local.stage('inner'):
+            time.sleep(0.02)
+    assert local.timings['inner'][0] >= 0.02
+    assert local.timings['outer'][0] < 0.02
+
+def test_analyzer_reports_parse_rules_and_metrics():
+    with profiler.isolated():
+        CobolAnalyzer().analyze_file(SAMPLE)
+        timings = profiler.snapshot()
+    assert {'parse', 'metrics', 'rule:goto', 'rule:data_usage'} <= set(timings)
+    assert not profiler.enabled
+
+def test_portfolio_aggregates_timings_per_file(tmp_path):
+    source = open(SAMPLE, encoding='utf-8').read()
+    for name in ('a.cbl', 'b.cbl'):
+        (tmp_path / name).write_text(source, encoding='utf-8')
+    results = PortfolioAuditor(jobs=1, profile=True).audit_directory(str(tmp_path))
+    profile = results['profile']
+    assert [file for file, _ in profile['files']] == [str(tmp_path / 'a.cbl'), str(tmp_path / 'b.cbl')]
+    assert profile['timings']['parse'][1] == 2
+
+    assert 'profile' not in PortfolioAuditor(jobs=1).audit_directory(str(tmp_path))
+
+def test_merge_and_slowest():
+    merged = merge_timings([{'rule:a': (1.0, 2), 'parse': (0.5, 1)}, {'rule:a': (1.0, 3)}])
+    assert merged['rule:a'] == (2.0, 5)
+    assert slowest(merged, 'rule:') == [('rule:a', 2.0)]
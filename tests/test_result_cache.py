@@ -0,0 +1,85 @@
+"""
+Tests pour le cache persistant des résultats d'analyse.
+"""
+import os
+import shutil
+import pytest
+from cobol_analyzer import CobolAnalyzer
+from result_cache import ResultCache
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    yield cache
+    cache.close()
+
+def test_unchanged_file_is_served_from_cache(tmp_path, cache):
+    program = tmp_path / 'prog.cbl'
+    shutil.copy(SAMPLE, program)
+
+    first = CobolAnalyzer(cache=cache)
+    results = first.analyze_file(str(program))
+    assert first.cache_hit is False
+
+    second = CobolAnalyzer(cache=cache)
+    assert second.analyze_file(str(program)) == results
+    assert second.cache_hit is True
+
+    program.write_text(program.read_text() + "           DISPLAY 12345.\n")
+    third = CobolAnalyzer(cache=cache)
+    third.analyze_file(str(program))
+    assert third.cache_hit is False
+
+def test_changed_copybook_invalidates_entry(tmp_path, cache):
+    (tmp_path / 'REC.cpy').write_text("       01  WS-A PIC X.\n")
+    program = tmp_path / 'prog.cbl'
+    program.write_text(
+        "       IDENTIFICATION DIVISION.\n"
+        "       DATA DIVISION.\n"
+        "       COPY REC.\n"
+        "       PROCEDURE DIVISION.\n"
+        "           DISPLAY WS-A.\n"
+    )
+    CobolAnalyzer([str(tmp_path)], cache=cache).analyze_file(str(program))
+    (tmp_path / 'REC.cpy').write_text("       01  WS-A PIC X.\n       01  WS-B PIC X.\n")
+
+    analyzer = CobolAnalyzer([str(tmp_path)], cache=cache)
+    results = analyzer.analyze_file(str(program))
+    assert analyzer.cache_hit is False
+    assert results['metrics']['unused_vars'] == 1
+
+def test_eviction_is_size_bounded(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'), max_bytes=0)
+    cache.put('a', {'issues': [], 'metrics': {}})
+    cache.put('b', {'issues': [], 'metrics': {}})
+    # L'éviction a lieu dès l'écriture, sans appel explicite à evict
+    assert cache.size() == 0 and cache.evict() == 0
+    assert cache.get('a') is None
+    cache.close()
+
+def test_put_keeps_most_recent_entries(tmp_path):
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.put('a', {'issues': [], 'metrics': {}})
+    cache.max_bytes = cache.size()
+    cache.put('b', {'issues': [], 'metrics': {}})
+    assert cache.get('a') is None and cache.get('b') is not None
+    cache.close()
+
+def test_added_copybook_invalidates_entry(tmp_path, cache):
+    program = tmp_path / 'prog.cbl'
+    program.write_text(
+        "       IDENTIFICATION DIVISION.\n"
+        "       DATA DIVISION.\n"
+        "       COPY REC.\n"
+        "       PROCEDURE DIVISION.\n"
+        "           DISPLAY WS-A.\n"
+    )
+    CobolAnalyzer([str(tmp_path)], cache=cache).analyze_file(str(program))
+    (tmp_path / 'REC.cpy').write_text("       01  WS-A PIC X.\n       01  WS-B PIC X.\n")
+
+    analyzer = CobolAnalyzer([str(tmp_path)], cache=cache)
+    results = analyzer.analyze_file(str(program))
+    assert analyzer.cache_hit is False
+    assert results['metrics']['unused_vars'] == 1
@@ -0,0 +1,125 @@
+"""
+Tests pour le moteur de règles à passage unique.
+"""
+import pytest
+from rule_engine import RuleEngine, RuleRegistry, LineCheck, FULL_CONTEXT
+from rules import (AlteredGotoCheck, ComplexityCheck, FillerCheck, GotoCheck, MagicNumberCheck,
+                   PerformThruCheck, registry)
+
+class CountingCheck(LineCheck):
+    name = 'counting'
+    metric = 'visited'
+
+    def visit(self, index, line):
+        self.value += 1
+
+def test_engine_visits_each_line_once():
+    engine = RuleEngine([CountingCheck(), GotoCheck()])
+    checks = engine.run(["MOVE A TO B", "GOTO PARA-X", "EXIT."])
+    assert checks['counting'].value == 3
+    assert len(checks['goto'].issues) == 1
+    assert engine.metrics() == {'visited': 3}
+
+def test_engine_accepts_generators():
+    engine = RuleEngine([ComplexityCheck(), MagicNumberCheck()])
+    engine.run(line for line in ["IF A > 100 AND B = 1", "MOVE 1 TO C"])
+    assert engine.metrics() == {'complexity': 3, 'magic_numbers': 1}
+
+class PreviousLineCheck(LineCheck):
+    name = 'previous'
+    context = 1
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def visit(self, index, line):
+        self.seen.append(list(self.window))
+
+def test_context_checks_get_bounded_window():
+    check = PreviousLineCheck()
+    engine = RuleEngine([check, GotoCheck()])
+    engine.run(["A", "B", "C"])
+    assert check.seen == [[], ["A"], ["B"]]
+    assert engine.checks['goto'].window is None
+
+def test_full_context_buffers_division():
+    check = PreviousLineCheck()
+    check.context = FULL_CONTEXT
+    engine = RuleEngine([check])
+    engine.run(["A", "B", "C"])
+    assert check.seen[-1] == ["A", "B"]
+
+def test_engine_without_context_keeps_no_buffer():
+    engine = RuleEngine([GotoCheck(), ComplexityCheck()])
+    engine.run(["GOTO X"] * 10)
+    assert engine.buffer is None
+
+class KeywordCheck(LineCheck):
+    name = 'keyword'
+    keywords = ('PERFORM', 'MOVE')
+
+    def __init__(self):
+        super().__init__()
+        self.seen = []
+
+    def visit(self, index, line):
+        self.seen.append(index)
+
+def test_keyword_checks_only_see_matching_lines():
+    check = KeywordCheck()
+    engine = RuleEngine([check, CountingCheck()])
+    engine.run(["perform para-a", "EXIT.", "DISPLAY 'MOVE'", "PERFORMOVE", "MOVE A TO B"])
+    # Mots complets seulement, hors littéraux
+    assert check.seen == [0, 4]
+    assert engine.checks['counting'].value == 5
+
+def test_one_line_triggers_every_matching_check():
+    class MoveCheck(KeywordCheck):
+        name = 'move'
+        keywords = ('MOVE',)
+    perform, move = KeywordCheck(), MoveCheck()
+    perform.keywords = ('PERFORM',)
+    engine = RuleEngine([perform, move])
+    engine.run(["PERFORM A MOVE B TO C", "MOVE A TO B"])
+    assert perform.seen == [0]
+    assert move.seen == [0, 1]
+    assert perform.tokens is engine.tokens
+
+@pytest.mark.parametrize('check_class, matching, other', [
+    (GotoCheck, "GOTO FIN.", "DISPLAY 'GOTO'."),
+    (FillerCheck, "05 FILLER.", "05 WS-FILLER-A PIC X."),
+    (PerformThruCheck, "PERFORM A THRU B.", "MOVE THRU-A TO B."),
+    (AlteredGotoCheck, "ALTER P1 TO PROCEED TO P2.", "MOVE ALTERED TO B."),
+])
+def test_checks_run_on_their_own(check_class, matching, other):
+    # Appelée hors moteur, sans pré-filtre par mot-clé, visit fait le test exact
+    check = check_class()
+    check.visit(1, other)
+    check.visit(2, matching)
+    assert [issue.line_number for issue in check.issues] == [2]
+
+def test_registry_selection_adds_dependencies():
+    assert registry.select(['dead_code']) == ['control_flow', 'dead_code']
+    selected = registry.select(skip_rules=['magic_number'])
+    assert 'magic_number' not in selected and 'goto' in selected
+    engines = registry.build(['goto', 'calls'])
+    assert list(engines['PROCEDURE'].checks) == ['goto', 'calls']
+    assert list(engines['DATA'].checks) == ['data_items']
+    with pytest.raises(ValueError):
+        registry.select(['inconnue'])
+
+def test_registry_accepts_plugin_rules():
+    plugins = RuleRegistry()
+
+    @plugins.register
+    class DisplayCheck(LineCheck):
+        name = 'display'
+        keywords = ('DISPLAY',)
+
+        def visit(self, index, line):
+            self.value += 1
+
+    engines = plugins.build()
+    engines['PROCEDURE'].run(["DISPLAY A", "MOVE A TO B"])
+    assert engines['PROCEDURE'].checks['display'].value == 1
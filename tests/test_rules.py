@@ -38,16 +38,17 @@ def test_dead_code():
     rule = CobolRules()
     lines = [
         "SECTION-A SECTION.",
-        "    MOVE A TO B.",
+        "    PERFORM SECTION-B",
+        "    STOP RUN.",
         "SECTION-B SECTION.",
         "    MOVE C TO D.",
-        "    PERFORM SECTION-A",
         "SECTION-C SECTION.",
         "    MOVE E TO F."
     ]
     dead_sections = rule.check_dead_code(lines)
     assert "SECTION-C SECTION." in dead_sections
     assert "SECTION-A SECTION." not in dead_sections
+    assert "SECTION-B SECTION." not in dead_sections
 
 def test_data_usage():
     rule = CobolRules()
@@ -0,0 +1,76 @@
+"""
+Tests pour le scoring par lots d'un portefeuille.
+"""
+import json
+import random
+import pytest
+from click.testing import CliRunner
+from cli import cli
+from score_matrix import FLAG_HIGH, FLAG_MEDIUM, FLAG_NONE, MetricMatrix, numpy
+from scoring import AuditScorer
+
+BACKENDS = [False, pytest.param(True, marks=pytest.mark.skipif(numpy is None, reason='NumPy absent'))]
+
+def _portfolio(count=200, seed=3):
+    generator = random.Random(seed)
+    return [{
+        'file': f'PROG{index:04d}.cbl',
+        'metrics': {name: generator.randint(0, 12) for name in AuditScorer.METRIC_WEIGHTS}
+    } for index in range(count)]
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_batch_scores_match_per_file_scoring(use_numpy):
+    files = _portfolio()
+    scores = MetricMatrix.from_results(files, use_numpy=use_numpy).score()
+    assert len(scores) == len(files)
+    for index, result in enumerate(files):
+        score, grade = AuditScorer.calculate_score(result['metrics'])
+        assert scores.scores[index] == score
+        assert scores.grades()[index] == grade
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_recommendation_flags(use_numpy):
+    files = [{'file': 'A', 'metrics': {'complexity': 12}},
+             {'file': 'B', 'metrics': {'complexity': 6}},
+             {'file': 'C', 'metrics': {}}]
+    scores = MetricMatrix.from_results(files, use_numpy=use_numpy).score()
+    assert list(scores.flags['complexity']) == [FLAG_HIGH, FLAG_MEDIUM, FLAG_NONE]
+    assert scores.recommendation_counts()['complexity'] == {'high': 1, 'medium': 1}
+
+@pytest.mark.parametrize('use_numpy', BACKENDS)
+def test_portfolio_statistics(use_numpy):
+    files = [{'file': f'F{index}', 'metrics': {'dead_code_sections': value}}
+             for index, value in enumerate([0, 1, 2, 3, 1])]
+    scores = MetricMatrix.from_results(files, use_numpy=use_numpy).score()
+    assert list(scores.scores) == [100, 97, 94, 91, 97]
+    assert scores.percentiles([0, 50, 100, 25]) == {0: 91, 50: 97, 100: 100, 25: 94}
+    assert scores.grade_histogram() == {'A': 5, 'B': 0, 'C': 0, 'D': 0, 'F': 0}
+    assert scores.worst(3) == [('F3', 91, 'A'), ('F2', 94, 'A'), ('F1', 97, 'A')]
+    assert scores.worst(0) == []
+
+def test_weights_override_without_reanalysis():
+    matrix = MetricMatrix.from_results(_portfolio(20))
+    default = matrix.score()
+    heavier = matrix.score({'complexity': 1.0})
+    assert all(new <= old for new, old in zip(heavier.scores, default.scores))
+    with pytest.raises(ValueError):
+        matrix.score({'inconnue': 1.0})
+
+def test_empty_portfolio():
+    scores = MetricMatrix.from_results([]).score()
+    assert scores.percentiles([50]) == {50: 0.0}
+    assert scores.summary()['worst'] == []
+
+def test_score_command_reads_portfolio_report(tmp_path):
+    report = tmp_path / 'portefeuille.json'
+    report.write_text(json.dumps({'files': _portfolio(30)}), encoding='utf-8')
+    result = CliRunner().invoke(cli, ['score', str(report), '-f', 'json', '--worst', '2',
+                                      '-w', 'dead_code_sections=0.5'])
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result.output)
+    assert summary['files'] == 30
+    assert sum(summary['grades'].values()) == 30
+    assert len(summary['worst']) == 2 and set(summary['percentiles']) == {'p50', 'p90', 'p99'}
+
+    result = CliRunner().invoke(cli, ['score', str(report), '-w', 'inconnue=1'])
+    assert result.exit_code != 0
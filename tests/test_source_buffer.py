@@ -0,0 +1,71 @@
+"""
+Tests pour le tampon source projeté en mémoire.
+"""
+import os
+import pytest
+from cobol_analyzer import CobolAnalyzer
+from cobol_parser import CobolParser
+from source_buffer import SourceBuffer
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+def test_line_offsets_and_on_demand_text(tmp_path):
+    path = tmp_path / 'crlf.cbl'
+    path.write_bytes(b"IDENTIFICATION DIVISION.\r\nPROGRAM-ID. X.\r\n\r\nPROCEDURE DIVISION.\r\n    GOTO A.\r\n")
+    with SourceBuffer(str(path)) as source:
+        assert len(source) == 5
+        assert source.offsets.typecode == 'I'
+        assert source.line(2) == 'PROGRAM-ID. X.'
+        assert source.divisions == {'IDENTIFICATION': [(1, 3)], 'PROCEDURE': [(4, 5)]}
+        assert list(source.iter_division('PROCEDURE')) == [(5, 'GOTO A.')]
+
+def test_empty_file(tmp_path):
+    path = tmp_path / 'empty.cbl'
+    path.write_bytes(b'')
+    with SourceBuffer(str(path)) as source:
+        assert len(source) == 0
+        assert list(source.iter_content()) == []
+
+def test_iter_content_matches_parser():
+    with open(SAMPLE, encoding='utf-8') as file:
+        expected = list(CobolParser().iter_content(file))
+    with SourceBuffer(SAMPLE) as source:
+        assert list(source.iter_content()) == expected
+
+def test_mapped_analysis_matches_buffered():
+    buffered = CobolAnalyzer().analyze_file(SAMPLE)
+    analyzer = CobolAnalyzer()
+    mapped = analyzer.analyze_file(SAMPLE, mapped=True)
+    analyzer.source.close()
+    assert mapped == buffered
+
+def test_missing_file():
+    with pytest.raises(FileNotFoundError):
+        SourceBuffer('nonexistent.cbl')
+
+def test_cli_audit_closes_mapped_source(tmp_path, monkeypatch):
+    from click.testing import CliRunner
+    import cobol_analyzer
+    from cli import cli
+    opened = []
+
+    class RecordingBuffer(SourceBuffer):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    monkeypatch.setattr(cobol_analyzer, 'SourceBuffer', RecordingBuffer)
+    result = CliRunner().invoke(cli, ['audit', SAMPLE, '--mmap', '--no-daemon', '-f', 'json',
+                                      '-o', str(tmp_path / 'rapport.json')])
+    assert result.exit_code == 0, result.output
+    assert len(opened) == 1 and opened[0]._file.closed and opened[0].data.closed
+
+def test_divisions_with_alphanumeric_sequence_area(tmp_path):
+    path = tmp_path / 'chg.cbl'
+    path.write_bytes(b"CHG001 IDENTIFICATION DIVISION.\n000200 PROGRAM-ID. X.\n"
+                     b"CHG002* PROCEDURE DIVISION. (commentaire)\nCHG003 PROCEDURE DIVISION.\n"
+                     b"000500     GOBACK.\n")
+    with SourceBuffer(str(path)) as source:
+        assert source.source_format == 'fixed'
+        assert source.divisions == {'IDENTIFICATION': [(1, 3)], 'PROCEDURE': [(4, 5)]}
+        assert list(source.iter_division('PROCEDURE')) == [(5, 'GOBACK.')]
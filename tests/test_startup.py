@@ -0,0 +1,34 @@
+"""
+Tests pour le démarrage de la CLI (imports différés, log sur demande).
+"""
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_importing_cli_defers_optional_modules(tmp_path):
+    script = (
+        "import sys; sys.path.insert(0, %r); import cli; "
+        "print(','.join(m for m in ('markdown', 'pypdf', 'cobol_report', 'html_report', 'git_changes', "
+        "'concurrent.futures.process') if m in sys.modules))" % ROOT
+    )
+    output = subprocess.run([sys.executable, '-c', script], cwd=tmp_path,
+                            capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == ''
+    # L'import ne crée plus de dossier de logs dans le répertoire courant
+    assert not (tmp_path / 'logs').exists()
+
+def test_audit_dir_ndjson_after_deferred_imports(tmp_path):
+    # Chemin ndjson d'audit-dir : LineResolver reste importé par la CLI
+    sample = os.path.join(ROOT, 'tests', 'fixtures', 'sample.cbl')
+    (tmp_path / 'src').mkdir()
+    with open(sample, encoding='utf-8') as source:
+        (tmp_path / 'src' / 'a.cbl').write_text(source.read())
+    output = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), 'audit-dir', str(tmp_path / 'src'),
+                             '-j', '1', '-f', 'ndjson'],
+                            cwd=tmp_path, capture_output=True, text=True)
+    assert output.returncode == 0, output.stderr
+    records = [json.loads(line) for line in output.stdout.splitlines()]
+    assert records and all(record['file'].endswith('a.cbl') for record in records)
@@ -0,0 +1,119 @@
+"""
+Tests pour l'entrepôt SQLite des résultats d'audit.
+"""
+import json
+import os
+import shutil
+import pytest
+from click.testing import CliRunner
+from cli import cli
+from issues import Issue, Severity
+from portfolio import PortfolioAuditor
+from scoring import AuditScorer
+from warehouse import ResultWarehouse
+
+SAMPLE = os.path.join(os.path.dirname(__file__), 'fixtures', 'sample.cbl')
+
+def _result(file, issues, metrics=None, dependencies=(), error=None):
+    return {'file': file, 'issues': issues, 'metrics': metrics or {}, 'calls': None, 'cached': False,
+            'timings': None, 'dependencies': list(dependencies), 'error': error}
+
+def _alter(line, severity=Severity.ERROR):
+    return Issue('best_practice', severity, 'Utilisation de ALTER GOTO détectée', line)
+
+@pytest.fixture
+def store(tmp_path):
+    warehouse = ResultWarehouse(str(tmp_path / 'entrepot.sqlite3'))
+    results = [
+        _result('src/A.cbl', [_alter(10), _alter(20, Severity.WARNING),
+                              Issue('magic_number', Severity.INFO, 'Nombre magique détecté', 30)],
+                {'complexity': 12}, ['/copy/CLIENT.cpy']),
+        _result('src/B.cbl', [_alter(5)], {}, ['/copy/COMPTE.cpy']),
+        _result('src/C.cbl', [], error='fichier illisible'),
+    ]
+    list(warehouse.record(results))
+    yield warehouse
+    warehouse.close()
+
+def test_record_creates_run(store):
+    (run, _, root, files, issues), = store.runs()
+    assert store.latest_run() == run
+    assert (root, files, issues) == (os.path.abspath('src'), 3, 4)
+    score, grade, count = store.connection.execute(
+        "SELECT score, grade, issue_count FROM files WHERE path = 'src/A.cbl'").fetchone()
+    assert (score, grade) == AuditScorer.calculate_score({'complexity': 12}) and count == 3
+
+def test_filtered_issues(store):
+    assert store.issues(severities=['error'], message='ALTER GOTO', copybook='client') == [
+        ('src/A.cbl', 10, 'ERROR', 'best_practice', 'Utilisation de ALTER GOTO détectée')]
+    assert [row[0] for row in store.issues(rules=['best_practice'], severities=['ERROR'])] == [
+        'src/A.cbl', 'src/B.cbl']
+    assert len(store.issues(file_pattern='*/B.cbl')) == 1
+    assert len(store.issues(limit=2)) == 2
+
+def test_counts_use_run_aggregates(store):
+    assert store.counts('rule') == [('best_practice', 3), ('magic_number', 1)]
+    assert store.counts('severity', rules=['best_practice']) == [('ERROR', 2), ('WARNING', 1)]
+    assert store.counts('file') == [('src/A.cbl', 3), ('src/B.cbl', 1)]
+    # Avec un filtre de fichier, les comptes sont calculés sur les problèmes
+    assert store.counts('rule', copybook='COMPTE') == [('best_practice', 1)]
+    assert store.counts('file', severities=['ERROR']) == [('src/A.cbl', 1), ('src/B.cbl', 1)]
+    with pytest.raises(ValueError):
+        store.counts('message')
+
+def test_runs_are_kept_separately(store):
+    first = store.latest_run()
+    list(store.record([_result('src/A.cbl', [_alter(1)])]))
+    assert store.latest_run() == first + 1
+    assert store.counts('rule') == [('best_practice', 1)]
+    assert store.counts('rule', run=first)[0] == ('best_practice', 3)
+
+def test_interrupted_run_is_ignored(store):
+    first = store.latest_run()
+    records = store.record(iter([_result('src/A.cbl', [_alter(1)]), _result('src/B.cbl', [])]))
+    next(records)
+    records.close()
+    assert store.latest_run() == first
+
+def test_audit_dir_stores_results_and_query(tmp_path):
+    (tmp_path / 'src').mkdir()
+    shutil.copy(SAMPLE, tmp_path / 'src' / 'a.cbl')
+    shutil.copy(SAMPLE, tmp_path / 'src' / 'b.cbl')
+    database = str(tmp_path / 'entrepot.sqlite3')
+    results = PortfolioAuditor(jobs=1, warehouse=database).audit_directory(str(tmp_path / 'src'))
+
+    runner = CliRunner()
+    output = runner.invoke(cli, ['query', '--warehouse', database, '--count-by', 'file', '-f', 'json'])
+    assert output.exit_code == 0, output.output
+    assert json.loads(output.output) == [{'file': entry['file'], 'issues': entry['issue_count']}
+                                         for entry in results['files'] if entry['issue_count']]
+    output = runner.invoke(cli, ['query', '--warehouse', database, '--runs', '-f', 'json'])
+    assert [run['files'] for run in json.loads(output.output)] == [2]
+    output = runner.invoke(cli, ['query', '--warehouse', database, '--severity', 'error', '--limit', '1'])
+    assert output.exit_code == 0, output.output
+
+def test_cached_results_keep_copybooks(tmp_path):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'cpy').mkdir()
+    (tmp_path / 'cpy' / 'CLIENT.cpy').write_text("       01  WS-CLIENT  PIC X(10).\n")
+    (tmp_path / 'src' / 'a.cbl').write_text(
+        "       IDENTIFICATION DIVISION.\n"
+        "       PROGRAM-ID. A.\n"
+        "       DATA DIVISION.\n"
+        "       WORKING-STORAGE SECTION.\n"
+        "       COPY CLIENT.\n"
+        "       PROCEDURE DIVISION.\n"
+        "           ALTER FIN TO PROCEED TO FIN.\n"
+        "       FIN.\n"
+        "           STOP RUN.\n"
+    )
+    database = str(tmp_path / 'entrepot.sqlite3')
+    for cached in (False, True):
+        auditor = PortfolioAuditor(jobs=1, copybook_paths=[str(tmp_path / 'cpy')],
+                                   cache_dir=str(tmp_path / 'cache'), warehouse=database)
+        results = auditor.audit_directory(str(tmp_path / 'src'))
+        assert results['cache_hits'] == int(cached)
+        warehouse = ResultWarehouse(database)
+        # Le résultat servi par le cache garde les copybooks inclus
+        assert warehouse.counts('file', copybook='CLIENT') == [(str(tmp_path / 'src' / 'a.cbl'), 1)]
+        warehouse.close()
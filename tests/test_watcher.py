@@ -0,0 +1,75 @@
+"""
+Tests pour la surveillance et la réanalyse incrémentale.
+"""
+import os
+from watcher import WatchSession
+
+PROGRAM = """       IDENTIFICATION DIVISION.
+       PROGRAM-ID. {name}.
+       DATA DIVISION.
+       WORKING-STORAGE SECTION.
+{copy}       01  WS-A  PIC 9.
+       PROCEDURE DIVISION.
+           MOVE 1 TO WS-A.
+           STOP RUN.
+"""
+
+def _touch(path, text):
+    """Réécrit un fichier en garantissant un changement de signature."""
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(text)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_only_changed_programs_are_reanalyzed(tmp_path):
+    src = tmp_path / 'src'
+    copybooks = tmp_path / 'cpy'
+    src.mkdir()
+    copybooks.mkdir()
+    (copybooks / 'REC.cpy').write_text('       01  WS-REC  PIC X.\n', encoding='utf-8')
+    (src / 'a.cbl').write_text(PROGRAM.format(name='A', copy='       COPY REC.\n'), encoding='utf-8')
+    (src / 'b.cbl').write_text(PROGRAM.format(name='B', copy=''), encoding='utf-8')
+
+    session = WatchSession(str(src), copybook_paths=[str(copybooks)])
+    assert session.refresh() == [str(src / 'a.cbl'), str(src / 'b.cbl')]
+    assert session.refresh() == []
+    total = session.merged()['metrics']['total_lines']
+
+    _touch(src / 'b.cbl', PROGRAM.format(name='B', copy='      * AJOUT\n'))
+    assert session.refresh() == [str(src / 'b.cbl')]
+
+    # Un copybook modifié fait réanalyser les programmes qui l'incluent
+    _touch(copybooks / 'REC.cpy', '       01  WS-REC  PIC X.\n       01  WS-REC2 PIC X.\n')
+    assert session.refresh() == [str(src / 'a.cbl')]
+    assert session.merged()['metrics']['total_lines'] > total
+
+    os.remove(src / 'b.cbl')
+    assert session.refresh() == [str(src / 'b.cbl')]
+    assert [entry['file'] for entry in session.merged()['files']] == [str(src / 'a.cbl')]
+
+def test_missing_copybook_added_later(tmp_path):
+    src = tmp_path / 'src'
+    copybooks = tmp_path / 'cpy'
+    src.mkdir()
+    copybooks.mkdir()
+    (src / 'a.cbl').write_text(PROGRAM.format(name='A', copy='       COPY REC.\n'), encoding='utf-8')
+    (src / 'b.cbl').write_text(PROGRAM.format(name='B', copy=''), encoding='utf-8')
+
+    session = WatchSession(str(src), copybook_paths=[str(copybooks)])
+    session.refresh()
+    assert session.results[str(src / 'a.cbl')]['dependencies'] == []
+    # Le copybook apparaît dans un répertoire de recherche : seul A est réanalysé
+    (copybooks / 'REC.cpy').write_text('       01  WS-REC  PIC X.\n', encoding='utf-8')
+    stat = os.stat(copybooks)
+    os.utime(copybooks, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert session.refresh() == [str(src / 'a.cbl')]
+    assert session.results[str(src / 'a.cbl')]['dependencies'] == [str(copybooks / 'REC.cpy')]
+
+def test_cli_rejects_options_ignored_by_watch(tmp_path):
+    from click.testing import CliRunner
+    from cli import cli
+    (tmp_path / 'a.cbl').write_text(PROGRAM.format(name='A', copy=''), encoding='utf-8')
+    for options in (['-f', 'json'], ['-o', str(tmp_path / 'r.md')], ['--cache']):
+        result = CliRunner().invoke(cli, ['audit', str(tmp_path / 'a.cbl'), '--watch', *options])
+        assert result.exit_code == 2
+        assert 'sans effet avec --watch' in result.output
@@ -0,0 +1,346 @@
+"""
+Entrepôt SQLite des résultats d'audit, interrogeable entre les exécutions.
+"""
+import os
+import sqlite3
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence, Tuple
+from issues import Severity
+from result_cache import DEFAULT_CACHE_DIR
+from scoring import AuditScorer
+
+DEFAULT_WAREHOUSE = os.path.join(DEFAULT_CACHE_DIR, 'warehouse.sqlite3')
+
+# Nombre de lignes de problèmes accumulées avant une insertion groupée
+BATCH_ROWS = 50000
+
+# Regroupements proposés par `ResultWarehouse.counts`
+GROUP_BY = ('rule', 'severity', 'file')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    finished REAL,
+    root TEXT,
+    file_count INTEGER NOT NULL DEFAULT 0,
+    issue_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    score REAL,
+    grade TEXT,
+    issue_count INTEGER NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS files_run ON files (run_id, path);
+CREATE TABLE IF NOT EXISTS metrics (
+    file_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS metrics_file ON metrics (file_id);
+CREATE TABLE IF NOT EXISTS dependencies (
+    file_id INTEGER NOT NULL,
+    copybook TEXT NOT NULL,
+    path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_copybook ON dependencies (copybook, file_id);
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS issues (
+    file_id INTEGER NOT NULL,
+    rule_id INTEGER NOT NULL,
+    severity INTEGER NOT NULL,
+    line INTEGER,
+    message_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_rule ON issues (rule_id, severity, file_id);
+CREATE INDEX IF NOT EXISTS issues_severity ON issues (severity, file_id);
+CREATE INDEX IF NOT EXISTS issues_file ON issues (file_id, rule_id);
+CREATE TABLE IF NOT EXISTS rule_counts (
+    run_id INTEGER NOT NULL,
+    rule_id INTEGER NOT NULL,
+    severity INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, rule_id, severity)
+);
+"""
+
+
+def copybook_name(path: str) -> str:
+    """Nom d'un copybook : nom du fichier, sans extension, en majuscules."""
+    return os.path.splitext(os.path.basename(path))[0].upper()
+
+
+class ResultWarehouse:
+    """Résultats d'audit conservés dans SQLite, une exécution après l'autre.
+
+    Chaque exécution (`runs`) enregistre ses fichiers, leurs métriques,
+    les copybooks inclus et leurs problèmes. Les noms de règles et les
+    messages, très répétitifs, sont rangés dans leurs propres tables.
+    Les insertions sont groupées (`executemany`) dans une transaction par
+    lot de `BATCH_ROWS` problèmes ; les comptes par règle et sévérité sont
+    agrégés à la fin de l'exécution, ce qui rend les agrégations sans
+    filtre de fichier indépendantes du nombre de problèmes.
+    """
+
+    def __init__(self, path: str = DEFAULT_WAREHOUSE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(_SCHEMA)
+        self.run_id: Optional[int] = None
+        self._ids: Dict[str, Dict[str, int]] = {'rules': {}, 'messages': {}}
+        self._issues: List[tuple] = []
+        self._metrics: List[tuple] = []
+        self._dependencies: List[tuple] = []
+        self._paths: List[str] = []
+        # Comptes de l'exécution en cours, par (règle, sévérité)
+        self._counts: Dict[Tuple[int, int], int] = {}
+
+    def close(self) -> None:
+        """Termine l'exécution en cours puis ferme la connexion à la base."""
+        if self.run_id is not None:
+            self.finish_run()
+        self.connection.close()
+
+    # Enregistrement
+
+    def begin_run(self) -> int:
+        """Ouvre une nouvelle exécution et retourne son identifiant."""
+        if self.run_id is not None:
+            self.finish_run()
+        with self.connection:
+            self.run_id = self.connection.execute(
+                'INSERT INTO runs (started) VALUES (?)', (time.time(),)
+            ).lastrowid
+        self._paths = []
+        self._counts = {}
+        return self.run_id
+
+    def _intern(self, table: str, column: str, value: str) -> int:
+        """Retourne l'identifiant d'un nom de règle ou d'un message, créé au besoin."""
+        ids = self._ids[table]
+        identifier = ids.get(value)
+        if identifier is None:
+            self.connection.execute(f'INSERT OR IGNORE INTO {table} ({column}) VALUES (?)', (value,))
+            identifier = ids[value] = self.connection.execute(
+                f'SELECT id FROM {table} WHERE {column} = ?', (value,)
+            ).fetchone()[0]
+        return identifier
+
+    def add(self, result: Dict[str, Any]) -> None:
+        """Ajoute le résultat d'un fichier (forme de `portfolio.analyze_one`)."""
+        if self.run_id is None:
+            self.begin_run()
+        score, grade = (None, None) if result['error'] else AuditScorer.calculate_score(result['metrics'])
+        file_id = self.connection.execute(
+            'INSERT INTO files (run_id, path, score, grade, issue_count, error) VALUES (?, ?, ?, ?, ?, ?)',
+            (self.run_id, result['file'], score, grade, len(result['issues']), result['error'])
+        ).lastrowid
+        self._paths.append(result['file'])
+        self._metrics.extend((file_id, name, value) for name, value in result['metrics'].items())
+        self._dependencies.extend((file_id, copybook_name(path), path)
+                                  for path in result.get('dependencies') or ())
+        intern = self._intern
+        rule_ids, message_ids = self._ids['rules'], self._ids['messages']
+        counts = self._counts
+        rows = self._issues
+        for issue in result['issues']:
+            # Identifiants déjà connus lus directement (ils commencent à 1)
+            key = (rule_ids.get(issue.rule) or intern('rules', 'name', issue.rule), int(issue.severity))
+            counts[key] = counts.get(key, 0) + 1
+            rows.append((file_id, *key, issue.line_number,
+                         message_ids.get(issue.message) or intern('messages', 'text', issue.message)))
+        if len(self._issues) >= BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Insère les lignes accumulées et valide la transaction du lot."""
+        with self.connection:
+            self.connection.executemany('INSERT INTO metrics VALUES (?, ?, ?)', self._metrics)
+            self.connection.executemany('INSERT INTO dependencies VALUES (?, ?, ?)', self._dependencies)
+            self.connection.executemany('INSERT INTO issues VALUES (?, ?, ?, ?, ?)', self._issues)
+        self._issues, self._metrics, self._dependencies = [], [], []
+
+    def finish_run(self) -> None:
+        """Écrit les derniers lots et les comptes agrégés de l'exécution en cours."""
+        if self.run_id is None:
+            return
+        self._flush()
+        root = None
+        if self._paths:
+            root = os.path.commonpath([os.path.abspath(path) for path in self._paths])
+            if len(self._paths) == 1:
+                root = os.path.dirname(root)
+        with self.connection:
+            self.connection.executemany(
+                'INSERT INTO rule_counts VALUES (?, ?, ?, ?)',
+                [(self.run_id, rule, severity, count) for (rule, severity), count in self._counts.items()]
+            )
+            self.connection.execute(
+                'UPDATE runs SET finished = ?, root = ?, file_count = ?, issue_count = ? WHERE id = ?',
+                (time.time(), root, len(self._paths), sum(self._counts.values()), self.run_id)
+            )
+        # Statistiques d'index échantillonnées (quelques millisecondes) : le
+        # planificateur choisit l'index le plus sélectif entre règle et fichier
+        self.connection.execute('PRAGMA analysis_limit=1000')
+        self.connection.execute('ANALYZE')
+        self.connection.commit()
+        self.run_id = None
+        self._paths = []
+        self._counts = {}
+
+    def record(self, file_results: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Enregistre les résultats d'analyse au passage, dans une nouvelle exécution.
+
+        Une exécution interrompue garde les lots déjà écrits mais n'est pas
+        terminée : les requêtes l'ignorent.
+        """
+        self.begin_run()
+        try:
+            for result in file_results:
+                self.add(result)
+                yield result
+        except BaseException:
+            self._flush()
+            self.run_id = None
+            raise
+        self.finish_run()
+
+    # Interrogation
+
+    def runs(self, limit: Optional[int] = None) -> List[Tuple]:
+        """Retourne les exécutions terminées, de la plus récente à la plus ancienne.
+
+        Chaque ligne donne (identifiant, début, racine, fichiers, problèmes).
+        """
+        return self.connection.execute(
+            'SELECT id, started, root, file_count, issue_count FROM runs '
+            'WHERE finished IS NOT NULL ORDER BY id DESC LIMIT ?',
+            (-1 if limit is None else limit,)
+        ).fetchall()
+
+    def latest_run(self) -> Optional[int]:
+        """Retourne l'identifiant de la dernière exécution terminée."""
+        row = self.connection.execute('SELECT MAX(id) FROM runs WHERE finished IS NOT NULL').fetchone()
+        return row[0]
+
+    def _filters(self, run: Optional[int], rules: Sequence[str], severities: Sequence[str],
+                 file_pattern: Optional[str], copybook: Optional[str],
+                 message: Optional[str]) -> Tuple[str, list]:
+        """Construit la clause WHERE des filtres demandés, sur les seules colonnes de issues.
+
+        Les filtres portant sur les autres tables deviennent des
+        sous-requêtes : aucune jointure n'est faite ligne à ligne.
+        """
+        files = 'SELECT id FROM files WHERE run_id = ?'
+        params: list = [self.latest_run() if run is None else run]
+        if file_pattern:
+            files += ' AND path GLOB ?'
+            params.append(file_pattern)
+        if copybook:
+            files += ' AND id IN (SELECT file_id FROM dependencies WHERE copybook = ?)'
+            params.append(copybook_name(copybook))
+        clauses = [f'issues.file_id IN ({files})']
+        if rules:
+            clauses.append(f"issues.rule_id IN (SELECT id FROM rules WHERE name IN ({', '.join('?' * len(rules))}))")
+            params.extend(rules)
+        if severities:
+            clauses.append(f"issues.severity IN ({', '.join('?' * len(severities))})")
+            params.extend(int(Severity[name.upper()]) for name in severities)
+        if message:
+            clauses.append('issues.message_id IN (SELECT id FROM messages WHERE text LIKE ?)')
+            params.append(f'%{message}%')
+        return ' AND '.join(clauses), params
+
+    def issues(self, run: Optional[int] = None, rules: Sequence[str] = (), severities: Sequence[str] = (),
+               file_pattern: Optional[str] = None, copybook: Optional[str] = None,
+               message: Optional[str] = None, limit: int = 100) -> List[Tuple]:
+        """Retourne les problèmes filtrés : (fichier, ligne, sévérité, règle, message).
+
+        Sans exécution désignée, la dernière exécution terminée est
+        interrogée ; `copybook` restreint aux programmes qui l'incluent.
+        """
+        where, params = self._filters(run, rules, severities, file_pattern, copybook, message)
+        rows = self.connection.execute(
+            'SELECT files.path, selected.line, selected.severity, rules.name, messages.text FROM '
+            f'(SELECT * FROM issues WHERE {where} ORDER BY issues.file_id, issues.line LIMIT ?) AS selected '
+            'JOIN files ON files.id = selected.file_id JOIN rules ON rules.id = selected.rule_id '
+            'JOIN messages ON messages.id = selected.message_id ORDER BY selected.file_id, selected.line',
+            (*params, limit)
+        )
+        return [(path, line, Severity(severity).name, rule, text) for path, line, severity, rule, text in rows]
+
+    def counts(self, group_by: str = 'rule', run: Optional[int] = None, rules: Sequence[str] = (),
+               severities: Sequence[str] = (), file_pattern: Optional[str] = None,
+               copybook: Optional[str] = None, message: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Retourne le nombre de problèmes par règle, sévérité ou fichier, décroissant.
+
+        Sans filtre portant sur les fichiers ou les messages, les comptes
+        agrégés en fin d'exécution sont utilisés.
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"Regroupement non supporté: {group_by}")
+        run = self.latest_run() if run is None else run
+        limit = -1 if limit is None else limit
+        if not (file_pattern or copybook or message):
+            if group_by == 'file' and not (rules or severities):
+                return self.connection.execute(
+                    'SELECT path, issue_count FROM files WHERE run_id = ? AND issue_count > 0 '
+                    'ORDER BY issue_count DESC, path LIMIT ?', (run, limit)
+                ).fetchall()
+            if group_by != 'file':
+                return self._aggregated_counts(group_by, run, rules, severities, limit)
+
+        where, params = self._filters(run, rules, severities, file_pattern, copybook, message)
+        # Comptes par colonne de issues, puis noms des règles ou des fichiers retenus
+        column, key, names = {'rule': ('rule_id', 'rules.name', 'JOIN rules ON rules.id = counts.value'),
+                              'severity': ('severity', 'counts.value', ''),
+                              'file': ('file_id', 'files.path', 'JOIN files ON files.id = counts.value')}[group_by]
+        rows = self.connection.execute(
+            f'SELECT {key}, counts.total FROM (SELECT issues.{column} AS value, COUNT(*) AS total '
+            f'FROM issues WHERE {where} GROUP BY issues.{column}) AS counts {names} '
+            f'ORDER BY counts.total DESC, {key} LIMIT ?',
+            (*params, limit)
+        ).fetchall()
+        return self._severity_names(group_by, rows)
+
+    def _aggregated_counts(self, group_by: str, run: int, rules: Sequence[str],
+                           severities: Sequence[str], limit: int) -> List[Tuple[str, int]]:
+        clauses = ['rule_counts.run_id = ?']
+        params: list = [run]
+        if rules:
+            clauses.append(f"rules.name IN ({', '.join('?' * len(rules))})")
+            params.extend(rules)
+        if severities:
+            clauses.append(f"rule_counts.severity IN ({', '.join('?' * len(severities))})")
+            params.extend(int(Severity[name.upper()]) for name in severities)
+        key = 'rules.name' if group_by == 'rule' else 'rule_counts.severity'
+        rows = self.connection.execute(
+            f'SELECT {key}, SUM(rule_counts.count) AS total FROM rule_counts '
+            f'JOIN rules ON rules.id = rule_counts.rule_id WHERE {" AND ".join(clauses)} '
+            f'GROUP BY {key} ORDER BY total DESC, {key} LIMIT ?',
+            (*params, limit)
+        ).fetchall()
+        return self._severity_names(group_by, rows)
+
+    @staticmethod
+    def _severity_names(group_by: str, rows: List[Tuple]) -> List[Tuple[str, int]]:
+        if group_by != 'severity':
+            return rows
+        return [(Severity(severity).name, count) for severity, count in rows]
@@ -0,0 +1,131 @@
+"""
+Surveillance d'une arborescence COBOL et réanalyse incrémentale (audit --watch).
+"""
+import os
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from portfolio import DEFAULT_PATTERNS, PortfolioAuditor, analyze_one, discover_cobol_files
+
+# Intervalle de scrutation par défaut (secondes)
+DEFAULT_INTERVAL = 1.0
+
+# Signature d'un fichier : (date de modification en ns, taille)
+Signature = Tuple[int, int]
+
+
+def _signature(path: str) -> Optional[Signature]:
+    """Retourne la signature d'un fichier, ou None s'il a disparu."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WatchSession:
+    """Résultats d'audit d'une arborescence, tenus à jour fichier par fichier.
+
+    L'arborescence est scrutée par signature (mtime, taille) : seuls les
+    programmes modifiés ou ajoutés sont réanalysés, ainsi que ceux dont un
+    copybook inclus a changé ou dont un copybook introuvable a pu
+    apparaître (répertoire de recherche modifié). Les résultats des autres
+    fichiers restent en mémoire et sont simplement refusionnés, et les
+    copybooks inchangés sont servis par le cache du processus
+    (copybooks.load_copybook) : le coût d'un rafraîchissement suit la
+    taille de la modification, non celle du portefeuille.
+    """
+
+    def __init__(self, root: str, patterns: Iterable[str] = DEFAULT_PATTERNS,
+                 copybook_paths: Optional[List[str]] = None, **analyze_options):
+        self.root = root
+        self.patterns = list(patterns)
+        self.copybook_paths = list(copybook_paths or [])
+        self.analyze_options = analyze_options
+        # Résultat par programme, au format de portfolio.analyze_one
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.signatures: Dict[str, Signature] = {}
+        # Signature des copybooks inclus par au moins un programme
+        self.dependencies: Dict[str, Optional[Signature]] = {}
+        # Signature des répertoires où un copybook introuvable a été cherché
+        self.directories: Dict[str, Optional[Signature]] = {}
+
+    def programs(self) -> Iterator[str]:
+        """Programmes de l'arborescence (les copybooks n'en font pas partie)."""
+        from git_changes import is_copybook
+        for path in discover_cobol_files(self.root, self.patterns):
+            if not is_copybook(path):
+                yield path
+
+    def poll(self) -> Tuple[List[str], List[str]]:
+        """Compare l'arborescence au dernier état connu.
+
+        Retourne les programmes à réanalyser et ceux qui ont disparu.
+        """
+        current = {}
+        for path in self.programs():
+            signature = _signature(path)
+            if signature is not None:
+                current[path] = signature
+        removed = [path for path in self.signatures if path not in current]
+        stale = {path for path, signature in current.items() if self.signatures.get(path) != signature}
+
+        changed_copybooks = {
+            path for path, signature in self.dependencies.items() if _signature(path) != signature
+        }
+        if changed_copybooks:
+            stale.update(
+                path for path, result in self.results.items()
+                if path in current and changed_copybooks.intersection(result['dependencies'])
+            )
+        changed_directories = {
+            path for path, signature in self.directories.items() if _signature(path) != signature
+        }
+        if changed_directories:
+            stale.update(
+                path for path, result in self.results.items()
+                if path in current and any(os.path.dirname(missing) in changed_directories
+                                           for missing in result['missing'])
+            )
+        self.signatures = current
+        return sorted(stale), removed
+
+    def refresh(self) -> List[str]:
+        """Réanalyse ce qui a changé depuis le dernier appel.
+
+        Retourne les programmes réanalysés puis ceux qui ont disparu.
+        """
+        stale, removed = self.poll()
+        for path in removed:
+            self.results.pop(path, None)
+        for path in stale:
+            self.results[path] = analyze_one(path, self.copybook_paths, **self.analyze_options)
+        if stale or removed:
+            self._track_dependencies()
+        return stale + removed
+
+    def _track_dependencies(self) -> None:
+        tracked: Set[str] = set()
+        directories: Set[str] = set()
+        for result in self.results.values():
+            tracked.update(result['dependencies'])
+            directories.update(os.path.dirname(path) for path in result['missing'])
+        self.dependencies = {path: _signature(path) for path in tracked}
+        self.directories = {path: _signature(path) for path in directories}
+
+    def merged(self) -> Dict[str, Any]:
+        """Résultat de portefeuille fusionné à partir des résultats en mémoire."""
+        return PortfolioAuditor.merge_results(self.results[path] for path in sorted(self.results))
+
+    def watch(self, interval: float = DEFAULT_INTERVAL) -> Iterator[Tuple[List[str], float]]:
+        """Produit, à chaque changement, les fichiers touchés et la durée de l'analyse.
+
+        Le premier élément correspond à l'analyse initiale de l'arborescence.
+        """
+        first = True
+        while True:
+            start = time.perf_counter()
+            changed = self.refresh()
+            if changed or first:
+                yield changed, time.perf_counter() - start
+                first = False
+            time.sleep(interval)